@@ -1,29 +1,30 @@
-from transformers import BlipProcessor, BlipForConditionalGeneration
-from PIL import Image
-import torch
 import time
 
+from app.core.model_manager import register_model, get_model, using_model
+from app.core.embeddings.vision_pool import get_vision_pool
+from app.core.utils.artifact_cache import cached_texts
+from app.core.utils.image_batching import memory_batches, open_rgb, BLIP_MB_PER_IMAGE
+from app.core.utils.precision import get_precision, model_id, load_kwargs, apply_precision, cast_inputs
+
 MODEL_NAME = "Salesforce/blip-image-captioning-base"
+BLIP_PRECISION = get_precision("BLIP_PRECISION")  # fp32 | bf16 | int8
+BLIP_MODEL_ID = model_id(MODEL_NAME, BLIP_PRECISION)
 
-# Global variables for lazy loading
-_blip_processor = None
-_blip_model = None
+def build_blip_model(precision: str = BLIP_PRECISION):
+    from transformers import BlipProcessor, BlipForConditionalGeneration
+    processor = BlipProcessor.from_pretrained(MODEL_NAME)
+    model = BlipForConditionalGeneration.from_pretrained(MODEL_NAME, **load_kwargs(precision))
+    return processor, apply_precision(model, precision)
 
-def load_blip_model():
-    """Lazy load BLIP model on first use (singleton pattern)"""
-    global _blip_processor, _blip_model
-    
-    if _blip_processor is not None and _blip_model is not None:
-        return _blip_processor, _blip_model
-    
+def _load_blip():
+    """(processor, model); loaded and evicted by the model manager"""
     max_retries = 3
     for attempt in range(max_retries):
         try:
-            print(f"[INFO] Loading BLIP model (attempt {attempt + 1}/{max_retries})...")
-            _blip_processor = BlipProcessor.from_pretrained(MODEL_NAME)
-            _blip_model = BlipForConditionalGeneration.from_pretrained(MODEL_NAME)
+            print(f"[INFO] Loading BLIP model ({BLIP_PRECISION}, attempt {attempt + 1}/{max_retries})...")
+            processor, model = build_blip_model()
             print("[INFO] BLIP model loaded successfully!")
-            return _blip_processor, _blip_model
+            return processor, model
         except Exception as e:
             print(f"[ERROR] Failed to load BLIP model (attempt {attempt + 1}): {str(e)}")
             if attempt < max_retries - 1:
@@ -33,12 +34,36 @@ def load_blip_model():
             else:
                 raise Exception(f"Failed to load BLIP model after {max_retries} attempts: {str(e)}")
 
-def generate_caption(image_path: str) -> str:
-    processor, model = load_blip_model()  # Load only when called
-    image = Image.open(image_path).convert("RGB")
-    inputs = processor(images=image, return_tensors="pt")
+register_model("blip", _load_blip)
+
+def load_blip_model():
+    """Lazy load BLIP model on first use (through the model manager)"""
+    return get_model("blip")
 
-    with torch.no_grad():
-        output = model.generate(**inputs, max_length=50)
+def captions_for(processor, model, image_paths: list) -> list:
+    """One generate() call per memory-budgeted batch"""
+    import torch
+    captions = []
+    for batch in memory_batches(image_paths, BLIP_MB_PER_IMAGE):
+        images = [open_rgb(path) for path in batch]
+        inputs = cast_inputs(processor(images=images, return_tensors="pt"), model)
 
-    return processor.decode(output[0], skip_special_tokens=True)
+        with torch.no_grad():
+            output = model.generate(**inputs, max_length=50)
+
+        captions.extend(processor.batch_decode(output, skip_special_tokens=True))
+    return captions
+
+def _captions(image_paths: list) -> list:
+    pool = get_vision_pool("ingest")
+    if pool is not None:
+        return pool.run("captions", image_paths)
+    with using_model("blip") as (processor, model):  # Load only when called
+        return captions_for(processor, model, image_paths)
+
+def generate_captions(image_paths: list) -> list:
+    """Captions for many images; only images not seen before reach the model"""
+    return cached_texts(image_paths, "caption", BLIP_MODEL_ID, _captions)
+
+def generate_caption(image_path: str) -> str:
+    return generate_captions([image_path])[0]
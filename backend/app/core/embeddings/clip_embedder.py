@@ -1,29 +1,32 @@
-import torch
-from PIL import Image
-from transformers import CLIPProcessor, CLIPModel
 import time
 
+from app.core.model_manager import register_model, get_model, using_model
+from app.core.embeddings.vision_pool import get_vision_pool
+from app.core.utils.artifact_cache import cached_vectors
+from app.core.utils.image_batching import memory_batches, open_rgb, CLIP_MB_PER_IMAGE
+from app.core.utils.micro_batcher import MicroBatcher
+from app.core.utils.query_embedding_cache import cached_query_embedding, cached_query_embedding_async
+from app.core.utils.precision import get_precision, model_id, load_kwargs, apply_precision, cast_inputs
+
 MODEL_NAME = "openai/clip-vit-base-patch32"
+CLIP_PRECISION = get_precision("CLIP_PRECISION")  # fp32 | bf16 | int8
+CLIP_MODEL_ID = model_id(MODEL_NAME, CLIP_PRECISION)
 
-# Global variables for lazy loading
-_clip_model = None
-_clip_processor = None
+def build_clip_model(precision: str = CLIP_PRECISION):
+    from transformers import CLIPProcessor, CLIPModel
+    model = CLIPModel.from_pretrained(MODEL_NAME, **load_kwargs(precision))
+    processor = CLIPProcessor.from_pretrained(MODEL_NAME)
+    return apply_precision(model, precision), processor
 
-def load_clip_model():
-    """Lazy load CLIP model on first use (singleton pattern)"""
-    global _clip_model, _clip_processor
-    
-    if _clip_model is not None and _clip_processor is not None:
-        return _clip_model, _clip_processor
-    
+def _load_clip():
+    """(model, processor); loaded and evicted by the model manager"""
     max_retries = 3
     for attempt in range(max_retries):
         try:
-            print(f"[INFO] Loading CLIP model (attempt {attempt + 1}/{max_retries})...")
-            _clip_model = CLIPModel.from_pretrained(MODEL_NAME)
-            _clip_processor = CLIPProcessor.from_pretrained(MODEL_NAME)
+            print(f"[INFO] Loading CLIP model ({CLIP_PRECISION}, attempt {attempt + 1}/{max_retries})...")
+            clip_model, clip_processor = build_clip_model()
             print("[INFO] CLIP model loaded successfully!")
-            return _clip_model, _clip_processor
+            return clip_model, clip_processor
         except Exception as e:
             print(f"[ERROR] Failed to load CLIP model (attempt {attempt + 1}): {str(e)}")
             if attempt < max_retries - 1:
@@ -33,24 +36,80 @@ def load_clip_model():
             else:
                 raise Exception(f"Failed to load CLIP model after {max_retries} attempts: {str(e)}")
 
+register_model("clip", _load_clip)
+
+def load_clip_model():
+    """Lazy load CLIP model on first use (through the model manager)"""
+    return get_model("clip")
+
+def images_features(clip_model, clip_processor, image_paths: list) -> list:
+    """One forward pass per memory-budgeted batch (CLIP resizes every image to 224x224)"""
+    import torch
+    vectors = []
+    for batch in memory_batches(image_paths, CLIP_MB_PER_IMAGE):
+        images = [open_rgb(path) for path in batch]
+        inputs = cast_inputs(clip_processor(images=images, return_tensors="pt"), clip_model)
+
+        with torch.no_grad():
+            features = clip_model.get_image_features(**inputs).float()
+
+        features = features / features.norm(dim=-1, keepdim=True)
+        vectors.extend(features.numpy())
+    return vectors
+
+
+def _images_features(image_paths: list) -> list:
+    pool = get_vision_pool("ingest")
+    if pool is not None:
+        return pool.run("clip_images", image_paths)
+    with using_model("clip") as (clip_model, clip_processor):  # Load only when called
+        return images_features(clip_model, clip_processor, image_paths)
+
+
+def embed_images(image_paths: list) -> list:
+    """CLIP vectors for many images; only images not seen before reach the model"""
+    vectors = cached_vectors(image_paths, "clip_image", CLIP_MODEL_ID, _images_features)
+    return [v.tolist() for v in vectors]
+
+
 def embed_image(image_path: str):
-    clip_model, clip_processor = load_clip_model()  # Load only when called
-    image = Image.open(image_path).convert("RGB")
-    inputs = clip_processor(images=image, return_tensors="pt")
+    return embed_images([image_path])[0]
+
+
+def load_clip_text_model():
+    """Load CLIP where text queries run: the query workers when enabled, else this process"""
+    pool = get_vision_pool("query")
+    if pool is not None:
+        if "clip" not in pool.models:
+            pool.warmup(["clip"])
+    else:
+        load_clip_model()
 
-    with torch.no_grad():
-        features = clip_model.get_image_features(**inputs)
+
+def _texts_features(texts: list) -> list:
+    pool = get_vision_pool("query")
+    if pool is not None:
+        return pool.run("clip_texts", texts)
+    import torch
+    with using_model("clip") as (clip_model, clip_processor):  # Load only when called
+        inputs = clip_processor(text=texts, return_tensors="pt", padding=True, truncation=True)
+
+        with torch.no_grad():
+            features = clip_model.get_text_features(**inputs).float()
 
     features = features / features.norm(dim=-1, keepdim=True)
-    return features[0].tolist()
+    return features.tolist()
+
+
+# Concurrent queries share one forward pass
+_text_batcher = MicroBatcher("clip_text", _texts_features)
 
 
 def embed_text_clip(text: str):
-    clip_model, clip_processor = load_clip_model()  # Load only when called
-    inputs = clip_processor(text=[text], return_tensors="pt", padding=True)
+    vector = cached_query_embedding(CLIP_MODEL_ID, text, _text_batcher.submit)
+    return vector.tolist()
 
-    with torch.no_grad():
-        features = clip_model.get_text_features(**inputs)
 
-    features = features / features.norm(dim=-1, keepdim=True)
-    return features[0].tolist()
+async def embed_text_clip_async(text: str):
+    vector = await cached_query_embedding_async(CLIP_MODEL_ID, text, _text_batcher.submit_future)
+    return vector.tolist()
@@ -1,33 +1,46 @@
 # embedder.py — LANGCHAIN VERSION (FINAL)
 
-from langchain_huggingface import HuggingFaceEmbeddings
 import time
+import numpy as np
+
+from app.core.model_manager import register_model, get_model, using_model
+from app.core.utils.embedding_cache import cached_embed
+from app.core.utils.micro_batcher import MicroBatcher
+from app.core.utils.query_embedding_cache import cached_query_embedding, cached_query_embedding_async
+from app.core.embeddings.onnx_embedder import register_onnx_embedder
 
 import os
 os.environ["HF_HOME"] = "/tmp/huggingface"
 
-# Global variable for lazy loading
-_embedding_model = None
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
-def get_embedding_model():
-    """Lazy load embedding model on first use (singleton pattern)"""
-    global _embedding_model
-    
-    if _embedding_model is not None:
-        return _embedding_model
-    
+# "torch" (LangChain / sentence-transformers, fp32), "onnx" (ONNX Runtime, fp32)
+# or "onnx-int8" (ONNX Runtime, dynamically quantized weights)
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+if EMBEDDING_BACKEND not in EMBEDDING_BACKENDS:
+    raise ValueError(f"Unknown EMBEDDING_BACKEND: {EMBEDDING_BACKEND}")
+
+# Cache key of the vectors: backends do not produce bit-identical embeddings
+EMBEDDING_MODEL_ID = (
+    EMBEDDING_MODEL_NAME if EMBEDDING_BACKEND == "torch" else f"{EMBEDDING_MODEL_NAME}|{EMBEDDING_BACKEND}"
+)
+
+def _load_embedding_model():
+    """Loaded and evicted by the model manager"""
     max_retries = 3
     for attempt in range(max_retries):
         try:
             print(f"[INFO] Loading embedding model (attempt {attempt + 1}/{max_retries})...")
-            _embedding_model = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/all-MiniLM-L6-v2",
+            from langchain_huggingface import HuggingFaceEmbeddings
+            embedding_model = HuggingFaceEmbeddings(
+                model_name=EMBEDDING_MODEL_NAME,
                 # model_name="BAAI/bge-large-en",
                 model_kwargs={"device": "cpu"},  # set "cuda" if gpu available
                 encode_kwargs={"normalize_embeddings": True}
             )
             print("[INFO] Embedding model loaded successfully!")
-            return _embedding_model
+            return embedding_model
         except Exception as e:
             print(f"[ERROR] Failed to load embedding model (attempt {attempt + 1}): {str(e)}")
             if attempt < max_retries - 1:
@@ -38,10 +51,44 @@ def get_embedding_model():
                 print("[ERROR] All retry attempts failed!")
                 raise Exception(f"Failed to load embedding model after {max_retries} attempts: {str(e)}")
 
+register_model("embeddings", _load_embedding_model)
+
+def get_embedding_model():
+    """Lazy load embedding model on first use (through the model manager)"""
+    return get_model("embeddings")
+
+def encode_texts(texts: list, backend: str = EMBEDDING_BACKEND) -> np.ndarray:
+    """Normalized float32 embeddings, one row per text"""
+    if backend == "torch":
+        with using_model("embeddings") as model:  # Load only when called
+            return np.asarray(model.embed_documents(texts), dtype=np.float32)
+    name = register_onnx_embedder(EMBEDDING_MODEL_NAME, quantized=backend == "onnx-int8")
+    with using_model(name) as model:
+        return model.embed(texts)
+
+def load_query_model():
+    """Load the model encode_texts uses for EMBEDDING_BACKEND (no-op once resident)"""
+    if EMBEDDING_BACKEND == "torch":
+        return get_model("embeddings")
+    return get_model(register_onnx_embedder(EMBEDDING_MODEL_NAME, quantized=EMBEDDING_BACKEND == "onnx-int8"))
+
+def _embed_queries(texts: list) -> list:
+    return list(encode_texts(texts))
+
+# Concurrent queries share one forward pass
+_query_batcher = MicroBatcher("embed_query", _embed_queries)
+
 def embed_query(text: str):
-    model = get_embedding_model()  # Load only when called
-    return model.embed_query(text)
+    # Repeated / rephrased-by-whitespace questions skip the model entirely
+    vector = cached_query_embedding(EMBEDDING_MODEL_ID, text, _query_batcher.submit)
+    return vector.tolist()
+
+async def embed_query_async(text: str):
+    # Same cache and batcher; the event loop awaits the batch instead of blocking
+    vector = await cached_query_embedding_async(EMBEDDING_MODEL_ID, text, _query_batcher.submit_future)
+    return vector.tolist()
 
 def embed_documents(chunks: list):
-    model = get_embedding_model()  # Load only when called
-    return model.embed_documents(chunks)
+    # Only chunks not seen before reach the model (which loads only if needed)
+    vectors = cached_embed(chunks, EMBEDDING_MODEL_ID, encode_texts)
+    return [v.tolist() for v in vectors]
@@ -1,21 +1,69 @@
-import torch
-from PIL import Image
-from transformers import (
-    AutoProcessor,
-    LlavaOnevisionForConditionalGeneration
-)
+"""
+LLaVA-OneVision reasoning about a single image
+The model is loaded on first use (or by warmup with LLAVA_WARMUP=true),
+one generation runs at a time, and answers are cached per (image hash,
+normalized question). Each call has a time budget: when it runs out the
+tokens generated so far are returned, and such partial answers are not cached.
+"""
+import os
+import time
+import hashlib
+import threading
+
+from app.core.model_manager import register_model, get_model, using_model
+from app.core.utils import metrics
+from app.core.utils.artifact_cache import get_artifact_cache, image_digest, artifact_key
+from app.core.utils.image_batching import open_rgb
+from app.core.utils.query_embedding_cache import normalize_query
 
 MODEL_ID = "llava-hf/llava-onevision-qwen2-0.5b-ov-hf"
+LLAVA_MAX_NEW_TOKENS = int(os.getenv("LLAVA_MAX_NEW_TOKENS", "200"))
+LLAVA_TIME_BUDGET = float(os.getenv("LLAVA_TIME_BUDGET", "20"))  # seconds per call, queueing included
+
+# Generation is CPU-bound and multi-threaded inside torch: a second one would
+# only slow both down, so callers queue for the single slot
+_slot = threading.BoundedSemaphore(1)
+
+
+def _load_llava():
+    """(processor, model); loaded and evicted by the model manager"""
+    max_retries = 3
+    for attempt in range(max_retries):
+        try:
+            print(f"[INFO] Loading LLaVA model (attempt {attempt + 1}/{max_retries})...")
+            import torch
+            from transformers import AutoProcessor, LlavaOnevisionForConditionalGeneration
+            processor = AutoProcessor.from_pretrained(MODEL_ID)
+            model = LlavaOnevisionForConditionalGeneration.from_pretrained(
+                MODEL_ID,
+                torch_dtype=torch.float32,
+                device_map="cpu"
+            )
+            model.eval()
+            print("[INFO] LLaVA model loaded successfully!")
+            return processor, model
+        except Exception as e:
+            print(f"[ERROR] Failed to load LLaVA model (attempt {attempt + 1}): {str(e)}")
+            if attempt < max_retries - 1:
+                wait_time = 2 ** attempt
+                print(f"[INFO] Retrying in {wait_time} seconds...")
+                time.sleep(wait_time)
+            else:
+                raise Exception(f"Failed to load LLaVA model after {max_retries} attempts: {str(e)}")
+
+
+register_model("llava", _load_llava)
+
 
-processor = AutoProcessor.from_pretrained(MODEL_ID)
-model = LlavaOnevisionForConditionalGeneration.from_pretrained(
-    MODEL_ID,
-    torch_dtype=torch.float32,
-    device_map="cpu"
-)
+def load_llava_model():
+    """Lazy load LLaVA on first use (through the model manager)"""
+    return get_model("llava")
 
-def reason_about_image(image_path: str, question: str) -> str:
-    image = Image.open(image_path).convert("RGB")
+
+def _generate(processor, model, image_path: str, question: str, max_time: float):
+    """(answer, complete); complete is False when generation stopped on max_time"""
+    import torch
+    image = open_rgb(image_path)
 
     # 🔴 REQUIRED: image placeholder token
     prompt = (
@@ -31,12 +79,53 @@ def reason_about_image(image_path: str, question: str) -> str:
         return_tensors="pt"
     )
 
-    with torch.no_grad():
+    eos_token_id = processor.tokenizer.eos_token_id
+    with torch.no_grad(), metrics.timed("llava.generate"):
         output = model.generate(
             **inputs,
-            max_new_tokens=200,
+            max_new_tokens=LLAVA_MAX_NEW_TOKENS,
+            max_time=max_time,
             do_sample=False,
-            pad_token_id=processor.tokenizer.eos_token_id
+            pad_token_id=eos_token_id
         )
 
-    return processor.decode(output[0], skip_special_tokens=True)
+    new_tokens = output[0][inputs["input_ids"].shape[1]:]
+    complete = len(new_tokens) >= LLAVA_MAX_NEW_TOKENS or (
+        len(new_tokens) > 0 and int(new_tokens[-1]) == eos_token_id
+    )
+    return processor.decode(new_tokens, skip_special_tokens=True).strip(), complete
+
+
+def reason_about_image(image_path: str, question: str, time_budget: float = LLAVA_TIME_BUDGET) -> str:
+    """
+    Answer a question about one image. Returns whatever was generated within
+    time_budget seconds (waiting for the slot included, a cold model load
+    not); an empty string if the slot never became free.
+    """
+    question_hash = hashlib.sha256(normalize_query(question).encode("utf-8")).hexdigest()[:16]
+    key = artifact_key(f"llava:{question_hash}", MODEL_ID, image_digest(image_path))
+    cache = get_artifact_cache()
+
+    value = cache.get(key)
+    if value is not None:
+        return value.decode("utf-8")
+
+    start = time.perf_counter()
+    if not _slot.acquire(timeout=time_budget):
+        metrics.incr("llava.busy")
+        print(f"[INFO] LLaVA busy for {time_budget:.0f}s, skipping {os.path.basename(image_path)}")
+        return ""
+    remaining = time_budget - (time.perf_counter() - start)
+    try:
+        # The clock stops while the model loads: on CPU a cold load alone can exceed the
+        # budget, and the first question would otherwise always come back empty
+        with using_model("llava") as (processor, model):
+            answer, complete = _generate(processor, model, image_path, question, remaining)
+    finally:
+        _slot.release()
+
+    if complete:
+        cache.set(key, answer.encode("utf-8"))
+    else:
+        metrics.incr("llava.partial")
+    return answer
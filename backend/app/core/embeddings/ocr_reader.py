@@ -1,22 +1,62 @@
-import easyocr
+from PIL import Image
 
-# Global variable for lazy loading
-_ocr_reader = None
+from app.core.model_manager import register_model, get_model, using_model
+from app.core.embeddings.vision_pool import get_vision_pool
+from app.core.utils.artifact_cache import cached_texts
+from app.core.utils.image_batching import memory_batches, OCR_MB_PER_IMAGE
 
-def get_ocr_reader():
-    """Lazy load EasyOCR reader on first use (singleton pattern)"""
-    global _ocr_reader
-    
-    if _ocr_reader is not None:
-        return _ocr_reader
-    
+OCR_MODEL_ID = "easyocr-en"
+
+# Text boxes recognized per forward pass (EasyOCR's default is 1)
+OCR_RECOGNIZER_BATCH = 16
+
+def _load_ocr_reader():
+    """Loaded and evicted by the model manager"""
     print("[INFO] Loading EasyOCR reader...")
-    _ocr_reader = easyocr.Reader(['en'], gpu=False)
+    import easyocr
+    reader = easyocr.Reader(['en'], gpu=False)
     print("[INFO] EasyOCR reader loaded successfully!")
-    return _ocr_reader
+    return reader
+
+register_model("ocr", _load_ocr_reader)
+
+def get_ocr_reader():
+    """Lazy load EasyOCR reader on first use (through the model manager)"""
+    return get_model("ocr")
+
+def _ocr_texts(reader, image_paths: list) -> list:
+    """
+    EasyOCR batches detection only across images of identical size, so
+    images are grouped by size; recognition batches the text boxes of each image.
+    """
+    by_size = {}
+    for index, path in enumerate(image_paths):
+        with Image.open(path) as image:
+            by_size.setdefault(image.size, []).append(index)
+
+    texts = [""] * len(image_paths)
+    for indices in by_size.values():
+        position = 0
+        for batch in memory_batches([image_paths[i] for i in indices], OCR_MB_PER_IMAGE):
+            if len(batch) == 1:
+                results = [reader.readtext(batch[0], detail=0, batch_size=OCR_RECOGNIZER_BATCH)]
+            else:
+                results = reader.readtext_batched(batch, detail=0, batch_size=OCR_RECOGNIZER_BATCH)
+            for lines in results:
+                texts[indices[position]] = " ".join(lines).strip()
+                position += 1
+    return texts
+
+def _read_texts(image_paths: list) -> list:
+    pool = get_vision_pool("ingest")
+    if pool is not None:
+        return pool.run("ocr", image_paths)
+    with using_model("ocr") as reader:  # Load only when called
+        return _ocr_texts(reader, image_paths)
+
+def extract_texts_from_images(image_paths: list) -> list:
+    """OCR text for many images; only images not seen before reach the model"""
+    return cached_texts(image_paths, "ocr", OCR_MODEL_ID, _read_texts)
 
 def extract_text_from_image(image_path: str) -> str:
-    reader = get_ocr_reader()  # Load only when called
-    results = reader.readtext(image_path, detail=0)
-    text = " ".join(results).strip()
-    return text
+    return extract_texts_from_images([image_path])[0]
@@ -0,0 +1,150 @@
+"""
+ONNX Runtime backend for the MiniLM sentence embedder
+The model is exported to ONNX once (needs torch), optionally quantized to
+int8 weights, and then served by ONNX Runtime with the Rust tokenizer:
+mean pooling + L2 normalization, as sentence-transformers does. Outputs
+are float32 NumPy arrays.
+"""
+import os
+import numpy as np
+
+from app.core.model_manager import register_model, get_model
+from app.core.utils.paths import data_path
+
+ONNX_MODEL_DIR = data_path("ONNX_MODEL_DIR", "data/models/minilm-onnx")
+ONNX_BATCH_SIZE = int(os.getenv("ONNX_BATCH_SIZE", "32"))
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # 0 = ONNX Runtime default (all cores)
+
+# all-MiniLM-L6-v2 truncates at 256 word pieces
+MAX_SEQ_LENGTH = 256
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model-int8.onnx"
+
+
+def _load_onnxruntime():
+    try:
+        import onnxruntime
+    except ImportError:
+        raise ImportError("EMBEDDING_BACKEND=onnx requires onnxruntime (pip install onnxruntime)")
+    return onnxruntime
+
+
+def export_onnx(model_name: str, model_dir: str = ONNX_MODEL_DIR) -> str:
+    """Export the transformer (without pooling) and its tokenizer to model_dir"""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    print(f"[INFO] Exporting {model_name} to ONNX in {model_dir}...")
+    os.makedirs(model_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    sample = tokenizer(["an export sample", "a second, longer export sample"], padding=True, return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    output_names = ["last_hidden_state", "pooler_output"]
+    path = os.path.join(model_dir, FP32_FILE)
+    tmp_path = path + ".tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            tmp_path,
+            input_names=input_names,
+            output_names=output_names,
+            dynamic_axes={
+                **{name: {0: "batch", 1: "sequence"} for name in input_names},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+                "pooler_output": {0: "batch"},
+            },
+            opset_version=14,
+        )
+    tokenizer.save_pretrained(model_dir)
+    os.replace(tmp_path, path)
+    return path
+
+
+def quantize_int8(model_dir: str = ONNX_MODEL_DIR) -> str:
+    """Dynamic quantization: int8 weights, activations quantized on the fly"""
+    _load_onnxruntime()
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    print("[INFO] Quantizing ONNX embedder to int8...")
+    path = os.path.join(model_dir, INT8_FILE)
+    tmp_path = path + ".tmp"
+    quantize_dynamic(os.path.join(model_dir, FP32_FILE), tmp_path, weight_type=QuantType.QInt8)
+    os.replace(tmp_path, path)
+    return path
+
+
+class OnnxEmbedder:
+    def __init__(self, model_path: str, tokenizer_path: str):
+        from tokenizers import Tokenizer
+        ort = _load_onnxruntime()
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ONNX_THREADS:
+            options.intra_op_num_threads = ONNX_THREADS
+        self._session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._inputs = {i.name for i in self._session.get_inputs()}
+
+        self._tokenizer = Tokenizer.from_file(tokenizer_path)
+        self._tokenizer.enable_truncation(MAX_SEQ_LENGTH)
+        self._tokenizer.enable_padding()
+
+    def embed(self, texts: list) -> np.ndarray:
+        """(len(texts), dim) float32, L2-normalized"""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        # Texts of similar length share a batch, so little compute goes to padding
+        order = np.argsort([len(t) for t in texts], kind="stable")
+        result = None
+        for start in range(0, len(texts), ONNX_BATCH_SIZE):
+            rows = order[start:start + ONNX_BATCH_SIZE]
+            encodings = self._tokenizer.encode_batch([texts[i] for i in rows])
+            mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": mask,
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            hidden = self._session.run(
+                ["last_hidden_state"], {k: v for k, v in feeds.items() if k in self._inputs}
+            )[0]
+
+            weights = mask[:, :, None].astype(np.float32)
+            pooled = (hidden * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+            pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+
+            if result is None:
+                result = np.empty((len(texts), pooled.shape[1]), dtype=np.float32)
+            result[rows] = pooled
+        return result
+
+
+def _load_onnx_embedder(model_name: str, quantized: bool) -> OnnxEmbedder:
+    """Exported / quantized on first use if not on disk yet"""
+    fp32_path = os.path.join(ONNX_MODEL_DIR, FP32_FILE)
+    if not os.path.exists(fp32_path):
+        export_onnx(model_name, ONNX_MODEL_DIR)
+    path = fp32_path
+    if quantized:
+        path = os.path.join(ONNX_MODEL_DIR, INT8_FILE)
+        if not os.path.exists(path):
+            quantize_int8(ONNX_MODEL_DIR)
+    embedder = OnnxEmbedder(path, os.path.join(ONNX_MODEL_DIR, "tokenizer.json"))
+    print(f"[INFO] ONNX embedder loaded ({'int8' if quantized else 'fp32'})")
+    return embedder
+
+
+def register_onnx_embedder(model_name: str, quantized: bool = False) -> str:
+    """Model manager name of the variant, registered on first call"""
+    name = "embeddings:onnx-int8" if quantized else "embeddings:onnx"
+    register_model(name, lambda: _load_onnx_embedder(model_name, quantized))
+    return name
+
+
+def get_onnx_embedder(model_name: str, quantized: bool = False) -> OnnxEmbedder:
+    """Loaded once per variant (through the model manager)"""
+    return get_model(register_onnx_embedder(model_name, quantized))
@@ -0,0 +1,109 @@
+"""
+Cross-encoder reranking of retrieved chunks
+All (query, chunk) pairs of a query are scored in one batched forward
+pass; scores are cached per (query, chunk id), so repeated and follow-up
+questions only score the chunks they have not seen.
+"""
+import os
+import math
+import time
+import hashlib
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.model_manager import register_model, get_model, using_model
+from app.core.utils import metrics
+from app.core.utils.memory_cache import MemoryLRU
+from app.core.utils.query_embedding_cache import normalize_query
+
+RERANK_MODEL_NAME = os.getenv("RERANK_MODEL_NAME", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_MAX_LENGTH = int(os.getenv("RERANK_MAX_LENGTH", "256"))  # query + chunk word pieces
+RERANK_CACHE_MB = float(os.getenv("RERANK_CACHE_MB", "4"))
+
+# Rough per-entry cost of a cached score (key tuple + float) in the LRU
+SCORE_ENTRY_BYTES = 200
+
+# One forward pass at a time; concurrent queries queue instead of oversubscribing the CPU
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+
+_score_cache = MemoryLRU(
+    "rerank_scores", int(RERANK_CACHE_MB * 1024 * 1024), sizeof=lambda score: SCORE_ENTRY_BYTES
+)
+
+
+def _load_reranker():
+    """(tokenizer, model); loaded and evicted by the model manager"""
+    max_retries = 3
+    for attempt in range(max_retries):
+        try:
+            print(f"[INFO] Loading reranker (attempt {attempt + 1}/{max_retries})...")
+            from transformers import AutoTokenizer, AutoModelForSequenceClassification
+            tokenizer = AutoTokenizer.from_pretrained(RERANK_MODEL_NAME)
+            model = AutoModelForSequenceClassification.from_pretrained(RERANK_MODEL_NAME)
+            model.eval()
+            print("[INFO] Reranker loaded successfully!")
+            return tokenizer, model
+        except Exception as e:
+            print(f"[ERROR] Failed to load reranker (attempt {attempt + 1}): {str(e)}")
+            if attempt < max_retries - 1:
+                wait_time = 2 ** attempt
+                print(f"[INFO] Retrying in {wait_time} seconds...")
+                time.sleep(wait_time)
+            else:
+                raise Exception(f"Failed to load reranker after {max_retries} attempts: {str(e)}")
+
+
+register_model("reranker", _load_reranker)
+
+
+def load_reranker():
+    """Lazy load the cross-encoder on first use (through the model manager)"""
+    return get_model("reranker")
+
+
+def _score_pairs(query: str, texts: list) -> list:
+    import torch
+    with using_model("reranker") as (tokenizer, model):
+        inputs = tokenizer(
+            [query] * len(texts), texts,
+            padding=True, truncation="only_second", max_length=RERANK_MAX_LENGTH, return_tensors="pt"
+        )
+        with torch.inference_mode(), metrics.timed("rerank.forward"):
+            logits = model(**inputs).logits
+    return logits[:, 0].tolist()
+
+
+def rerank(query: str, chunks: list, top_n: int) -> list:
+    """
+    The top_n chunks by cross-encoder relevance. Each keeps its retrieval
+    score as retrieval_score; "score" becomes sigmoid(logit) in (0, 1).
+    """
+    if not chunks:
+        return []
+
+    query_hash = hashlib.sha1(normalize_query(query).encode("utf-8")).hexdigest()
+    keys = [
+        (query_hash, chunk.get("id") or hashlib.sha1(chunk["text"].encode("utf-8")).hexdigest())
+        for chunk in chunks
+    ]
+    scores = [_score_cache.get(key) for key in keys]
+
+    misses = [i for i, score in enumerate(scores) if score is None]
+    if misses:
+        computed = _score_pairs(query, [chunks[i]["text"] for i in misses])
+        for i, score in zip(misses, computed):
+            scores[i] = score
+            _score_cache.set(keys[i], score)
+
+    ranked = sorted(zip(scores, chunks), key=lambda pair: pair[0], reverse=True)[:top_n]
+    return [{
+        **chunk,
+        "retrieval_score": chunk.get("score", 0),
+        "rerank_score": score,
+        "score": 1 / (1 + math.exp(-score)),
+    } for score, chunk in ranked]
+
+
+async def rerank_async(query: str, chunks: list, top_n: int) -> list:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, rerank, query, chunks, top_n)
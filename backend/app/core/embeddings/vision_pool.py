@@ -0,0 +1,319 @@
+"""
+Vision inference (CLIP, BLIP, EasyOCR) in long-lived worker processes
+Model inference holds the GIL for long stretches, so an image ingest running
+in the API process starves query handling. With VISION_INGEST_WORKERS /
+VISION_QUERY_WORKERS > 0, inference runs in two independent pools of spawned
+worker processes instead (ingest: image vectors, captions, OCR; query: CLIP
+text vectors). Each worker owns its models (through its own model manager)
+and receives image file paths, never pixels or tensors; results come back as
+float32 vectors or strings.
+
+Tasks go to the worker with the fewest in flight; a list of images is split
+across the workers. A worker that dies fails its in-flight tasks and is
+restarted. At most VISION_MAX_IN_FLIGHT tasks per worker are queued; further
+callers block (backpressure) for up to VISION_SUBMIT_TIMEOUT seconds.
+"""
+import os
+import itertools
+import threading
+import multiprocessing
+from multiprocessing.connection import wait
+from concurrent.futures import Future
+
+from app.core.utils import metrics
+
+VISION_INGEST_WORKERS = int(os.getenv("VISION_INGEST_WORKERS", "0"))  # 0 = run in the API process
+VISION_QUERY_WORKERS = int(os.getenv("VISION_QUERY_WORKERS", "0"))
+VISION_WORKER_THREADS = int(os.getenv("VISION_WORKER_THREADS", "0"))  # torch threads per worker, 0 = cores / workers
+VISION_MAX_IN_FLIGHT = int(os.getenv("VISION_MAX_IN_FLIGHT", "2"))  # queued tasks per worker
+VISION_SUBMIT_TIMEOUT = float(os.getenv("VISION_SUBMIT_TIMEOUT", "60"))  # seconds waiting for a free slot
+VISION_TASK_TIMEOUT = float(os.getenv("VISION_TASK_TIMEOUT", "600"))
+
+POOL_SIZES = {"ingest": VISION_INGEST_WORKERS, "query": VISION_QUERY_WORKERS}
+
+# Models each pool's workers load on warmup
+POOL_MODELS = {"ingest": ["clip", "ocr", "blip"], "query": ["clip"]}
+
+# True inside a worker process: the routed functions then run inference locally
+_in_worker = False
+
+
+class VisionWorkerError(RuntimeError):
+    pass
+
+
+# -------------------------------------------------
+# WORKER PROCESS
+# -------------------------------------------------
+def _run_task(kind: str, payload):
+    if kind == "clip_images":
+        import numpy as np
+        from app.core.embeddings.clip_embedder import _images_features
+        return [np.asarray(v, dtype=np.float32) for v in _images_features(payload)]
+    if kind == "clip_texts":
+        from app.core.embeddings.clip_embedder import _texts_features
+        return _texts_features(payload)
+    if kind == "captions":
+        from app.core.embeddings.blip_captioner import _captions
+        return _captions(payload)
+    if kind == "ocr":
+        from app.core.embeddings.ocr_reader import _read_texts
+        return _read_texts(payload)
+    if kind == "warmup":
+        from app.core.model_manager import get_model
+        from app.core.embeddings import clip_embedder, blip_captioner, ocr_reader  # noqa: F401 (register)
+        for name in payload:
+            get_model(name)
+        return payload
+    raise ValueError(f"Unknown vision task: {kind}")
+
+
+def _worker_main(pool_name: str, tasks, conn, threads: int):
+    global _in_worker
+    _in_worker = True
+    if threads:
+        # Read by torch at import: workers share the cores instead of each using all of them
+        os.environ["OMP_NUM_THREADS"] = str(threads)
+        os.environ["MKL_NUM_THREADS"] = str(threads)
+    print(f"[INFO] Vision worker '{pool_name}' started (pid {os.getpid()}, {threads or 'all'} threads)")
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, kind, payload = task
+        try:
+            conn.send((task_id, True, _run_task(kind, payload)))
+        except Exception as e:
+            conn.send((task_id, False, f"{type(e).__name__}: {e}"))
+    conn.close()
+
+
+# -------------------------------------------------
+# POOL (API PROCESS)
+# -------------------------------------------------
+class _Worker:
+    def __init__(self, index: int):
+        self.index = index
+        self.process = None
+        self.tasks = None
+        self.conn = None
+        self.in_flight = {}  # task_id -> Future
+        self.restarts = 0
+
+
+class VisionPool:
+    def __init__(self, name: str, size: int, threads: int = 0, max_in_flight: int = VISION_MAX_IN_FLIGHT):
+        self.name = name
+        self.threads = threads or max(1, (os.cpu_count() or 1) // max(sum(POOL_SIZES.values()), size))
+        self._context = multiprocessing.get_context("spawn")
+        self._workers = [_Worker(i) for i in range(size)]
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size * max_in_flight)
+        self._task_ids = itertools.count()
+        self._next = itertools.count()
+        self._stopping = False
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._crashes = 0
+        self.models = set()  # loaded in every worker by warmup(); cleared when one restarts
+
+        for worker in self._workers:
+            self._start(worker)
+        self._collector = threading.Thread(target=self._collect, name=f"vision-{name}-collector", daemon=True)
+        self._collector.start()
+
+        metrics.register_collector(f"vision_pool.{name}", self.stats)
+
+    def _start(self, worker: _Worker):
+        worker.tasks = self._context.Queue()
+        receiver, sender = self._context.Pipe(duplex=False)
+        worker.process = self._context.Process(
+            target=_worker_main,
+            args=(self.name, worker.tasks, sender, self.threads),
+            name=f"vision-{self.name}-{worker.index}",
+            daemon=True,
+        )
+        worker.process.start()
+        sender.close()  # the child's copy is the only writer; EOF then means the worker is gone
+        worker.conn = receiver
+
+    def submit(self, kind: str, payload, worker: _Worker = None) -> Future:
+        """Queue one task; blocks while every worker has VISION_MAX_IN_FLIGHT tasks queued"""
+        if not self._slots.acquire(timeout=VISION_SUBMIT_TIMEOUT):
+            metrics.incr(f"vision_pool.{self.name}.rejected")
+            raise TimeoutError(f"Vision pool '{self.name}' is saturated")
+
+        future = Future()
+        task_id = next(self._task_ids)
+        try:
+            with self._lock:
+                if worker is None:
+                    # Fewest tasks in flight; ties rotate so idle workers share the load
+                    start = next(self._next) % len(self._workers)
+                    order = self._workers[start:] + self._workers[:start]
+                    worker = min(order, key=lambda w: len(w.in_flight))
+                worker.tasks.put((task_id, kind, payload))
+                worker.in_flight[task_id] = future
+                self._submitted += 1
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, kind: str, items: list, timeout: float = VISION_TASK_TIMEOUT) -> list:
+        """Results for items, in order; the items are split across the workers"""
+        if not items:
+            return []
+        shard = -(-len(items) // len(self._workers))
+        futures = [self.submit(kind, items[i:i + shard]) for i in range(0, len(items), shard)]
+        results = []
+        for future in futures:
+            results.extend(future.result(timeout=timeout))
+        return results
+
+    def warmup(self, models: list):
+        """Load models in every worker"""
+        futures = [self.submit("warmup", models, worker) for worker in self._workers]
+        for future in futures:
+            future.result(timeout=VISION_TASK_TIMEOUT)
+        with self._lock:
+            self.models.update(models)
+
+    def _collect(self):
+        """Deliver results; restart workers that died (their conn hits EOF / sentinel fires)"""
+        while not self._stopping:
+            with self._lock:
+                by_handle = {}
+                for worker in self._workers:
+                    by_handle[worker.conn] = worker
+                    by_handle[worker.process.sentinel] = worker
+            for handle in wait(list(by_handle), timeout=1.0):
+                worker = by_handle[handle]
+                if handle is worker.conn:
+                    try:
+                        task_id, ok, value = worker.conn.recv()
+                    except (EOFError, OSError):
+                        continue  # the sentinel reports the exit
+                    self._deliver(worker, task_id, ok, value)
+                elif not self._stopping and worker.process.sentinel is handle:
+                    self._drain(worker)
+                    self._restart(worker)
+
+    def _deliver(self, worker: _Worker, task_id: int, ok: bool, value):
+        with self._lock:
+            future = worker.in_flight.pop(task_id, None)
+            if ok:
+                self._completed += 1
+            else:
+                self._failed += 1
+        if future is None:
+            return
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(VisionWorkerError(value))
+
+    def _drain(self, worker: _Worker):
+        """Results the worker sent before exiting"""
+        while True:
+            try:
+                if not worker.conn.poll():
+                    return
+                self._deliver(worker, *worker.conn.recv())
+            except (EOFError, OSError):
+                return
+
+    def _restart(self, worker: _Worker):
+        worker.process.join()
+        pid, exitcode = worker.process.pid, worker.process.exitcode
+        # Swapped under the lock: a task is either failed here or sent to the new process
+        with self._lock:
+            lost = list(worker.in_flight.values())
+            worker.in_flight.clear()
+            old_conn, old_tasks = worker.conn, worker.tasks
+            self._start(worker)
+            self._crashes += 1
+            worker.restarts += 1
+            self.models.clear()
+        old_conn.close()
+        old_tasks.cancel_join_thread()  # nobody will read the tasks left in it
+        old_tasks.close()
+
+        metrics.incr(f"vision_pool.{self.name}.crashes")
+        print(
+            f"[ERROR] Vision worker '{self.name}' {worker.index} (pid {pid}) exited "
+            f"with {exitcode}; failing {len(lost)} task(s) and restarting"
+        )
+        for future in lost:
+            future.set_exception(VisionWorkerError(f"Vision worker exited with {exitcode}"))
+
+    def stop(self, timeout: float = 10.0):
+        self._stopping = True
+        for worker in self._workers:
+            worker.tasks.put(None)
+        for worker in self._workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self._collector.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "threads_per_worker": self.threads,
+                "models": sorted(self.models),
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "crashes": self._crashes,
+                "workers": [{
+                    "pid": w.process.pid,
+                    "alive": w.process.is_alive(),
+                    "in_flight": len(w.in_flight),
+                    "restarts": w.restarts,
+                } for w in self._workers],
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_vision_pool(name: str):
+    """The named pool ("ingest" / "query"), started on first use; None to run in-process"""
+    if _in_worker or not POOL_SIZES.get(name):
+        return None
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                print(f"[INFO] Starting {POOL_SIZES[name]} vision worker(s) for {name}...")
+                pool = VisionPool(name, POOL_SIZES[name], VISION_WORKER_THREADS)
+                _pools[name] = pool
+    return pool
+
+
+def warmup_pools() -> list:
+    """Start the configured pools and load their models; returns the warmed pool names"""
+    warmed = []
+    for name, models in POOL_MODELS.items():
+        pool = get_vision_pool(name)
+        if pool is not None:
+            pool.warmup(models)
+            warmed.append(name)
+    return warmed
+
+
+def vision_pool_stats() -> dict:
+    return {name: pool.stats() for name, pool in list(_pools.items())}
+
+
+def stop_vision_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.stop()
+        _pools.clear()
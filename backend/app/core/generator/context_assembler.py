@@ -0,0 +1,139 @@
+"""
+Token-budgeted context packing for the LLM prompt
+Retrieved chunks are filtered by score, deduplicated, ordered by MMR
+(relevance vs. word overlap with what is already picked) and packed into
+CONTEXT_TOKEN_BUDGET. When neighbouring chunks of a document (chunk_id
+n and n+1) are both picked, the text they share from the splitter
+overlap is sent only once.
+"""
+import os
+import re
+
+from app.core.preprocess.chunker import get_tokenizer
+from app.core.utils import metrics
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+CONTEXT_MIN_SCORE = float(os.getenv("CONTEXT_MIN_SCORE", "0.2"))  # cosine
+CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7"))  # 1 = relevance only
+
+# Shortest shared text treated as splitter overlap rather than coincidence
+MIN_OVERLAP_CHARS = 20
+
+
+def count_tokens(text: str) -> int:
+    return len(get_tokenizer().encode(text, add_special_tokens=False).ids)
+
+
+def assemble_context(retrieved_chunks: list, token_budget: int = None,
+                     min_score: float = None, mmr_lambda: float = None):
+    """
+    Returns (chunks, stats): the chunks to send, in order, with overlapping
+    text trimmed, and token counts before/after packing.
+    """
+    token_budget = CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+    min_score = CONTEXT_MIN_SCORE if min_score is None else min_score
+    mmr_lambda = CONTEXT_MMR_LAMBDA if mmr_lambda is None else mmr_lambda
+
+    candidates, seen = [], set()
+    tokens_in = 0
+    dropped_low_score = duplicates = 0
+    for item in retrieved_chunks:
+        text = item.get("text", "").strip()
+        if not text:
+            continue
+        metadata = item.get("metadata", {})
+        tokens = metadata.get("token_count") or count_tokens(text)
+        tokens_in += tokens
+
+        # The threshold is on cosine similarity; exact-term (BM25) hits are kept
+        # whatever their dense score
+        if "lexical_score" not in item and item.get("dense_score", item.get("score", 0)) < min_score:
+            dropped_low_score += 1
+            continue
+        key = " ".join(text.lower().split())
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        candidates.append({
+            "item": item,
+            "text": text,
+            "tokens": tokens,
+            "words": set(re.findall(r"\w+", key)),
+        })
+
+    selected = []
+    remaining = token_budget
+    while candidates and remaining > 0:
+        best = max(candidates, key=lambda c: _mmr(c, selected, mmr_lambda))
+        candidates.remove(best)
+
+        text = _trim_neighbours(best, selected)
+        if not text:
+            continue
+        tokens = best["tokens"] if text == best["text"] else count_tokens(text)
+        if tokens > remaining:
+            continue  # a smaller candidate may still fit
+        best["text"], best["tokens"] = text, tokens
+        selected.append(best)
+        remaining -= tokens
+
+    tokens_out = token_budget - remaining
+    stats = {
+        "candidates": len(retrieved_chunks),
+        "selected": len(selected),
+        "dropped_low_score": dropped_low_score,
+        "duplicates": duplicates,
+        "tokens_in": tokens_in,
+        "tokens_out": tokens_out,
+        "tokens_saved": tokens_in - tokens_out,
+    }
+    metrics.incr("context.tokens_sent", tokens_out)
+    metrics.incr("context.tokens_saved", stats["tokens_saved"])
+
+    chunks = [{**c["item"], "text": c["text"]} for c in selected]
+    return chunks, stats
+
+
+def _mmr(candidate, selected, mmr_lambda):
+    redundancy = max((_jaccard(candidate["words"], s["words"]) for s in selected), default=0.0)
+    return mmr_lambda * candidate["item"].get("score", 0) - (1 - mmr_lambda) * redundancy
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _trim_neighbours(candidate, selected) -> str:
+    """Candidate text minus what it shares with already selected chunk_id neighbours"""
+    text = candidate["text"]
+    metadata = candidate["item"].get("metadata", {})
+    chunk_id = metadata.get("chunk_id")
+    if chunk_id is None:
+        return text
+
+    for other in selected:
+        other_meta = other["item"].get("metadata", {})
+        if other_meta.get("source") != metadata.get("source") or other_meta.get("chunk_id") is None:
+            continue
+        if other_meta["chunk_id"] == chunk_id - 1:
+            text = text[_overlap(other["text"], text):].lstrip()
+        elif other_meta["chunk_id"] == chunk_id + 1:
+            text = text[:len(text) - _overlap(text, other["text"])].rstrip()
+    return text
+
+
+def _overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of `left` that is also a prefix of `right`"""
+    probe = right[:MIN_OVERLAP_CHARS]
+    if len(probe) < MIN_OVERLAP_CHARS:
+        return 0
+    pos = left.find(probe, max(0, len(left) - len(right)))
+    while pos != -1:
+        # The first (leftmost) full match is the longest overlap
+        if right.startswith(left[pos:]):
+            return len(left) - pos
+        pos = left.find(probe, pos + 1)
+    return 0
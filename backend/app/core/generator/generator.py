@@ -1,14 +1,51 @@
 import os
-from groq import Groq
+import threading
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+from app.core.generator.context_assembler import assemble_context
 
+GROQ_MODEL = "llama-3.1-8b-instant"
+NO_CONTEXT_ANSWER = "The provided context does not contain enough information to answer this question."
 
-def generate_rag_answer(query, retrieved_chunks, retrieved_images):
+# Clients are created on the first answer, not at import (the groq SDK is slow to import)
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+
+def get_groq_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from groq import Groq
+                _client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    return _client
+
+
+def get_async_groq_client():
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                from groq import AsyncGroq
+                _async_client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+    return _async_client
+
+
+def build_prompt(query, retrieved_chunks):
+    """Returns None when there is no usable context"""
     text_context = ""
     image_context = ""
 
-    for item in retrieved_chunks:
+    # Only relevant, non-redundant text within the token budget reaches the LLM
+    context_chunks, stats = assemble_context(retrieved_chunks)
+    if stats["candidates"]:
+        print(
+            f"[INFO] Context: {stats['selected']}/{stats['candidates']} chunks, "
+            f"{stats['tokens_out']} tokens (saved {stats['tokens_saved']})"
+        )
+
+    for item in context_chunks:
         meta = item.get("metadata", {})
         if meta.get("modality") == "image":
             image_context += item.get("text", "") + "\n\n"
@@ -17,9 +54,9 @@ def generate_rag_answer(query, retrieved_chunks, retrieved_images):
 
     # If absolutely no usable context
     if not text_context.strip() and not image_context.strip():
-        return "The provided context does not contain enough information to answer this question."
+        return None
 
-    prompt = f"""
+    return f"""
 You are a Retrieval-Augmented Generation (RAG) assistant.
 
 Answer the QUESTION using ONLY the information provided in the CONTEXT.
@@ -35,9 +72,47 @@ CONTEXT:
 FINAL ANSWER:
 """
 
-    response = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
+
+def generate_rag_answer(query, retrieved_chunks, retrieved_images):
+    prompt = build_prompt(query, retrieved_chunks)
+    if prompt is None:
+        return NO_CONTEXT_ANSWER
+
+    response = get_groq_client().chat.completions.create(
+        model=GROQ_MODEL,
         messages=[{"role": "user", "content": prompt}]
     )
 
     return response.choices[0].message.content.strip()
+
+
+async def generate_rag_answer_async(query, retrieved_chunks, retrieved_images):
+    prompt = build_prompt(query, retrieved_chunks)
+    if prompt is None:
+        return NO_CONTEXT_ANSWER
+
+    response = await get_async_groq_client().chat.completions.create(
+        model=GROQ_MODEL,
+        messages=[{"role": "user", "content": prompt}]
+    )
+
+    return response.choices[0].message.content.strip()
+
+
+async def stream_rag_answer(query, retrieved_chunks, retrieved_images):
+    """Yields the answer as text deltas as Groq produces them"""
+    prompt = build_prompt(query, retrieved_chunks)
+    if prompt is None:
+        yield NO_CONTEXT_ANSWER
+        return
+
+    stream = await get_async_groq_client().chat.completions.create(
+        model=GROQ_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        stream=True
+    )
+
+    async for chunk in stream:
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            yield delta
@@ -1,18 +1,24 @@
 import os
 
-SUPPORTED_IMAGE_EXT = (".png", ".jpg", ".jpeg")
+SUPPORTED_IMAGE_EXT = (".png", ".jpg", ".jpeg", ".webp")
+
+
+def is_image(path):
+    return path.lower().endswith(SUPPORTED_IMAGE_EXT)
 
 
 def load_images(image_dir):
+    """All images under image_dir (recursively), in a stable order for batching"""
     os.makedirs(image_dir, exist_ok=True)
 
     images = []
-    for file in os.listdir(image_dir):
-        if file.lower().endswith(SUPPORTED_IMAGE_EXT):
-            images.append({
-                "image_path": os.path.join(image_dir, file),
-                "type": "image"
-            })
+    for root, _, files in os.walk(image_dir):
+        for file in sorted(files):
+            if is_image(file):
+                images.append({
+                    "image_path": os.path.join(root, file),
+                    "type": "image"
+                })
 
     print(f"🖼️ Loaded {len(images)} images")
     return images
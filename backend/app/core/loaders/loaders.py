@@ -1,48 +1,64 @@
 import os
 import zipfile
-from langchain_community.document_loaders import PyPDFLoader, TextLoader, CSVLoader, Docx2txtLoader
+
+from app.core.loaders.image_loader import is_image
 
 # ----------------------------------------------------------
 # Detect File Type and Use LangChain Loader
 # ----------------------------------------------------------
-def load_with_langchain(file_path):
+def get_langchain_loader(file_path):
+    from langchain_community.document_loaders import PyPDFLoader, TextLoader, CSVLoader, Docx2txtLoader
     ext = os.path.splitext(file_path)[1].lower()
 
     if ext == ".pdf":
-        return PyPDFLoader(file_path).load()
+        return PyPDFLoader(file_path)
 
     elif ext == ".txt":
-        return TextLoader(file_path, encoding="utf-8").load()
+        return TextLoader(file_path, encoding="utf-8")
 
     elif ext == ".csv":
-        return CSVLoader(file_path).load()
+        return CSVLoader(file_path)
    
     elif ext == ".docx":
-         return Docx2txtLoader(file_path).load()
+         return Docx2txtLoader(file_path)
     
     else:
         raise ValueError(f"Unsupported file format: {ext}")
 
 
+def load_with_langchain(file_path):
+    return get_langchain_loader(file_path).load()
+
+
 # ----------------------------------------------------------
 # ZIP Loader → Extract ZIP → Auto-load everything inside
 # ----------------------------------------------------------
-def load_zip_with_langchain(zip_path):
-    extract_dir = "data/raw/zip_extracted"
+def extract_zip(zip_path):
+    """Extract the archive into its own directory and return that directory"""
+    name = os.path.splitext(os.path.basename(zip_path))[0]
+    extract_dir = os.path.join("data/raw/zip_extracted", name)
     os.makedirs(extract_dir, exist_ok=True)
 
     # Extract files
     with zipfile.ZipFile(zip_path, "r") as zip_ref:
         zip_ref.extractall(extract_dir)
 
+    return extract_dir
+
+
+def _walk_files(root_dir):
+    for root, _, files in os.walk(root_dir):
+        for file in sorted(files):
+            yield os.path.join(root, file)
+
+
+def load_zip_with_langchain(zip_path):
     docs = []
-    for root, _, files in os.walk(extract_dir):
-        for file in files:
-            full_path = os.path.join(root, file)
-            try:
-                docs.extend(load_with_langchain(full_path))
-            except Exception:
-                print(f"Skipping unsupported file: {file}")
+    for full_path in _walk_files(extract_zip(zip_path)):
+        try:
+            docs.extend(load_with_langchain(full_path))
+        except Exception:
+            print(f"Skipping unsupported file: {os.path.basename(full_path)}")
 
     return docs
 
@@ -57,3 +73,31 @@ def load_file(file_path):
         return load_zip_with_langchain(file_path)
     
     return load_with_langchain(file_path)
+
+
+# ----------------------------------------------------------
+# STREAMING LOADER → one page (Document) at a time
+# ----------------------------------------------------------
+def iter_pages(file_path):
+    """
+    Yield the file's pages lazily, so a large PDF is never fully in memory.
+    ZIP archives (or already extracted directories) are streamed file by
+    file; images are left to the image pipeline.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+
+    if os.path.isdir(file_path):
+        root_dir = file_path
+    elif ext == ".zip":
+        root_dir = extract_zip(file_path)
+    else:
+        yield from get_langchain_loader(file_path).lazy_load()
+        return
+
+    for full_path in _walk_files(root_dir):
+        if is_image(full_path):
+            continue
+        try:
+            yield from get_langchain_loader(full_path).lazy_load()
+        except Exception:
+            print(f"Skipping unsupported file: {os.path.basename(full_path)}")
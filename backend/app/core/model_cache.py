@@ -1,54 +1,67 @@
 """
 Centralized model cache with warmup endpoint
-Reduces cold start time by pre-loading models
+Reduces cold start time by pre-loading models. The models themselves are
+owned by the model manager (app.core.model_manager), which keeps them
+within MODEL_MEMORY_BUDGET_MB and unloads idle ones.
 """
+import os
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
-# Model loading functions
-_models_loaded = {
-    "embeddings": False,
-    "clip": False,
-    "blip": False,
-    "ocr": False
-}
+from app.core.model_manager import get_model_manager
 
-_executor = ThreadPoolExecutor(max_workers=4)
+_executor = ThreadPoolExecutor(max_workers=1)
 
 async def warmup_models():
-    """Async warmup - loads models in parallel"""
+    """Async warmup - loads models in the background, in priority order"""
     print("[INFO] Starting model warmup...")
-    
-    tasks = []
-    
-    # Load embedding model
-    if not _models_loaded["embeddings"]:
-        tasks.append(_executor.submit(_load_embeddings))
-    
-    # Load CLIP model
-    if not _models_loaded["clip"]:
-        tasks.append(_executor.submit(_load_clip))
-    
-    # Load BLIP model
-    if not _models_loaded["blip"]:
-        tasks.append(_executor.submit(_load_blip))
-    
-    # Load OCR
-    if not _models_loaded["ocr"]:
-        tasks.append(_executor.submit(_load_ocr))
-    
-    # Wait for all to complete
-    for task in tasks:
-        await asyncio.get_event_loop().run_in_executor(None, task.result)
-    
+    skipped = await asyncio.get_event_loop().run_in_executor(_executor, _warmup)
     print("[INFO] All models warmed up!")
-    return {"status": "ready", "models": _models_loaded}
+    return {"status": "ready", "models": _loaded_flags(), "skipped": skipped}
+
+def _warmup_models():
+    """(model manager name, loader) in priority order"""
+    from app.core.embeddings.vision_pool import POOL_SIZES
+    backend = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+    models = [("embeddings" if backend == "torch" else f"embeddings:{backend}", _load_embeddings)]
+
+    # Vision models load here only for the work not moved to worker processes
+    # (CLIP: image vectors at ingest, text vectors at query time)
+    if not (POOL_SIZES["ingest"] and POOL_SIZES["query"]):
+        models.append(("clip", _load_clip))
+    if not POOL_SIZES["ingest"]:
+        models += [("ocr", _load_ocr), ("blip", _load_blip)]
+    if POOL_SIZES["ingest"] or POOL_SIZES["query"]:
+        models.append((None, _load_vision_workers))  # memory of other processes, not under this budget
+
+    # Load reranker (only used with RERANK_ENABLED=true)
+    if os.getenv("RERANK_ENABLED", "false").lower() == "true":
+        models.append(("reranker", _load_reranker))
+
+    # Load LLaVA (large; by default loaded on the first image question instead)
+    if os.getenv("LLAVA_WARMUP", "false").lower() == "true":
+        models.append(("llava", _load_llava))
+    return models
+
+def _warmup():
+    # Models are loaded in sequence, so each load's RSS is measured on its
+    # own and a query's model can still load alongside. Under a memory budget,
+    # models that no longer fit are left to load on first use rather than
+    # evicting the ones warmed up before them.
+    manager = get_model_manager()
+    skipped = []
+    for name, load in _warmup_models():
+        if name is not None and not manager.fits(name):
+            print(f"[INFO] Skipping warmup of '{name}' (model memory budget)")
+            skipped.append(name)
+            continue
+        load()
+    return skipped
 
 def _load_embeddings():
     try:
-        from app.core.embeddings.embedder import get_embedding_model
-        get_embedding_model()
-        _models_loaded["embeddings"] = True
+        from app.core.embeddings.embedder import encode_texts
+        encode_texts(["warmup"])  # loads whichever EMBEDDING_BACKEND is configured
         print("[INFO] ✓ Embeddings model loaded")
     except Exception as e:
         print(f"[ERROR] Failed to load embeddings: {e}")
@@ -57,7 +70,6 @@ def _load_clip():
     try:
         from app.core.embeddings.clip_embedder import load_clip_model
         load_clip_model()
-        _models_loaded["clip"] = True
         print("[INFO] ✓ CLIP model loaded")
     except Exception as e:
         print(f"[ERROR] Failed to load CLIP: {e}")
@@ -66,7 +78,6 @@ def _load_blip():
     try:
         from app.core.embeddings.blip_captioner import load_blip_model
         load_blip_model()
-        _models_loaded["blip"] = True
         print("[INFO] ✓ BLIP model loaded")
     except Exception as e:
         print(f"[ERROR] Failed to load BLIP: {e}")
@@ -75,11 +86,58 @@ def _load_ocr():
     try:
         from app.core.embeddings.ocr_reader import get_ocr_reader
         get_ocr_reader()
-        _models_loaded["ocr"] = True
         print("[INFO] ✓ OCR reader loaded")
     except Exception as e:
         print(f"[ERROR] Failed to load OCR: {e}")
 
+def _load_reranker():
+    try:
+        from app.core.embeddings.reranker import load_reranker
+        load_reranker()
+        print("[INFO] ✓ Reranker loaded")
+    except Exception as e:
+        print(f"[ERROR] Failed to load reranker: {e}")
+
+def _load_llava():
+    try:
+        from app.core.embeddings.llava_reasoner import load_llava_model
+        load_llava_model()
+        print("[INFO] ✓ LLaVA model loaded")
+    except Exception as e:
+        print(f"[ERROR] Failed to load LLaVA: {e}")
+
+def _load_vision_workers():
+    try:
+        from app.core.embeddings.vision_pool import warmup_pools
+        pools = warmup_pools()
+        print(f"[INFO] ✓ Vision workers ready ({', '.join(pools)})")
+    except Exception as e:
+        print(f"[ERROR] Failed to start vision workers: {e}")
+
+def _loaded_flags(memory: dict = None, pools: dict = None) -> dict:
+    """model -> loaded (in this process, or in every worker of the pool serving it)"""
+    from app.core.embeddings.vision_pool import vision_pool_stats
+    models = (memory or get_model_manager().status())["models"]
+    pools = vision_pool_stats() if pools is None else pools
+
+    def loaded(name):
+        return models.get(name, {}).get("loaded", False)
+
+    flags = {"embeddings": any(loaded(name) for name in models if name.split(":")[0] == "embeddings")}
+    for name in ("clip", "blip", "ocr"):
+        flags[name] = loaded(name) or any(name in pool["models"] for pool in pools.values())
+    for name in ("reranker", "llava"):
+        if name in models:
+            flags[name] = loaded(name)
+    return flags
+
 def get_models_status():
-    """Check which models are loaded"""
-    return _models_loaded
+    """
+    The model -> loaded flags (unchanged top-level shape), plus "memory":
+    per model measured memory (MB) and load / eviction / idle-unload counts,
+    and "vision_pools": the worker processes
+    """
+    from app.core.embeddings.vision_pool import vision_pool_stats
+    memory = get_model_manager().status()
+    pools = vision_pool_stats()
+    return {**_loaded_flags(memory, pools), "memory": memory, "vision_pools": pools}
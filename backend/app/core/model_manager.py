@@ -0,0 +1,294 @@
+"""
+Memory-budgeted model manager
+Models register a loader and are loaded on first use. Each load is
+measured (process RSS before / after), and the total resident model
+memory is kept under MODEL_MEMORY_BUDGET_MB by unloading the least
+recently used idle model before a new one loads. Models idle for
+MODEL_IDLE_TIMEOUT seconds are unloaded in the background.
+A model is "in use" (never evicted) only inside using_model().
+"""
+import os
+import gc
+import sys
+import time
+import threading
+from contextlib import contextmanager
+
+from app.core.utils import metrics
+from app.core.utils.process_memory import rss_bytes
+
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))  # 0 = no limit
+MODEL_IDLE_TIMEOUT = float(os.getenv("MODEL_IDLE_TIMEOUT", "0"))  # seconds, 0 = never unload
+
+MB = 1024 * 1024
+
+# Used to make room before a model's first load; replaced by the measured RSS afterwards
+ESTIMATED_MB = {
+    "embeddings": 150,
+    "embeddings:onnx": 150,
+    "embeddings:onnx-int8": 60,
+    "clip": 650,
+    "blip": 1000,
+    "ocr": 200,
+    "reranker": 150,
+    "llava": 3600,
+}
+DEFAULT_ESTIMATED_MB = 500
+
+
+def _release_memory():
+    """Return freed heap pages to the OS, so unloading a model actually lowers RSS"""
+    gc.collect()
+    if sys.platform.startswith("linux"):
+        try:
+            import ctypes
+            ctypes.CDLL("libc.so.6").malloc_trim(0)
+        except (OSError, AttributeError):
+            pass
+
+
+class _ModelEntry:
+    def __init__(self, name: str, load):
+        self.name = name
+        self.load = load
+        self.model = None
+        self.memory = 0  # bytes, measured at the last load
+        self.estimate = ESTIMATED_MB.get(name, DEFAULT_ESTIMATED_MB) * MB
+        self.in_use = 0
+        self.last_used = 0.0
+        self.load_lock = threading.Lock()  # one load of this model at a time
+        self.overlapped = False  # another load ran alongside the last one (its RSS delta is mixed)
+        self.load_seconds = 0.0
+        self.loads = 0
+        self.evictions = 0
+        self.idle_unloads = 0
+
+
+class ModelManager:
+    def __init__(self, budget_bytes: int = 0, idle_timeout: float = 0):
+        self.budget_bytes = budget_bytes
+        self.idle_timeout = idle_timeout
+        self._models = {}
+        # Short bookkeeping lock (budget, eviction, counters); loads themselves
+        # only hold their model's own load_lock, so models load concurrently
+        self._lock = threading.Lock()
+        self._loading = set()  # entries being loaded; their memory is reserved in the budget
+        self._reaper = None
+
+        metrics.register_collector("models", self.status)
+
+    def register(self, name: str, load):
+        """load() -> the model object (any value); re-registering keeps the counters"""
+        with self._lock:
+            entry = self._models.get(name)
+            if entry is None:
+                self._models[name] = _ModelEntry(name, load)
+            else:
+                entry.load = load
+
+    def get(self, name: str):
+        """The loaded model, loading it first if needed; not protected from eviction"""
+        with self._lock:
+            entry = self._entry(name)
+            entry.last_used = time.monotonic()
+            if entry.model is not None:
+                return entry.model
+        return self._load(entry)
+
+    @contextmanager
+    def use(self, name: str):
+        """The model, pinned (not evictable) for the duration of the block"""
+        with self._lock:
+            entry = self._entry(name)
+            entry.in_use += 1
+        try:
+            model = entry.model
+            if model is None:
+                model = self._load(entry)
+            yield model
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    def fits(self, name: str) -> bool:
+        """Whether the model can load without evicting anything (name need not be registered yet)"""
+        with self._lock:
+            entry = self._models.get(name) or _ModelEntry(name, None)
+            if entry.model is not None or not self.budget_bytes:
+                return True
+            return self._committed() + (entry.memory or entry.estimate) <= self.budget_bytes
+
+    def unload(self, name: str) -> bool:
+        with self._lock:
+            entry = self._entry(name)
+            if entry.model is None or entry.in_use:
+                return False
+            entry.model = None
+        _release_memory()
+        print(f"[INFO] Unloaded model '{name}' ({entry.memory / MB:.0f} MB)")
+        return True
+
+    def unload_idle(self) -> list:
+        """Unload models unused for idle_timeout seconds"""
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                e for e in self._models.values()
+                if e.model is not None and not e.in_use and now - e.last_used >= self.idle_timeout
+            ]
+        unloaded = []
+        for entry in idle:
+            if self.unload(entry.name):
+                entry.idle_unloads += 1
+                metrics.incr("models.idle_unloads")
+                unloaded.append(entry.name)
+        return unloaded
+
+    # -------------------------------------------------
+
+    def _entry(self, name: str) -> _ModelEntry:
+        entry = self._models.get(name)
+        if entry is None:
+            raise KeyError(f"Unknown model '{name}' (not registered)")
+        return entry
+
+    def _resident(self) -> int:
+        return sum(e.memory for e in self._models.values() if e.model is not None)
+
+    def _committed(self) -> int:
+        """Resident models plus the memory reserved by loads in progress"""
+        return self._resident() + sum(e.memory or e.estimate for e in self._loading)
+
+    def _reserve(self, entry: _ModelEntry):
+        # Called under _lock: concurrent loads make each other's RSS deltas unreliable
+        entry.overlapped = bool(self._loading)
+        for other in self._loading:
+            other.overlapped = True
+        self._loading.add(entry)
+
+    def _make_room(self, entry: _ModelEntry):
+        """
+        Evict least recently used idle models until entry fits the budget (or
+        nothing is evictable), then reserve its memory for the load
+        """
+        needed = entry.memory or entry.estimate
+        while True:
+            with self._lock:
+                if not self.budget_bytes or self._committed() + needed <= self.budget_bytes:
+                    self._reserve(entry)
+                    return
+                idle = [
+                    e for e in self._models.values()
+                    if e.model is not None and not e.in_use and e is not entry
+                ]
+                if not idle:
+                    if self._committed():
+                        metrics.incr("models.over_budget")
+                        print(
+                            f"[INFO] Loading '{entry.name}' over the model memory budget: "
+                            f"every resident model is in use or loading"
+                        )
+                    self._reserve(entry)
+                    return
+                victim = min(idle, key=lambda e: e.last_used)
+                victim.model = None
+                victim.evictions += 1
+            metrics.incr("models.evictions")
+            print(f"[INFO] Evicted model '{victim.name}' ({victim.memory / MB:.0f} MB) to load '{entry.name}'")
+            _release_memory()
+
+    def _load(self, entry: _ModelEntry):
+        # A cold multi-GB load of one model never holds up another model's (re)load
+        with entry.load_lock:
+            if entry.model is not None:
+                return entry.model
+
+            self._make_room(entry)
+            try:
+                gc.collect()
+                before = rss_bytes()
+                start = time.perf_counter()
+                model = entry.load()
+                load_seconds = time.perf_counter() - start
+                gc.collect()
+                memory = max(rss_bytes() - before, 0)
+            except BaseException:
+                with self._lock:
+                    self._loading.discard(entry)
+                raise
+
+            with self._lock:
+                self._loading.discard(entry)
+                if entry.overlapped:
+                    # Another model loaded meanwhile: keep the last clean measurement (or the estimate)
+                    memory = entry.memory or entry.estimate
+                entry.model = model
+                entry.memory = memory
+                entry.load_seconds = load_seconds
+                entry.loads += 1
+                entry.last_used = time.monotonic()
+            metrics.observe(f"models.load.{entry.name}", load_seconds)
+            print(f"[INFO] Model '{entry.name}' resident: {memory / MB:.0f} MB, loaded in {load_seconds:.1f}s")
+            self._start_reaper()
+            return model
+
+    def _start_reaper(self):
+        if not self.idle_timeout or self._reaper is not None:
+            return
+        interval = min(max(self.idle_timeout / 4, 1.0), 30.0)
+
+        def reap():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.unload_idle()
+                except Exception as e:
+                    print(f"[ERROR] Idle model unload failed: {e}")
+
+        self._reaper = threading.Thread(target=reap, name="model-reaper", daemon=True)
+        self._reaper.start()
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            models = {
+                name: {
+                    "loaded": e.model is not None,
+                    "memory_mb": round(e.memory / MB, 1),
+                    "in_use": e.in_use,
+                    "idle_seconds": round(now - e.last_used, 1) if e.model is not None else None,
+                    "load_seconds": round(e.load_seconds, 2),
+                    "loads": e.loads,
+                    "evictions": e.evictions,
+                    "idle_unloads": e.idle_unloads,
+                }
+                for name, e in self._models.items()
+            }
+            resident = self._resident()
+        return {
+            "rss_mb": round(rss_bytes() / MB, 1),
+            "models_mb": round(resident / MB, 1),
+            "budget_mb": round(self.budget_bytes / MB, 1) if self.budget_bytes else None,
+            "idle_timeout": self.idle_timeout or None,
+            "models": models,
+        }
+
+
+_manager = ModelManager(int(MODEL_MEMORY_BUDGET_MB * MB), MODEL_IDLE_TIMEOUT)
+
+
+def get_model_manager() -> ModelManager:
+    return _manager
+
+
+def register_model(name: str, load):
+    _manager.register(name, load)
+
+
+def get_model(name: str):
+    return _manager.get(name)
+
+
+def using_model(name: str):
+    return _manager.use(name)
@@ -0,0 +1,160 @@
+"""
+Token-window chunker aligned to the embedding model's tokenizer
+Each page is tokenized once (fast tokenizer, with character offsets);
+chunks are cut on token boundaries and sliced out of the original text,
+so nothing is re-tokenized to measure chunk length.
+"""
+import threading
+
+from app.core.embeddings.embedder import EMBEDDING_MODEL_NAME
+
+# all-MiniLM-L6-v2 truncates its input at 256 word pieces (incl. [CLS]/[SEP]);
+# tokens past that never reach the vector, so chunks are capped to fit
+EMBEDDING_MAX_TOKENS = 256
+MAX_CHUNK_TOKENS = EMBEDDING_MAX_TOKENS - 2
+
+_tokenizer = None
+_tokenizer_lock = threading.Lock()
+
+
+def get_tokenizer():
+    """Fast tokenizer of the embedding model, loaded once per process"""
+    global _tokenizer
+    if _tokenizer is None:
+        with _tokenizer_lock:
+            if _tokenizer is None:
+                print(f"[INFO] Loading tokenizer for {EMBEDDING_MODEL_NAME}...")
+                from transformers import AutoTokenizer
+                tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_MODEL_NAME, use_fast=True)
+                backend = tokenizer.backend_tokenizer
+                # Whole pages are encoded; truncation/padding would drop or pad tokens
+                backend.no_truncation()
+                backend.no_padding()
+                _tokenizer = backend
+    return _tokenizer
+
+
+def encode_pages(pages: list) -> list:
+    """Tokenize pages in one batched call (parallel in the Rust tokenizer)"""
+    return get_tokenizer().encode_batch(pages, add_special_tokens=False)
+
+
+class TokenChunker:
+    """
+    Streaming chunker: feed() pages in order, get back every chunk that is
+    complete so far; flush() returns the remainder. Chunks may span pages.
+
+    Each chunk is a dict with its text, token_count and span
+    (page_start, char_start) .. (page_end, char_end) in the fed page texts.
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int):
+        if not 0 < chunk_size <= MAX_CHUNK_TOKENS:
+            raise ValueError(f"chunk_size must be in (0, {MAX_CHUNK_TOKENS}] (model input limit), got {chunk_size}")
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError(f"chunk_overlap must be in [0, {chunk_size}), got {chunk_overlap}")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+        # Buffered pages: [page_no, text, offsets, word_ids, first unconsumed token].
+        # Work is done per chunk boundary, never per token.
+        self._buffer = []
+        self._buffered = 0
+
+    def feed(self, page_no: int, text: str, encoding=None) -> list:
+        if encoding is None:
+            encoding = get_tokenizer().encode(text, add_special_tokens=False)
+        offsets = encoding.offsets
+        if not offsets:
+            return []
+
+        self._buffer.append([page_no, text, offsets, encoding.word_ids, 0])
+        self._buffered += len(offsets)
+        return self._drain(final=False)
+
+    def flush(self) -> list:
+        return self._drain(final=True)
+
+    def _locate(self, i: int):
+        """Buffered token i -> (page entry, index into its offsets)"""
+        for entry in self._buffer:
+            available = len(entry[2]) - entry[4]
+            if i < available:
+                return entry, entry[4] + i
+            i -= available
+        raise IndexError(i)
+
+    def _same_word(self, i: int) -> bool:
+        """Token i continues the word of token i - 1"""
+        entry, j = self._locate(i)
+        return j > entry[4] and entry[3][j] == entry[3][j - 1]
+
+    def _drain(self, final: bool) -> list:
+        chunks = []
+        while self._buffered > self.chunk_size or (final and self._buffered):
+            n = self._buffered
+            end = min(self.chunk_size, n)
+
+            # Don't cut inside a word, unless the word alone fills half a chunk
+            if end < n:
+                cut = end
+                while cut > self.chunk_size // 2 and self._same_word(cut):
+                    cut -= 1
+                if cut > self.chunk_size // 2:
+                    end = cut
+
+            chunks.append(self._make_chunk(end))
+            if end == n:
+                self._drop(n)
+                break
+
+            # Next window starts chunk_overlap tokens back, on a word boundary
+            nxt = max(end - self.chunk_overlap, 1)
+            while nxt < end and self._same_word(nxt):
+                nxt += 1
+            self._drop(nxt)
+        return chunks
+
+    def _make_chunk(self, end: int) -> dict:
+        parts = []
+        remaining = end
+        for page_no, text, offsets, _, pos in self._buffer:
+            count = min(remaining, len(offsets) - pos)
+            parts.append(text[offsets[pos][0]:offsets[pos + count - 1][1]])
+            last = (page_no, offsets[pos + count - 1][1])
+            remaining -= count
+            if not remaining:
+                break
+
+        first = self._buffer[0]
+        return {
+            "text": " ".join(parts),
+            "token_count": end,
+            "page_start": first[0],
+            "char_start": first[2][first[4]][0],
+            "page_end": last[0],
+            "char_end": last[1],
+        }
+
+    def _drop(self, count: int):
+        self._buffered -= count
+        while count:
+            entry = self._buffer[0]
+            available = len(entry[2]) - entry[4]
+            if count < available:
+                entry[4] += count
+                return
+            self._buffer.pop(0)
+            count -= available
+
+
+def chunk_pages(pages: list, chunk_size: int, chunk_overlap: int, first_page: int = 0) -> list:
+    """Chunk a list of page texts, tokenizing all pages in one batch"""
+    if not pages:
+        return []
+    chunker = TokenChunker(chunk_size, chunk_overlap)
+    chunks = []
+    for offset, (text, encoding) in enumerate(zip(pages, encode_pages(pages))):
+        chunks.extend(chunker.feed(first_page + offset, text, encoding))
+    chunks.extend(chunker.flush())
+    return chunks
@@ -52,11 +52,25 @@
 
 #     return chunks, metadatas
 
+import os
 import re
 import uuid
-from transformers import AutoTokenizer
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from app.core.loaders.loaders import load_file
+from app.core.preprocess.chunker import chunk_pages, MAX_CHUNK_TOKENS
+
+# Token budgets, counted with the embedding model's own tokenizer
+TITLE_CHUNK_SIZE = 200
+TITLE_CHUNK_OVERLAP = 20
+CHUNK_SIZE = int(os.getenv("MAX_CHUNK_SIZE", "250"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "30"))
+
+if CHUNK_SIZE > MAX_CHUNK_TOKENS:
+    # Tokens past the model's input limit would never reach the vector
+    print(
+        f"[WARNING] MAX_CHUNK_SIZE={CHUNK_SIZE} exceeds the embedding model's input "
+        f"({MAX_CHUNK_TOKENS} tokens); using {MAX_CHUNK_TOKENS}"
+    )
+    CHUNK_SIZE = MAX_CHUNK_TOKENS
 
 
 def clean_text(text: str) -> str:
@@ -72,33 +86,15 @@ def preprocess_and_chunk_documents(file_path):
     session_id = str(uuid.uuid4())
 
     docs = load_file(file_path)
+    pages = [clean_text(d.page_content) for d in docs]
 
-    # ---- Page 1 ----
-    page1 = clean_text(docs[0].page_content)
-
-    # ---- Remaining pages ----
-    rest = clean_text(" ".join([d.page_content for d in docs[1:]]))
-
-    tokenizer = AutoTokenizer.from_pretrained("BAAI/bge-large-en")
-
-    splitter_small = RecursiveCharacterTextSplitter.from_huggingface_tokenizer(
-        tokenizer=tokenizer,
-        chunk_size=200,
-        chunk_overlap=20
-    )
-
-    splitter_large = RecursiveCharacterTextSplitter.from_huggingface_tokenizer(
-        tokenizer=tokenizer,
-        chunk_size=480,
-        chunk_overlap=60
-    )
-
-    page1_docs = splitter_small.create_documents([page1])
-    rest_docs = splitter_large.create_documents([rest])
+    # ---- Page 1 (title + abstract): small chunks ----
+    all_chunks = chunk_pages(pages[:1], TITLE_CHUNK_SIZE, TITLE_CHUNK_OVERLAP)
 
-    all_docs = page1_docs + rest_docs
+    # ---- Remaining pages: one token stream, chunks may cross pages ----
+    all_chunks += chunk_pages(pages[1:], CHUNK_SIZE, CHUNK_OVERLAP, first_page=1)
 
-    chunks = [doc.page_content for doc in all_docs]
+    chunks = [c["text"] for c in all_chunks]
 
     # 🔹 FIXED METADATA
     metadatas = [
@@ -106,9 +102,11 @@ def preprocess_and_chunk_documents(file_path):
             "source": file_path,
             "chunk_id": i,
             "session_id": session_id,
-            "modality": "text"
+            "modality": "text",
+            "page": c["page_start"],
+            "token_count": c["token_count"],
         }
-        for i in range(len(chunks))
+        for i, c in enumerate(all_chunks)
     ]
 
     return chunks, metadatas
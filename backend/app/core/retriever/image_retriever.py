@@ -1,5 +1,5 @@
-from app.core.embeddings.clip_embedder import embed_text_clip
-from app.core.vectorstore.vector_store import init_index, IMAGE_INDEX_NAME
+from app.core.embeddings.clip_embedder import embed_text_clip, embed_text_clip_async
+from app.core.vectorstore.vector_store import init_index, init_index_async, IMAGE_INDEX_NAME
 
 
 def retrieve_images(query, top_k=5):
@@ -17,6 +17,27 @@ def retrieve_images(query, top_k=5):
         include_metadata=True
     )
 
+    return _to_images(results)
+
+
+async def retrieve_images_async(query, top_k=5):
+    query_embedding = await embed_text_clip_async(query)
+
+    index = await init_index_async(
+        IMAGE_INDEX_NAME,
+        len(query_embedding)
+    )
+
+    results = await index.query(
+        vector=query_embedding,
+        top_k=top_k,
+        include_metadata=True
+    )
+
+    return _to_images(results)
+
+
+def _to_images(results):
     retrieved = []
     for match in results.get("matches", []):
         metadata = match.get("metadata", {})
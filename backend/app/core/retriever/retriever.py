@@ -1,8 +1,38 @@
-from app.core.embeddings.embedder import embed_query
-from app.core.vectorstore.vector_store import init_index, TEXT_INDEX_NAME
+import os
+import asyncio
+
+from app.core.embeddings.embedder import embed_query, embed_query_async
+from app.core.vectorstore.vector_store import init_index, init_index_async, TEXT_INDEX_NAME
+from app.core.vectorstore.lexical_index import search_session
+
+# BM25 hits per query from the session's lexical index, fused with the dense
+# results by reciprocal rank fusion; 0 = dense retrieval only
+LEXICAL_TOP_K = int(os.getenv("LEXICAL_TOP_K", "5"))
+RRF_K = 60
 
 
 def retrieve_chunks(query_text, top_k=5, filter=None):
+    dense = _dense_chunks(query_text, top_k, filter)
+
+    session_id = _session_of(filter)
+    if session_id is None:
+        return dense
+    return _fuse(dense, search_session(session_id, query_text, LEXICAL_TOP_K), top_k)
+
+
+async def retrieve_chunks_async(query_text, top_k=5, filter=None):
+    session_id = _session_of(filter)
+    if session_id is None:
+        return await _dense_chunks_async(query_text, top_k, filter)
+
+    dense, lexical = await asyncio.gather(
+        _dense_chunks_async(query_text, top_k, filter),
+        asyncio.to_thread(search_session, session_id, query_text, LEXICAL_TOP_K),
+    )
+    return _fuse(dense, lexical, top_k)
+
+
+def _dense_chunks(query_text, top_k, filter):
     query_embedding = embed_query(query_text)
 
     index = init_index(
@@ -17,12 +47,64 @@ def retrieve_chunks(query_text, top_k=5, filter=None):
         filter=filter
     )
 
+    return _to_chunks(result)
+
+
+async def _dense_chunks_async(query_text, top_k, filter):
+    query_embedding = await embed_query_async(query_text)
+
+    index = await init_index_async(
+        name=TEXT_INDEX_NAME,
+        dimension=len(query_embedding)
+    )
+
+    result = await index.query(
+        vector=query_embedding,
+        top_k=top_k,
+        include_metadata=True,
+        filter=filter
+    )
+
+    return _to_chunks(result)
+
+
+def _to_chunks(result):
     retrieved = []
     for match in result.get("matches", []):
         retrieved.append({
+            "id": match.get("id"),
             "score": match.get("score", 0),
             "text": match.get("metadata", {}).get("text", ""),
             "metadata": match.get("metadata", {})
         })
 
     return retrieved
+
+
+def _session_of(filter):
+    """The lexical index is per session, so it is used for session-filtered queries only"""
+    if LEXICAL_TOP_K <= 0 or not filter:
+        return None
+    session_id = filter.get("session_id")
+    return session_id if isinstance(session_id, str) else None
+
+
+def _fuse(dense, lexical, top_k):
+    """
+    Reciprocal rank fusion. "score" becomes the fused score scaled to (0, 1]
+    (1 = ranked first by both); the original scores are kept as
+    dense_score / lexical_score for the lists a chunk appeared in.
+    """
+    fused = {}
+    for name, results in (("dense", dense), ("lexical", lexical)):
+        for rank, item in enumerate(results):
+            key = item.get("id") or item["text"]
+            entry = fused.setdefault(key, {**item, "rrf": 0.0})
+            entry[f"{name}_score"] = item["score"]
+            entry["rrf"] += 1 / (RRF_K + rank + 1)
+
+    best = 2 / (RRF_K + 1)
+    ranked = sorted(fused.values(), key=lambda entry: entry["rrf"], reverse=True)[:top_k]
+    for entry in ranked:
+        entry["score"] = entry.pop("rrf") / best
+    return ranked
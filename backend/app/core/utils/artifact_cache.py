@@ -0,0 +1,96 @@
+"""
+Content-addressed cache for per-image model outputs (OCR text, captions, vectors)
+Keyed by SHA-256 of the image bytes plus the model that produced the artifact,
+so the same image is never run through the same model twice.
+"""
+import os
+import hashlib
+import threading
+import numpy as np
+
+from app.core.utils.disk_cache import DiskCache
+from app.core.utils.paths import data_path
+
+ARTIFACT_CACHE_PATH = data_path("ARTIFACT_CACHE_PATH", "data/cache/artifacts.db")
+ARTIFACT_CACHE_MB = int(os.getenv("ARTIFACT_CACHE_MB", "256"))
+
+_cache = None
+_cache_lock = threading.Lock()
+
+# (path, size, mtime) -> digest, so one image is hashed once per ingestion
+_digests = {}
+_MAX_DIGESTS = 4096
+
+
+def get_artifact_cache() -> DiskCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = DiskCache(ARTIFACT_CACHE_PATH, ARTIFACT_CACHE_MB * 1024 * 1024, "artifacts")
+    return _cache
+
+
+def image_digest(image_path: str) -> str:
+    """SHA-256 of the file contents"""
+    stat = os.stat(image_path)
+    key = (os.path.abspath(image_path), stat.st_size, stat.st_mtime_ns)
+    digest = _digests.get(key)
+    if digest is not None:
+        return digest
+
+    h = hashlib.sha256()
+    with open(image_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    digest = h.hexdigest()
+
+    if len(_digests) >= _MAX_DIGESTS:
+        _digests.clear()
+    _digests[key] = digest
+    return digest
+
+
+def artifact_key(kind: str, model: str, digest: str) -> str:
+    return f"{kind}:{model}:{digest}"
+
+
+def _cached_many(image_paths: list, kind: str, model: str, compute_batch, encode, decode) -> list:
+    keys = [artifact_key(kind, model, image_digest(p)) for p in image_paths]
+    cache = get_artifact_cache()
+    found = cache.get_many(keys)
+
+    # One model call for all misses (duplicate images computed once)
+    missing = {}
+    for key, path in zip(keys, image_paths):
+        if key not in found and key not in missing:
+            missing[key] = path
+
+    values = {key: decode(value) for key, value in found.items()}
+    if missing:
+        computed = dict(zip(missing, compute_batch(list(missing.values()))))
+        cache.set_many((key, encode(value)) for key, value in computed.items())
+        values.update({key: decode(encode(value)) for key, value in computed.items()})
+
+    return [values[key] for key in keys]
+
+
+def cached_texts(image_paths: list, kind: str, model: str, compute_batch) -> list:
+    """
+    compute_batch(paths) -> texts for the images whose image/model pair
+    was not seen before; runs once over all cache misses
+    """
+    return _cached_many(
+        image_paths, kind, model, compute_batch,
+        encode=lambda text: text.encode("utf-8"),
+        decode=lambda value: value.decode("utf-8"),
+    )
+
+
+def cached_vectors(image_paths: list, kind: str, model: str, compute_batch) -> list:
+    """Same as cached_texts for embeddings, stored as float32 blobs"""
+    return _cached_many(
+        image_paths, kind, model, compute_batch,
+        encode=lambda vector: np.asarray(vector, dtype=np.float32).tobytes(),
+        decode=lambda value: np.frombuffer(value, dtype=np.float32),
+    )
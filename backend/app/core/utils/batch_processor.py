@@ -5,17 +5,20 @@ Batch processing utilities for efficient embedding generation
 def batch_embed_documents(chunks: list, batch_size: int = 32):
     """
     Process documents in batches to reduce memory usage
-    and improve throughput
+    and improve throughput. Cached chunks skip the model entirely.
     """
-    from app.core.embeddings.embedder import get_embedding_model
-    
-    model = get_embedding_model()
-    all_embeddings = []
-    
-    for i in range(0, len(chunks), batch_size):
-        batch = chunks[i:i + batch_size]
-        embeddings = model.embed_documents(batch)
-        all_embeddings.extend(embeddings)
-        print(f"[INFO] Processed batch {i//batch_size + 1}/{(len(chunks)-1)//batch_size + 1}")
-    
-    return all_embeddings
+    from app.core.embeddings.embedder import encode_texts, EMBEDDING_MODEL_ID
+    from app.core.utils.embedding_cache import cached_embed
+
+    def embed_in_batches(misses):
+        all_embeddings = []
+
+        for i in range(0, len(misses), batch_size):
+            batch = misses[i:i + batch_size]
+            embeddings = encode_texts(batch)
+            all_embeddings.extend(embeddings)
+            print(f"[INFO] Processed batch {i//batch_size + 1}/{(len(misses)-1)//batch_size + 1}")
+
+        return all_embeddings
+
+    return [v.tolist() for v in cached_embed(chunks, EMBEDDING_MODEL_ID, embed_in_batches)]
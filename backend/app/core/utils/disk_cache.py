@@ -0,0 +1,140 @@
+"""
+Persistent key -> bytes cache on SQLite with size-bounded LRU eviction
+Shared by the artifact and embedding caches
+"""
+import os
+import time
+import sqlite3
+import threading
+
+from app.core.utils import metrics
+
+
+class DiskCache:
+    """
+    Entries are evicted least-recently-used first once the stored
+    values exceed max_bytes. Safe to share between threads.
+    """
+
+    def __init__(self, path: str, max_bytes: int, name: str):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.name = name
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_access)")
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        self._hits = 0
+        self._misses = 0
+
+        metrics.register_collector(f"cache.{name}", self.stats)
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._hits += 1
+        return row[0]
+
+    def get_many(self, keys):
+        """{key: value} for the keys that are cached"""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            # SQLite limits bound parameters per statement
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                marks = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM entries WHERE key IN ({marks})", part
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE entries SET last_access = ? WHERE key = ?",
+                    [(now, k) for k in found],
+                )
+            self._hits += len(found)
+            self._misses += len(keys) - len(found)
+        return found
+
+    def set(self, key: str, value: bytes):
+        self.set_many([(key, value)])
+
+    def set_many(self, items):
+        items = [(k, bytes(v)) for k, v in items if len(v) <= self.max_bytes]
+        if not items:
+            return
+        with self._lock:
+            now = time.time()
+            self._conn.execute("BEGIN")
+            try:
+                for key, value in items:
+                    old = self._conn.execute(
+                        "SELECT size FROM entries WHERE key = ?", (key,)
+                    ).fetchone()
+                    if old is not None:
+                        self._total -= old[0]
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                        (key, value, len(value), now),
+                    )
+                    self._total += len(value)
+                self._evict()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                self._total = self._conn.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM entries"
+                ).fetchone()[0]
+                raise
+
+    def _evict(self):
+        while self._total > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_access LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._total = 0
+                return
+            for key, size in rows:
+                if self._total <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._total -= size
+                metrics.incr(f"cache.{self.name}.evict")
+
+    def stats(self) -> dict:
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            lookups = self._hits + self._misses
+            return {
+                "entries": count,
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._total = 0
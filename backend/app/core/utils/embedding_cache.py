@@ -0,0 +1,66 @@
+"""
+Persistent embedding cache for document chunks
+Keyed by (embedding model id, hash of the whitespace-normalized chunk);
+vectors are stored as float32 blobs. Only cache misses reach the model.
+"""
+import os
+import re
+import hashlib
+import threading
+import numpy as np
+
+from app.core.utils.disk_cache import DiskCache
+from app.core.utils.paths import data_path
+
+EMBEDDING_CACHE_PATH = data_path("EMBEDDING_CACHE_PATH", "data/cache/embeddings.db")
+EMBEDDING_CACHE_MB = int(os.getenv("EMBEDDING_CACHE_MB", "512"))
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> DiskCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = DiskCache(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MB * 1024 * 1024, "embeddings")
+    return _cache
+
+
+def chunk_key(model_id: str, text: str) -> str:
+    normalized = re.sub(r"\s+", " ", text).strip()
+    digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+    return f"{model_id}:{digest}"
+
+
+def cached_embed(texts: list, model_id: str, embed_fn) -> list:
+    """
+    Embed `texts`, calling embed_fn(list_of_texts) only for unseen chunks.
+    Returns one float32 vector per input text, in order.
+    """
+    if not texts:
+        return []
+
+    cache = get_embedding_cache()
+    keys = [chunk_key(model_id, t) for t in texts]
+    found = cache.get_many(keys)
+
+    # Duplicate chunks within one upload are embedded once
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in found and key not in missing:
+            missing[key] = text
+
+    vectors = {k: np.frombuffer(v, dtype=np.float32) for k, v in found.items()}
+    if missing:
+        computed = embed_fn(list(missing.values()))
+        fresh = {
+            key: np.asarray(vector, dtype=np.float32)
+            for key, vector in zip(missing, computed)
+        }
+        cache.set_many((key, vector.tobytes()) for key, vector in fresh.items())
+        vectors.update(fresh)
+        print(f"[INFO] Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} computed")
+
+    return [vectors[key] for key in keys]
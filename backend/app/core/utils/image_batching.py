@@ -0,0 +1,47 @@
+"""
+Memory-budgeted batching for vision models
+Images are grouped so that (model activations + decoded pixels) per batch
+stay under IMAGE_BATCH_MB; image sizes are read from file headers, so
+nothing is decoded while planning batches.
+"""
+import os
+from PIL import Image
+
+IMAGE_BATCH_MB = int(os.getenv("IMAGE_BATCH_MB", "256"))
+MAX_IMAGE_BATCH = int(os.getenv("MAX_IMAGE_BATCH", "16"))
+
+# Rough peak activation memory per image for one forward / generate pass (CPU, fp32)
+CLIP_MB_PER_IMAGE = 12
+BLIP_MB_PER_IMAGE = 48
+OCR_MB_PER_IMAGE = 64
+
+
+def decoded_bytes(image_path: str) -> int:
+    """RGB size of the decoded image, from the header only"""
+    try:
+        with Image.open(image_path) as image:
+            width, height = image.size
+        return width * height * 3
+    except Exception:
+        return 0
+
+
+def memory_batches(image_paths: list, mb_per_image: int, budget_mb: int = None, max_batch: int = None):
+    """Yield lists of paths whose estimated memory fits the budget (at least one path each)"""
+    budget = (budget_mb or IMAGE_BATCH_MB) * 1024 * 1024
+    max_batch = max_batch or MAX_IMAGE_BATCH
+
+    batch, used = [], 0
+    for path in image_paths:
+        cost = mb_per_image * 1024 * 1024 + decoded_bytes(path)
+        if batch and (used + cost > budget or len(batch) >= max_batch):
+            yield batch
+            batch, used = [], 0
+        batch.append(path)
+        used += cost
+    if batch:
+        yield batch
+
+
+def open_rgb(image_path: str):
+    return Image.open(image_path).convert("RGB")
@@ -0,0 +1,70 @@
+"""
+In-process LRU cache bounded by bytes
+Used for per-process caches of small, hot values (e.g. query embeddings)
+"""
+import threading
+from collections import OrderedDict
+
+from app.core.utils import metrics
+
+
+class MemoryLRU:
+    """Thread-safe LRU; sizeof(value) -> bytes is charged against max_bytes"""
+
+    def __init__(self, name: str, max_bytes: int, sizeof):
+        self.name = name
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        metrics.register_collector(f"cache.{name}", self.stats)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def _remove(self, key):
+        _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
@@ -0,0 +1,88 @@
+"""
+Lightweight in-process metrics: counters and latency summaries
+Reported by the /metrics endpoint
+"""
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# Percentiles are computed over the most recent samples per metric
+MAX_SAMPLES = 1024
+
+_lock = threading.Lock()
+_counters = {}
+_latencies = {}   # name -> {"count", "total", "samples"}
+_collectors = {}  # name -> callable returning a dict (cache sizes, queue depths, ...)
+
+
+def incr(name: str, amount: int = 1):
+    """Increment a counter"""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def observe(name: str, seconds: float):
+    """Record one latency sample (in seconds)"""
+    with _lock:
+        stats = _latencies.get(name)
+        if stats is None:
+            stats = {"count": 0, "total": 0.0, "samples": deque(maxlen=MAX_SAMPLES)}
+            _latencies[name] = stats
+        stats["count"] += 1
+        stats["total"] += seconds
+        stats["samples"].append(seconds)
+
+
+@contextmanager
+def timed(name: str):
+    """Context manager recording the wall time of the block under `name`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def register_collector(name: str, collect):
+    """Include collect() under `name` in every snapshot"""
+    with _lock:
+        _collectors[name] = collect
+
+
+def _percentile(sorted_samples, p):
+    index = min(len(sorted_samples) - 1, int(round(p / 100 * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def snapshot() -> dict:
+    """Counters plus latency summaries in milliseconds"""
+    with _lock:
+        counters = dict(_counters)
+        latencies = {
+            name: (stats["count"], stats["total"], sorted(stats["samples"]))
+            for name, stats in _latencies.items()
+        }
+        collectors = dict(_collectors)
+
+    latency_ms = {}
+    for name, (count, total, samples) in latencies.items():
+        latency_ms[name] = {
+            "count": count,
+            "mean": round(total / count * 1000, 3),
+            "p50": round(_percentile(samples, 50) * 1000, 3),
+            "p95": round(_percentile(samples, 95) * 1000, 3),
+            "max": round(samples[-1] * 1000, 3),
+        }
+
+    return {
+        "counters": counters,
+        "latency_ms": latency_ms,
+        **{name: collect() for name, collect in collectors.items()},
+    }
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _latencies.clear()
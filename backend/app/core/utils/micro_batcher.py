@@ -0,0 +1,121 @@
+"""
+Dynamic micro-batching for model calls
+Concurrent callers submit single items; a worker thread collects whatever
+arrives within a short window (or until max_batch items) and runs them
+through the model as one batch, then hands each caller its own result.
+"""
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future, InvalidStateError
+
+from app.core.utils import metrics
+
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "5"))
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "32"))
+
+
+def _deliver(set_outcome, value):
+    try:
+        set_outcome(value)
+    except InvalidStateError:
+        pass  # already resolved; must not kill the worker thread
+
+
+class MicroBatcher:
+    """
+    batch_fn(list_of_items) -> list_of_results, same order and length.
+    Reported at /metrics under batcher.<name>.
+    """
+
+    def __init__(self, name: str, batch_fn, max_batch: int = EMBED_MAX_BATCH,
+                 window_ms: float = EMBED_BATCH_WINDOW_MS):
+        self.name = name
+        self.max_batch = max_batch
+        self.window = window_ms / 1000
+        self._batch_fn = batch_fn
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+        self._batches = 0
+        self._items = 0
+        self._largest = 0
+
+        metrics.register_collector(f"batcher.{name}", self.stats)
+
+    def submit(self, item):
+        """Blocking: returns this item's result once its batch has run"""
+        return self.submit_future(item).result()
+
+    def submit_future(self, item) -> Future:
+        """Non-blocking; asyncio callers can await asyncio.wrap_future(...)"""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def _ensure_worker(self):
+        # Also restarts a worker that died, so queued callers are never stranded
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(
+                        target=self._run, name=f"batcher-{self.name}", daemon=True
+                    )
+                    self._worker.start()
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    # Window closed: still take whatever is already waiting
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Callers that cancelled (e.g. asyncio.wait_for timed out) are dropped;
+            # the rest can no longer be cancelled while their batch runs
+            batch = [entry for entry in self._collect() if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            items = [item for item, _, _ in batch]
+
+            started = time.perf_counter()
+            for _, _, queued_at in batch:
+                metrics.observe(f"batcher.{self.name}.wait", started - queued_at)
+
+            try:
+                with metrics.timed(f"batcher.{self.name}.batch"):
+                    results = self._batch_fn(items)
+            except Exception as e:
+                for _, future, _ in batch:
+                    _deliver(future.set_exception, e)
+                continue
+
+            for (_, future, _), result in zip(batch, results):
+                _deliver(future.set_result, result)
+
+            self._batches += 1
+            self._items += len(batch)
+            self._largest = max(self._largest, len(batch))
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "batches": self._batches,
+            "items": self._items,
+            "mean_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "max_batch_size": self._largest,
+            "window_ms": self.window * 1000,
+            "max_batch": self.max_batch,
+        }
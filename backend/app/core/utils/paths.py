@@ -0,0 +1,15 @@
+"""
+Locations of the backend's persistent data (job queue, caches, indexes)
+Relative paths, defaults and env values alike, resolve against the backend
+directory rather than the working directory, so starting uvicorn from the
+repo root finds the same jobs, caches and indexes as starting it in backend/.
+"""
+import os
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+
+def data_path(env_var: str, default: str) -> str:
+    """os.getenv(env_var, default) made absolute; an empty value (feature off) stays empty"""
+    value = os.getenv(env_var, default)
+    return os.path.join(BACKEND_DIR, value) if value else value
@@ -0,0 +1,45 @@
+"""
+Reduced-precision variants of the vision models, applied at load time
+fp32: as published. bf16: weights and activations in bfloat16 (half the
+memory; faster only on CPUs with native bf16). int8: dynamic quantization
+of the Linear layers (int8 weights, activations quantized per call).
+"""
+import os
+
+PRECISIONS = ("fp32", "bf16", "int8")
+
+
+def get_precision(env_name: str) -> str:
+    precision = os.getenv(env_name, "fp32").lower()
+    if precision not in PRECISIONS:
+        raise ValueError(f"{env_name} must be one of {', '.join(PRECISIONS)}, got {precision}")
+    return precision
+
+
+def model_id(model_name: str, precision: str) -> str:
+    """Cache key of a model's outputs: other precisions do not reproduce fp32 results exactly"""
+    return model_name if precision == "fp32" else f"{model_name}|{precision}"
+
+
+def load_kwargs(precision: str) -> dict:
+    """from_pretrained() arguments; bf16 weights are loaded directly, without an fp32 copy"""
+    import torch
+    return {"torch_dtype": torch.bfloat16} if precision == "bf16" else {}
+
+
+def apply_precision(model, precision: str):
+    model.eval()
+    if precision == "int8":
+        import torch
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def cast_inputs(inputs, model) -> dict:
+    """Floating point inputs (pixel values) in the dtype of the model's weights"""
+    import torch
+    dtype = next((p.dtype for p in model.parameters() if p.is_floating_point()), torch.float32)
+    return {
+        key: value.to(dtype) if torch.is_tensor(value) and value.is_floating_point() else value
+        for key, value in inputs.items()
+    }
@@ -0,0 +1,24 @@
+"""
+Resident memory (RSS) of the current process
+Read from /proc/self/statm on Linux (cheap enough to call around every
+model load); other platforms fall back to the peak RSS reported by
+getrusage, which is an upper bound.
+"""
+import os
+import sys
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # bytes on macOS, KiB on Linux
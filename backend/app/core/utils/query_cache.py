@@ -1,38 +1,204 @@
 """
-Simple in-memory cache for query results
-Reduces redundant LLM calls for similar questions
+In-memory answer cache for query results
+A question is answered from the cache when the same session already asked
+it (exact, after normalization) or asked something whose query embedding
+is nearly identical. Entries are evicted LRU, expire after a TTL, and are
+dropped whenever new content is ingested into their session.
+Each session has a version, bumped when an ingestion into it starts and
+when it ends: an answer is only stored if the session's version is still
+the one its query started with and no ingestion is running, so answers
+built from a partial or outdated index are never cached.
 """
-import hashlib
-from functools import lru_cache
+import os
+import time
+import threading
+from collections import OrderedDict
 from typing import Optional
+import numpy as np
 
-# Simple dict cache (use Redis for production)
-_query_cache = {}
-MAX_CACHE_SIZE = 100
-
-def get_cache_key(question: str, session_id: str) -> str:
-    """Generate cache key from question and session"""
-    combined = f"{session_id}:{question.lower().strip()}"
-    return hashlib.md5(combined.encode()).hexdigest()
-
-def get_cached_answer(question: str, session_id: str) -> Optional[dict]:
-    """Retrieve cached answer if exists"""
-    key = get_cache_key(question, session_id)
-    return _query_cache.get(key)
-
-def cache_answer(question: str, session_id: str, answer: dict):
-    """Cache the answer"""
-    key = get_cache_key(question, session_id)
-    
-    # Simple LRU: remove oldest if cache is full
-    if len(_query_cache) >= MAX_CACHE_SIZE:
-        oldest_key = next(iter(_query_cache))
-        del _query_cache[oldest_key]
-    
-    _query_cache[key] = answer
-    print(f"[INFO] Cached answer for query (cache size: {len(_query_cache)})")
+from app.core.utils import metrics
+from app.core.utils.query_embedding_cache import normalize_query
+
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))  # seconds
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))  # cosine
+
+
+class AnswerCache:
+    def __init__(self, max_entries: int, ttl: float, similarity: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (session, normalized question) -> (answer, unit vector, stored_at)
+        self._sessions = {}            # session -> set of keys, for similarity search
+        self._versions = {}            # session -> content version
+        self._updating = {}            # session -> ingestions in progress
+        self._hits = {"exact": 0, "semantic": 0}
+        self._misses = 0
+        self._stale = 0  # answers not stored: the session changed while they were built
+
+    def get(self, question: str, session_id: str, embed=None):
+        """
+        Exact match first; otherwise, with `embed` (question -> vector, only
+        called when the session has cached answers), the most similar question
+        """
+        key = (session_id, normalize_query(question))
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[2] > self.ttl:
+                self._remove(key)
+            elif entry is not None:
+                self._entries.move_to_end(key)
+                self._hits["exact"] += 1
+                return entry[0]
+            has_candidates = session_id in self._sessions
+
+        if embed is not None and has_candidates:
+            # Embedding happens outside the lock
+            query = _unit(embed(question))
+            with self._lock:
+                best_key, best_score = None, self.similarity
+                for other in self._sessions.get(session_id, ()):
+                    _, vector, stored_at = self._entries[other]
+                    if vector is None or now - stored_at > self.ttl:
+                        continue
+                    score = float(np.dot(query, vector))
+                    if score >= best_score:
+                        best_key, best_score = other, score
+                if best_key is not None:
+                    self._entries.move_to_end(best_key)
+                    self._hits["semantic"] += 1
+                    return self._entries[best_key][0]
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def has_session(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._sessions
+
+    def version(self, session_id: str) -> int:
+        with self._lock:
+            return self._versions.get(session_id, 0)
+
+    def set(self, question: str, session_id: str, answer, embedding=None, version=None) -> bool:
+        """Store the answer; with `version` (from version()), only if the session did not change since"""
+        key = (session_id, normalize_query(question))
+        vector = _unit(embedding) if embedding is not None else None
+        with self._lock:
+            if version is not None and (
+                version != self._versions.get(session_id, 0) or self._updating.get(session_id)
+            ):
+                self._stale += 1
+                return False
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (answer, vector, time.time())
+            self._sessions.setdefault(session_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+        return True
+
+    def begin_update(self, session_id: str) -> int:
+        """An ingestion into the session started: no answers are stored until it ends"""
+        with self._lock:
+            self._updating[session_id] = self._updating.get(session_id, 0) + 1
+            return self._invalidate(session_id)
+
+    def end_update(self, session_id: str) -> int:
+        with self._lock:
+            if self._updating.get(session_id, 0) > 1:
+                self._updating[session_id] -= 1
+            else:
+                self._updating.pop(session_id, None)
+            return self._invalidate(session_id)
+
+    def invalidate_session(self, session_id: str) -> int:
+        with self._lock:
+            return self._invalidate(session_id)
+
+    def _invalidate(self, session_id: str) -> int:
+        self._versions[session_id] = self._versions.get(session_id, 0) + 1
+        keys = list(self._sessions.get(session_id, ()))
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def _remove(self, key):
+        del self._entries[key]
+        keys = self._sessions.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._sessions[key[0]]
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self._hits["exact"] + self._hits["semantic"]
+            lookups = hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "sessions": len(self._sessions),
+                "max_entries": self.max_entries,
+                "exact_hits": self._hits["exact"],
+                "semantic_hits": self._hits["semantic"],
+                "misses": self._misses,
+                "stale_rejected": self._stale,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sessions.clear()
+
+
+def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+_answer_cache = AnswerCache(ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL, ANSWER_CACHE_SIMILARITY)
+metrics.register_collector("cache.answers", _answer_cache.stats)
+
+
+def get_cached_answer(question: str, session_id: str, embed=None) -> Optional[str]:
+    """Retrieve cached answer if exists (embed enables similar-question matches)"""
+    return _answer_cache.get(question, session_id, embed)
+
+def has_cached_answers(session_id: str) -> bool:
+    """Whether a similar-question lookup could hit (worth embedding the question for)"""
+    return _answer_cache.has_session(session_id)
+
+def answer_cache_version(session_id: str) -> int:
+    """Taken when a query starts; pass it to cache_answer"""
+    return _answer_cache.version(session_id)
+
+def cache_answer(question: str, session_id: str, answer, embedding=None, version=None):
+    """Cache the answer (unless the session changed since `version` was taken)"""
+    _answer_cache.set(question, session_id, answer, embedding, version)
+
+def begin_session_update(session_id: str):
+    """New content is being ingested into the session: drop and stop caching its answers"""
+    _report_dropped(session_id, _answer_cache.begin_update(session_id))
+
+def end_session_update(session_id: str):
+    """The ingestion finished (or failed): drop answers built meanwhile and resume caching"""
+    _report_dropped(session_id, _answer_cache.end_update(session_id))
+
+def invalidate_session(session_id: str):
+    """Drop cached answers of a session whose content changed"""
+    _report_dropped(session_id, _answer_cache.invalidate_session(session_id))
+
+def _report_dropped(session_id: str, removed: int):
+    if removed:
+        print(f"[INFO] Answer cache: dropped {removed} answer(s) for session {session_id}")
 
 def clear_cache():
     """Clear all cached queries"""
-    _query_cache.clear()
+    _answer_cache.clear()
     print("[INFO] Query cache cleared")
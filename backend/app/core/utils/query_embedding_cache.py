@@ -0,0 +1,65 @@
+"""
+In-memory LRU of query embeddings (MiniLM and CLIP text)
+Keyed by (model id, normalized query text); vectors are kept as float32
+arrays and evicted least-recently-used first by byte budget.
+"""
+import os
+import re
+import asyncio
+import threading
+import numpy as np
+
+from app.core.utils.memory_cache import MemoryLRU
+
+QUERY_EMBEDDING_CACHE_MB = float(os.getenv("QUERY_EMBEDDING_CACHE_MB", "16"))
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_query_embedding_cache() -> MemoryLRU:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = MemoryLRU(
+                    "query_embeddings",
+                    int(QUERY_EMBEDDING_CACHE_MB * 1024 * 1024),
+                    sizeof=lambda vector: vector.nbytes,
+                )
+    return _cache
+
+
+def normalize_query(text: str) -> str:
+    # Both MiniLM and CLIP tokenizers lowercase and split on whitespace,
+    # so these variants embed identically
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def cached_query_embedding(model_id: str, text: str, embed_fn) -> np.ndarray:
+    """embed_fn(text) runs only for (model, query) pairs not in the cache"""
+    cache = get_query_embedding_cache()
+    key = (model_id, normalize_query(text))
+
+    vector = cache.get(key)
+    if vector is None:
+        vector = _store(cache, key, embed_fn(text))
+    return vector
+
+
+async def cached_query_embedding_async(model_id: str, text: str, embed_future_fn) -> np.ndarray:
+    """Async variant: embed_future_fn(text) returns a concurrent Future (e.g. MicroBatcher.submit_future)"""
+    cache = get_query_embedding_cache()
+    key = (model_id, normalize_query(text))
+
+    vector = cache.get(key)
+    if vector is None:
+        vector = _store(cache, key, await asyncio.wrap_future(embed_future_fn(text)))
+    return vector
+
+
+def _store(cache: MemoryLRU, key, embedding) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    vector.setflags(write=False)
+    cache.set(key, vector)
+    return vector
@@ -0,0 +1,368 @@
+"""
+Approximate nearest-neighbour index (HNSW) with the Pinecone upsert/query interface
+Backed by hnswlib; deletions are tombstones and the graph persists to disk.
+hnswlib stores cosine vectors normalized; each vector's norm is kept alongside
+so fetch / include_values return the vectors as upserted (up to float32 rounding).
+"""
+import os
+import json
+import threading
+import numpy as np
+
+from app.core.vectorstore.local_index import MetadataPostings, matches_filter
+from app.core.utils.paths import data_path
+
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+HNSW_INDEX_DIR = data_path("HNSW_INDEX_DIR", "data/hnsw")
+
+# Filters selecting fewer rows than this are answered by exact search over those rows;
+# graph search with a very selective filter degrades towards a full scan anyway
+EXACT_SEARCH_THRESHOLD = int(os.getenv("HNSW_EXACT_SEARCH_THRESHOLD", "5000"))
+
+
+def _load_hnswlib():
+    try:
+        import hnswlib
+    except ImportError:
+        raise ImportError("VECTOR_BACKEND=hnsw requires hnswlib (pip install hnswlib)")
+    return hnswlib
+
+
+class HnswIndex:
+    """
+    HNSW graph over cosine distance.
+    Every vector gets an integer label; string ids and metadata are kept alongside.
+    """
+
+    def __init__(self, name, dimension, path=None, M=HNSW_M,
+                 ef_construction=HNSW_EF_CONSTRUCTION, ef_search=HNSW_EF_SEARCH,
+                 initial_capacity=10000):
+        hnswlib = _load_hnswlib()
+
+        self.name = name
+        self.dimension = dimension
+        self.path = path
+        self.M = M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+
+        self._ids = {}          # label -> id
+        self._labels = {}       # id -> label
+        self._metadata = {}     # label -> metadata
+        self._norms = {}        # label -> norm of the upserted vector
+        self._postings = MetadataPostings()
+        self._next_label = 0
+        self._deleted = 0
+        self._dirty = False
+        self._lock = threading.RLock()
+
+        self._index = hnswlib.Index(space="cosine", dim=dimension)
+        if path and os.path.exists(os.path.join(path, "graph.bin")):
+            self._load(hnswlib)
+        else:
+            self._index.init_index(
+                max_elements=initial_capacity,
+                ef_construction=ef_construction,
+                M=M,
+                allow_replace_deleted=True,
+            )
+        self._index.set_ef(ef_search)
+
+    def __len__(self):
+        return len(self._labels)
+
+    # ---------- write path ----------
+    def upsert(self, vectors, **kwargs):
+        ids, values, metadatas = [], [], []
+        for record in vectors:
+            if isinstance(record, dict):
+                ids.append(str(record["id"]))
+                values.append(record["values"])
+                metadatas.append(dict(record.get("metadata") or {}))
+            else:
+                ids.append(str(record[0]))
+                values.append(record[1])
+                metadatas.append(dict(record[2]) if len(record) > 2 else {})
+
+        if not ids:
+            return {"upserted_count": 0}
+        upserted = len(ids)
+
+        # An id repeated in one batch would get two labels; the last record wins
+        last = {vec_id: i for i, vec_id in enumerate(ids)}
+        if len(last) < len(ids):
+            keep = sorted(last.values())
+            ids = [ids[i] for i in keep]
+            values = [values[i] for i in keep]
+            metadatas = [metadatas[i] for i in keep]
+
+        data = np.asarray(values, dtype=np.float32)
+        if data.ndim != 2 or data.shape[1] != self.dimension:
+            raise ValueError(f"Expected vectors of dimension {self.dimension}, got {data.shape}")
+        norms = np.linalg.norm(data, axis=1)
+
+        with self._lock:
+            # Updates keep their label; new ids reuse tombstoned slots when available
+            existing = [i for i, vec_id in enumerate(ids) if vec_id in self._labels]
+            fresh = [i for i, vec_id in enumerate(ids) if vec_id not in self._labels]
+
+            if existing:
+                labels = [self._labels[ids[i]] for i in existing]
+                for i, label in zip(existing, labels):
+                    self._postings.discard(label, self._metadata[label])
+                self._index.add_items(data[existing], labels)
+                for i, label in zip(existing, labels):
+                    self._set_metadata(label, ids[i], metadatas[i], float(norms[i]))
+
+            if fresh:
+                needed = self._index.get_current_count() + len(fresh) - self._deleted
+                if needed > self._index.get_max_elements():
+                    self._index.resize_index(max(needed, self._index.get_max_elements() * 2))
+
+                labels = list(range(self._next_label, self._next_label + len(fresh)))
+                self._next_label += len(fresh)
+                self._index.add_items(data[fresh], labels, replace_deleted=True)
+                self._deleted -= min(self._deleted, len(fresh))
+                for i, label in zip(fresh, labels):
+                    self._set_metadata(label, ids[i], metadatas[i], float(norms[i]))
+
+            self._dirty = True
+
+        return {"upserted_count": upserted}
+
+    def delete(self, ids=None, delete_all=False, filter=None, **kwargs):
+        with self._lock:
+            if delete_all:
+                targets = list(self._labels)
+            else:
+                targets = list(ids or [])
+                if filter:
+                    targets.extend(
+                        self._ids[label] for label, meta in self._metadata.items()
+                        if matches_filter(meta, filter)
+                    )
+
+            for vec_id in set(targets):
+                label = self._labels.pop(vec_id, None)
+                if label is None:
+                    continue
+                self._index.mark_deleted(label)
+                self._postings.discard(label, self._metadata.pop(label))
+                del self._ids[label]
+                del self._norms[label]
+                self._deleted += 1
+
+            self._dirty = True
+        return {}
+
+    # ---------- read path ----------
+    def query(self, vector=None, top_k=10, include_metadata=False,
+              include_values=False, filter=None, id=None, **kwargs):
+        with self._lock:
+            if vector is None and id is not None:
+                label = self._labels.get(id)
+                if label is None:
+                    return {"matches": [], "namespace": ""}
+                vector = self._index.get_items([label])[0]
+
+            query = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+            if query.shape[1] != self.dimension:
+                raise ValueError(
+                    f"Query dimension {query.shape[1]} does not match index dimension {self.dimension}"
+                )
+            if not self._labels or top_k <= 0:
+                return {"matches": [], "namespace": ""}
+
+            candidates = self._postings.candidates(filter) if filter else None
+            if candidates is not None and len(candidates) <= EXACT_SEARCH_THRESHOLD:
+                labels, scores = self._exact_search(query[0], candidates, top_k)
+            else:
+                labels, scores = self._graph_search(query, top_k, filter, candidates)
+
+            matches = []
+            for label, score in zip(labels, scores):
+                match = {"id": self._ids[label], "score": float(score)}
+                if include_metadata:
+                    match["metadata"] = dict(self._metadata[label])
+                if include_values:
+                    match["values"] = self._values(label)
+                matches.append(match)
+
+        return {"matches": matches, "namespace": ""}
+
+    def fetch(self, ids, **kwargs):
+        with self._lock:
+            vectors = {}
+            for vec_id in ids:
+                label = self._labels.get(vec_id)
+                if label is None:
+                    continue
+                vectors[vec_id] = {
+                    "id": vec_id,
+                    "values": self._values(label),
+                    "metadata": dict(self._metadata[label]),
+                }
+        return {"vectors": vectors, "namespace": ""}
+
+    def describe_index_stats(self, **kwargs):
+        return {
+            "dimension": self.dimension,
+            "total_vector_count": len(self._labels),
+            "deleted_vector_count": self._deleted,
+            "namespaces": {"": {"vector_count": len(self._labels)}},
+        }
+
+    def set_ef(self, ef):
+        with self._lock:
+            self.ef_search = ef
+            self._index.set_ef(ef)
+
+    def all_items(self):
+        """(ids, float32 matrix) of every live vector, e.g. to build an exact baseline"""
+        with self._lock:
+            labels = list(self._ids)
+            if not labels:
+                return [], np.zeros((0, self.dimension), dtype=np.float32)
+            vectors = np.asarray(self._index.get_items(labels), dtype=np.float32)
+            return [self._ids[label] for label in labels], vectors
+
+    # ---------- persistence ----------
+    def persist(self):
+        """Write graph + id/metadata side file if anything changed since the last save"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(self.path, exist_ok=True)
+            graph_tmp = os.path.join(self.path, "graph.bin.tmp")
+            meta_tmp = os.path.join(self.path, "meta.json.tmp")
+
+            self._index.save_index(graph_tmp)
+            with open(meta_tmp, "w", encoding="utf-8") as f:
+                json.dump({
+                    "dimension": self.dimension,
+                    "M": self.M,
+                    "ef_construction": self.ef_construction,
+                    "next_label": self._next_label,
+                    "deleted": self._deleted,
+                    "items": [
+                        [label, self._ids[label], self._metadata[label], self._norms[label]]
+                        for label in self._ids
+                    ],
+                }, f)
+
+            os.replace(graph_tmp, os.path.join(self.path, "graph.bin"))
+            os.replace(meta_tmp, os.path.join(self.path, "meta.json"))
+            self._dirty = False
+        print(f"[INFO] Persisted HNSW index '{self.name}' ({len(self._labels)} vectors)")
+
+    def _load(self, hnswlib):
+        with open(os.path.join(self.path, "meta.json"), encoding="utf-8") as f:
+            state = json.load(f)
+        if state["dimension"] != self.dimension:
+            raise ValueError(
+                f"Index '{self.name}' on disk has dimension {state['dimension']}, requested {self.dimension}"
+            )
+
+        self.M = state["M"]
+        self.ef_construction = state["ef_construction"]
+        self._index.load_index(os.path.join(self.path, "graph.bin"), allow_replace_deleted=True)
+        self._next_label = state["next_label"]
+        self._deleted = state["deleted"]
+        for label, vec_id, metadata, *norm in state["items"]:
+            # Indexes saved without norms return the stored (normalized) vectors
+            self._set_metadata(label, vec_id, metadata, norm[0] if norm else 1.0)
+        print(f"[INFO] Loaded HNSW index '{self.name}' ({len(self._labels)} vectors)")
+
+    # ---------- internals ----------
+    def _set_metadata(self, label, vec_id, metadata, norm):
+        self._ids[label] = vec_id
+        self._labels[vec_id] = label
+        self._metadata[label] = metadata
+        self._norms[label] = norm
+        self._postings.add(label, metadata)
+
+    def _values(self, label) -> list:
+        return (np.asarray(self._index.get_items([label])[0], dtype=np.float32) * self._norms[label]).tolist()
+
+    def _exact_search(self, query, candidates, top_k):
+        if not candidates:
+            return [], []
+        labels = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        vectors = np.asarray(self._index.get_items(labels), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1)
+        norms[norms == 0] = 1.0
+        qnorm = float(np.linalg.norm(query)) or 1.0
+        scores = (vectors @ query) / (norms * qnorm)
+
+        k = min(top_k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k] if k < scores.shape[0] else np.arange(k)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [int(labels[i]) for i in top], scores[top]
+
+    def _graph_search(self, query, top_k, filter, candidates):
+        if candidates is not None:
+            allowed = candidates.__contains__
+            limit = len(candidates)
+        elif filter:
+            metadata = self._metadata
+            allowed = lambda label: matches_filter(metadata.get(label, {}), filter)
+            limit = len(self._labels)
+        else:
+            allowed = None
+            limit = len(self._labels)
+
+        k = min(top_k, limit)
+        if k == 0:
+            return [], []
+
+        # hnswlib raises when its walk finds fewer than k elements passing the filter:
+        # widen the beam, and past the whole index answer exactly instead of returning fewer
+        ef = max(self.ef_search, k)
+        try:
+            while True:
+                self._index.set_ef(ef)
+                try:
+                    labels, distances = self._index.knn_query(query, k=k, filter=allowed)
+                    return [int(l) for l in labels[0]], 1.0 - distances[0]
+                except RuntimeError:
+                    if ef >= len(self._labels):
+                        break
+                    ef = min(ef * 4, len(self._labels))
+        finally:
+            self._index.set_ef(self.ef_search)
+
+        if candidates is None:
+            candidates = {label for label in self._ids if allowed is None or allowed(label)}
+        return self._exact_search(query[0], candidates, top_k)
+
+
+# -------------------------------------------------
+# PROCESS-WIDE REGISTRY
+# -------------------------------------------------
+_hnsw_indexes = {}
+_registry_lock = threading.Lock()
+
+
+def get_hnsw_index(name, dimension):
+    with _registry_lock:
+        index = _hnsw_indexes.get(name)
+        if index is None:
+            path = os.path.join(HNSW_INDEX_DIR, name) if HNSW_INDEX_DIR else None
+            index = HnswIndex(name, dimension, path=path)
+            _hnsw_indexes[name] = index
+        elif index.dimension != dimension:
+            raise ValueError(
+                f"Index '{name}' has dimension {index.dimension}, requested {dimension}"
+            )
+        return index
+
+
+def persist_all():
+    with _registry_lock:
+        indexes = list(_hnsw_indexes.values())
+    for index in indexes:
+        index.persist()
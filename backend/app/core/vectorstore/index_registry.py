@@ -0,0 +1,135 @@
+"""
+Process-wide registry of vector index handles
+Existence and dimension are checked once per index, handles (and their
+pooled connections) are reused across threads, and every call is timed.
+"""
+import asyncio
+import threading
+
+from app.core.utils import metrics
+
+TIMED_METHODS = ("upsert", "query", "delete", "fetch", "describe_index_stats")
+
+
+class TimedIndex:
+    """Wraps an index handle and records per-call latency under vectorstore.<index>.<method>"""
+
+    def __init__(self, index, name, dimension):
+        self._index = index
+        self.name = name
+        self.dimension = dimension
+
+    def __getattr__(self, attr):
+        target = getattr(self._index, attr)
+        if attr not in TIMED_METHODS:
+            return target
+
+        metric = f"vectorstore.{self.name}.{attr}"
+
+        def call(*args, **kwargs):
+            with metrics.timed(metric):
+                return target(*args, **kwargs)
+        return call
+
+
+class TimedAsyncIndex:
+    """Async counterpart of TimedIndex for handles whose methods are coroutines"""
+
+    def __init__(self, index, name, dimension):
+        self._index = index
+        self.name = name
+        self.dimension = dimension
+
+    def __getattr__(self, attr):
+        target = getattr(self._index, attr)
+        if attr not in TIMED_METHODS:
+            return target
+
+        metric = f"vectorstore.{self.name}.{attr}"
+
+        async def call(*args, **kwargs):
+            with metrics.timed(metric):
+                return await target(*args, **kwargs)
+        return call
+
+
+class ThreadedAsyncIndex:
+    """Async facade over a blocking handle (local backends, gRPC): calls run in a worker thread"""
+
+    def __init__(self, index):
+        self._index = index
+
+    def __getattr__(self, attr):
+        target = getattr(self._index, attr)
+        if attr not in TIMED_METHODS:
+            return target
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(target, *args, **kwargs)
+        return call
+
+    async def close(self):
+        pass
+
+
+class IndexRegistry:
+    """
+    open_index(name, dimension) -> blocking handle, called once per index.
+    open_async_index(name, dimension) -> async handle, called once per index and event loop;
+    when omitted, the blocking handle is wrapped in a thread-backed facade.
+    """
+
+    def __init__(self, open_index, open_async_index=None):
+        self._open_index = open_index
+        self._open_async_index = open_async_index
+        self._handles = {}
+        self._async_handles = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, dimension):
+        handle = self._handles.get(name)
+        if handle is None:
+            with self._lock:
+                handle = self._handles.get(name)
+                if handle is None:
+                    with metrics.timed("vectorstore.open_index"):
+                        index = self._open_index(name, dimension)
+                    handle = TimedIndex(index, name, dimension)
+                    self._handles[name] = handle
+                    print(f"[INFO] Index handle cached: {name} (dim={dimension})")
+        else:
+            metrics.incr("vectorstore.handle_reuse")
+
+        if handle.dimension != dimension:
+            raise ValueError(
+                f"Index '{name}' has dimension {handle.dimension}, requested {dimension}"
+            )
+        return handle
+
+    async def get_async(self, name, dimension):
+        key = (name, asyncio.get_running_loop())
+        handle = self._async_handles.get(key)
+        if handle is None:
+            # Existence/dimension check happens once, in the blocking path
+            sync_handle = await asyncio.to_thread(self.get, name, dimension)
+            if self._open_async_index is None:
+                index = ThreadedAsyncIndex(sync_handle._index)
+            else:
+                index = self._open_async_index(name, dimension)
+            handle = TimedAsyncIndex(index, name, dimension)
+            self._async_handles[key] = handle
+
+        if handle.dimension != dimension:
+            raise ValueError(
+                f"Index '{name}' has dimension {handle.dimension}, requested {dimension}"
+            )
+        return handle
+
+    async def close_async(self):
+        """Close async handles created on the running event loop"""
+        loop = asyncio.get_running_loop()
+        for key in [k for k in self._async_handles if k[1] is loop]:
+            handle = self._async_handles.pop(key)
+            close = getattr(handle._index, "close", None)
+            if close is not None:
+                await close()
@@ -0,0 +1,270 @@
+"""
+Per-session BM25 inverted index over text chunks
+Filled alongside the dense text index (same ids and metadata), so exact
+identifiers, numbers and acronyms that MiniLM blurs can still be matched.
+Postings are flat NumPy arrays grouped by term (CSR layout); new chunks
+are buffered and merged in on the next search or persist.
+"""
+import os
+import re
+import json
+import threading
+from collections import Counter, OrderedDict
+import numpy as np
+
+from app.core.utils.paths import data_path
+
+LEXICAL_INDEX_DIR = data_path("LEXICAL_INDEX_DIR", "data/lexical")
+LEXICAL_MAX_SESSIONS = int(os.getenv("LEXICAL_MAX_SESSIONS", "64"))  # indexes kept in memory
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"\w+(?:[.\-/]\w+)*")
+_SPLIT_RE = re.compile(r"[.\-/_]")
+
+
+def tokenize(text: str) -> list:
+    """Lowercased terms; compound identifiers (v2.3, gpt-4, x_1) also yield their parts"""
+    terms = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        terms.append(token)
+        if not token.isalnum():
+            terms.extend(part for part in _SPLIT_RE.split(token) if part)
+    return terms
+
+
+class LexicalIndex:
+    """
+    BM25 over the chunks of one session. Re-adding an id with the same
+    text and metadata is a no-op; with new ones it replaces the chunk.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.RLock()
+        self.writers = 0  # add_texts calls in progress (guarded by the registry lock); pinned while > 0
+
+        self._terms = {}                               # term -> term id
+        self._offsets = np.zeros(1, dtype=np.int64)    # term id -> slice of _docs/_tfs
+        self._docs = np.zeros(0, dtype=np.int32)
+        self._tfs = np.zeros(0, dtype=np.float32)
+        self._lengths = np.zeros(0, dtype=np.float32)  # doc -> number of terms
+        self._ids = []                                 # doc -> chunk id
+        self._metadata = []                            # doc -> metadata (incl. text)
+        self._doc_of = {}                              # chunk id -> doc
+
+        self._pending = []  # (doc, term ids, term frequencies, length) not merged yet
+        self._replaced = set()  # docs superseded by a re-added id, dropped on merge
+        self._dirty = False
+
+        if path and os.path.exists(os.path.join(path, "meta.json")):
+            self._load()
+
+    def __len__(self):
+        return len(self._ids)
+
+    # ---------- write path ----------
+    def add(self, ids, texts, metadatas):
+        with self._lock:
+            for chunk_id, text, metadata in zip(ids, texts, metadatas):
+                old = self._doc_of.get(chunk_id)
+                if old is not None:
+                    if self._metadata[old] == metadata and self._metadata[old].get("text", text) == text:
+                        continue
+                    # Changed chunk: its old postings go, so BM25 agrees with the dense index
+                    self._replaced.add(old)
+                    del self._doc_of[chunk_id]
+                    self._dirty = True
+                counts = Counter(tokenize(text))
+                if not counts:
+                    continue
+                term_ids = np.fromiter(
+                    (self._terms.setdefault(term, len(self._terms)) for term in counts),
+                    dtype=np.int64, count=len(counts),
+                )
+                tfs = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+                self._pending.append((len(self._ids), term_ids, tfs, float(tfs.sum())))
+                self._ids.append(chunk_id)
+                self._metadata.append(metadata)
+                self._doc_of[chunk_id] = len(self._ids) - 1
+                self._dirty = True
+
+    def _merge(self):
+        if not self._pending and not self._replaced:
+            return
+        old_terms = np.repeat(np.arange(len(self._offsets) - 1), np.diff(self._offsets))
+        terms = np.concatenate([old_terms] + [t for _, t, _, _ in self._pending])
+        docs = np.concatenate(
+            [self._docs] + [np.full(len(t), doc, dtype=np.int32) for doc, t, _, _ in self._pending]
+        )
+        tfs = np.concatenate([self._tfs] + [tf for _, _, tf, _ in self._pending])
+        lengths = np.concatenate(
+            [self._lengths, np.array([length for _, _, _, length in self._pending], dtype=np.float32)]
+        )
+
+        if self._replaced:
+            # Drop superseded docs and renumber the rest densely
+            keep = np.ones(len(self._ids), dtype=bool)
+            keep[list(self._replaced)] = False
+            renumber = (np.cumsum(keep) - 1).astype(np.int32)
+            live = keep[docs]
+            terms, docs, tfs = terms[live], renumber[docs[live]], tfs[live]
+            lengths = lengths[keep]
+            self._ids = [chunk_id for chunk_id, k in zip(self._ids, keep) if k]
+            self._metadata = [metadata for metadata, k in zip(self._metadata, keep) if k]
+            self._doc_of = {chunk_id: doc for doc, chunk_id in enumerate(self._ids)}
+            self._replaced = set()
+
+        # Stable sort keeps each term's postings in doc order
+        order = np.argsort(terms, kind="stable")
+        self._docs = docs[order]
+        self._tfs = tfs[order]
+        self._offsets = np.zeros(len(self._terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(self._terms)), out=self._offsets[1:])
+        self._lengths = lengths
+        self._pending = []
+
+    # ---------- read path ----------
+    def search(self, query: str, top_k: int = 5) -> list:
+        """[{id, score, text, metadata}] by BM25, best first; chunks sharing no term are never returned"""
+        with self._lock:
+            self._merge()
+            n = len(self._ids)
+            if n == 0 or top_k <= 0:
+                return []
+
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths / self._lengths.mean())
+            scores = np.zeros(n, dtype=np.float32)
+            for term in set(tokenize(query)):
+                term_id = self._terms.get(term)
+                if term_id is None:
+                    continue
+                start, end = self._offsets[term_id], self._offsets[term_id + 1]
+                docs, tfs = self._docs[start:end], self._tfs[start:end]
+                idf = np.log(1 + (n - (end - start) + 0.5) / ((end - start) + 0.5))
+                scores[docs] += idf * tfs * (BM25_K1 + 1) / (tfs + norm[docs])
+
+            hits = np.flatnonzero(scores)
+            if len(hits) > top_k:
+                hits = hits[np.argpartition(-scores[hits], top_k - 1)[:top_k]]
+            hits = hits[np.argsort(-scores[hits], kind="stable")]
+            return [{
+                "id": self._ids[doc],
+                "score": float(scores[doc]),
+                "text": self._metadata[doc].get("text", ""),
+                "metadata": self._metadata[doc],
+            } for doc in hits]
+
+    # ---------- persistence ----------
+    def persist(self):
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            self._merge()
+            os.makedirs(self.path, exist_ok=True)
+            postings_tmp = os.path.join(self.path, "postings.npz.tmp")
+            meta_tmp = os.path.join(self.path, "meta.json.tmp")
+
+            with open(postings_tmp, "wb") as f:
+                np.savez(f, offsets=self._offsets, docs=self._docs, tfs=self._tfs, lengths=self._lengths)
+            with open(meta_tmp, "w", encoding="utf-8") as f:
+                json.dump({
+                    "terms": sorted(self._terms, key=self._terms.get),
+                    "ids": self._ids,
+                    "metadata": self._metadata,
+                }, f)
+
+            os.replace(postings_tmp, os.path.join(self.path, "postings.npz"))
+            os.replace(meta_tmp, os.path.join(self.path, "meta.json"))
+            self._dirty = False
+
+    def _load(self):
+        with open(os.path.join(self.path, "meta.json"), encoding="utf-8") as f:
+            state = json.load(f)
+        with np.load(os.path.join(self.path, "postings.npz")) as arrays:
+            self._offsets = arrays["offsets"]
+            self._docs = arrays["docs"]
+            self._tfs = arrays["tfs"]
+            self._lengths = arrays["lengths"]
+        self._terms = {term: i for i, term in enumerate(state["terms"])}
+        self._ids = state["ids"]
+        self._metadata = state["metadata"]
+        self._doc_of = {chunk_id: doc for doc, chunk_id in enumerate(self._ids)}
+
+
+# -------------------------------------------------
+# PER-SESSION REGISTRY (LRU of loaded indexes)
+# -------------------------------------------------
+_lexical_indexes = OrderedDict()
+_registry_lock = threading.Lock()
+
+
+def get_lexical_index(session_id: str, create: bool = True, pin: bool = False):
+    """
+    The session's index, loaded from disk if needed; None for an unknown
+    session unless create. pin=True registers a writer: the index is not
+    evicted until release_lexical_index(index).
+    """
+    with _registry_lock:
+        index = _lexical_indexes.get(session_id)
+        if index is not None:
+            _lexical_indexes.move_to_end(session_id)
+            index.writers += pin
+            return index
+
+        # Session ids come from requests; anything path-like stays in memory only
+        persistent = LEXICAL_INDEX_DIR and re.fullmatch(r"[\w\-]+", session_id)
+        path = os.path.join(LEXICAL_INDEX_DIR, session_id) if persistent else None
+        if not create and not (path and os.path.exists(os.path.join(path, "meta.json"))):
+            return None
+        index = LexicalIndex(path)
+        index.writers += pin
+        _lexical_indexes[session_id] = index
+
+        # Every index counts against the bound; in-memory-only ones are dropped
+        # on eviction (their chunks remain searchable through the dense index).
+        # Indexes with writers stay: adds to an evicted copy would be lost, and
+        # a later lookup would reload a stale one from disk.
+        excess = len(_lexical_indexes) - LEXICAL_MAX_SESSIONS
+        for old_id in [s for s, i in _lexical_indexes.items() if not i.writers and i is not index][:max(excess, 0)]:
+            _lexical_indexes.pop(old_id).persist()
+        return index
+
+
+def release_lexical_index(index: LexicalIndex):
+    with _registry_lock:
+        index.writers -= 1
+
+
+def add_texts(ids, texts, metadatas):
+    """Index chunks under their metadata session_id (chunks without one are skipped)"""
+    by_session = {}
+    for chunk_id, text, metadata in zip(ids, texts, metadatas):
+        session_id = metadata.get("session_id")
+        if session_id:
+            group = by_session.setdefault(session_id, ([], [], []))
+            group[0].append(chunk_id)
+            group[1].append(text)
+            group[2].append(metadata)
+    for session_id, (session_ids, session_texts, session_metadatas) in by_session.items():
+        index = get_lexical_index(session_id, pin=True)
+        try:
+            index.add(session_ids, session_texts, session_metadatas)
+        finally:
+            release_lexical_index(index)
+
+
+def search_session(session_id: str, query: str, top_k: int) -> list:
+    # Queries never create indexes: unknown session ids cost nothing
+    index = get_lexical_index(session_id, create=False)
+    return index.search(query, top_k) if index is not None else []
+
+
+def persist_all():
+    with _registry_lock:
+        indexes = list(_lexical_indexes.values())
+    for index in indexes:
+        index.persist()
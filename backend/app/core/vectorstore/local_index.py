@@ -0,0 +1,421 @@
+"""
+In-process vector index with the same upsert/query interface as a Pinecone Index
+Vectors live in one contiguous float32 matrix per index (exact cosine top-k)
+"""
+import threading
+import numpy as np
+
+
+# -------------------------------------------------
+# METADATA FILTERS (Pinecone filter syntax)
+# -------------------------------------------------
+def _as_values(value):
+    """Metadata values may be scalars or lists of scalars"""
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+    return [value]
+
+
+def matches_filter(metadata, filter):
+    """Evaluate a Pinecone-style metadata filter against one metadata dict"""
+    if not filter:
+        return True
+
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, f) for f in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_filter(metadata, f) for f in condition):
+                return False
+            continue
+
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        present = key in metadata
+        values = _as_values(metadata.get(key)) if present else []
+
+        for op, operand in condition.items():
+            if op == "$eq":
+                ok = operand in values
+            elif op == "$ne":
+                ok = operand not in values
+            elif op == "$in":
+                ok = any(v in operand for v in values)
+            elif op == "$nin":
+                ok = not any(v in operand for v in values)
+            elif op == "$exists":
+                ok = present == bool(operand)
+            elif op in ("$gt", "$gte", "$lt", "$lte"):
+                ok = present and _compare(metadata[key], op, operand)
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+
+            if not ok:
+                return False
+
+    return True
+
+
+def _compare(value, op, operand):
+    try:
+        if op == "$gt":
+            return value > operand
+        if op == "$gte":
+            return value >= operand
+        if op == "$lt":
+            return value < operand
+        return value <= operand
+    except TypeError:
+        return False
+
+
+# -------------------------------------------------
+# METADATA POSTINGS
+# -------------------------------------------------
+class MetadataPostings:
+    """(key, value) -> set of rows, for fast equality filters like {"session_id": ...}"""
+
+    # Long strings (chunk text) are never filtered on; keeping them out saves memory
+    MAX_VALUE_LENGTH = 128
+
+    def __init__(self):
+        self._postings = {}
+
+    @classmethod
+    def indexable(cls, value):
+        if isinstance(value, str):
+            return len(value) <= cls.MAX_VALUE_LENGTH
+        try:
+            hash(value)
+        except TypeError:
+            return False
+        return True
+
+    def _keys(self, metadata):
+        for key, value in metadata.items():
+            for v in _as_values(value):
+                if self.indexable(v):
+                    yield (key, v)
+
+    def add(self, row, metadata):
+        for pk in self._keys(metadata):
+            self._postings.setdefault(pk, set()).add(row)
+
+    def discard(self, row, metadata):
+        for pk in self._keys(metadata):
+            rows = self._postings.get(pk)
+            if rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del self._postings[pk]
+
+    def clear(self):
+        self._postings.clear()
+
+    def rows(self, key, value):
+        return self._postings.get((key, value), set())
+
+    def candidates(self, filter):
+        """
+        Rows that can match a filter built from $eq/$in/$and only.
+        Returns None when the filter needs a full scan to resolve.
+        """
+        result = None
+        for key, condition in filter.items():
+            if key == "$and":
+                part = None
+                for f in condition:
+                    sub = self.candidates(f)
+                    if sub is None:
+                        return None
+                    part = sub if part is None else part & sub
+            elif key == "$or":
+                return None
+            else:
+                if not isinstance(condition, dict):
+                    condition = {"$eq": condition}
+                part = None
+                for op, operand in condition.items():
+                    if op == "$eq" and self.indexable(operand):
+                        sub = set(self.rows(key, operand))
+                    elif op == "$in" and all(self.indexable(v) for v in operand):
+                        sub = set()
+                        for v in operand:
+                            sub |= self.rows(key, v)
+                    else:
+                        return None
+                    part = sub if part is None else part & sub
+
+            if part is not None:
+                result = part if result is None else result & part
+
+        return result
+
+    def mask(self, filter, size, scan_metadata):
+        """
+        Boolean mask over rows 0..size-1.
+        Equality/$in filters use the postings; anything else falls back to
+        scanning the metadata returned by scan_metadata().
+        """
+        mask = np.ones(size, dtype=bool)
+
+        for key, condition in filter.items():
+            if key in ("$and", "$or"):
+                parts = [self.mask(f, size, scan_metadata) for f in condition]
+                if key == "$and":
+                    part = np.logical_and.reduce(parts) if parts else np.ones(size, dtype=bool)
+                else:
+                    part = np.logical_or.reduce(parts) if parts else np.zeros(size, dtype=bool)
+                mask &= part
+                continue
+
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+
+            for op, operand in condition.items():
+                operands = operand if op in ("$in", "$nin") else [operand]
+                if op in ("$eq", "$ne", "$in", "$nin") and all(self.indexable(v) for v in operands):
+                    rows = set()
+                    for v in operands:
+                        rows |= self.rows(key, v)
+                    part = self._rows_mask(rows, size)
+                    if op in ("$ne", "$nin"):
+                        part = ~part
+                else:
+                    single = {key: {op: operand}}
+                    part = np.fromiter(
+                        (matches_filter(m, single) for m in scan_metadata()),
+                        dtype=bool,
+                        count=size,
+                    )
+                mask &= part
+
+        return mask
+
+    @staticmethod
+    def _rows_mask(rows, size):
+        mask = np.zeros(size, dtype=bool)
+        if rows:
+            mask[np.fromiter(rows, dtype=np.int64, count=len(rows))] = True
+        return mask
+
+
+# -------------------------------------------------
+# LOCAL INDEX
+# -------------------------------------------------
+class LocalIndex:
+    """
+    Exact cosine search over a contiguous float32 matrix.
+    Rows are kept dense: deleting a vector moves the last row into its slot.
+    """
+
+    def __init__(self, name, dimension, initial_capacity=1024):
+        self.name = name
+        self.dimension = dimension
+
+        self._vectors = np.zeros((initial_capacity, dimension), dtype=np.float32)
+        self._norms = np.zeros(initial_capacity, dtype=np.float32)
+        self._ids = []
+        self._metadata = []
+        self._id_to_row = {}
+
+        self._postings = MetadataPostings()
+
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    # ---------- write path ----------
+    def upsert(self, vectors, **kwargs):
+        records = [self._normalize_record(v) for v in vectors]
+
+        with self._lock:
+            for vec_id, values, metadata in records:
+                row = self._id_to_row.get(vec_id)
+                if row is None:
+                    row = self._append_row(vec_id)
+                else:
+                    self._postings.discard(row, self._metadata[row])
+
+                norm = float(np.linalg.norm(values))
+                self._vectors[row] = values / norm if norm > 0 else values
+                self._norms[row] = norm
+                self._metadata[row] = metadata
+                self._postings.add(row, metadata)
+
+        return {"upserted_count": len(records)}
+
+    def delete(self, ids=None, delete_all=False, filter=None, **kwargs):
+        with self._lock:
+            if delete_all:
+                self._ids.clear()
+                self._metadata.clear()
+                self._id_to_row.clear()
+                self._postings.clear()
+                return {}
+
+            targets = set(ids or [])
+            if filter:
+                targets.update(
+                    self._ids[row] for row in np.flatnonzero(self._filter_mask(filter))
+                )
+
+            for vec_id in targets:
+                row = self._id_to_row.get(vec_id)
+                if row is not None:
+                    self._remove_row(row)
+
+        return {}
+
+    # ---------- read path ----------
+    def query(self, vector=None, top_k=10, include_metadata=False,
+              include_values=False, filter=None, id=None, **kwargs):
+        with self._lock:
+            if vector is None and id is not None:
+                row = self._id_to_row.get(id)
+                if row is None:
+                    return {"matches": [], "namespace": ""}
+                vector = self._vectors[row]
+
+            query = np.asarray(vector, dtype=np.float32)
+            if query.shape != (self.dimension,):
+                raise ValueError(
+                    f"Query dimension {query.shape} does not match index dimension {self.dimension}"
+                )
+
+            norm = float(np.linalg.norm(query))
+            if norm > 0:
+                query = query / norm
+
+            size = len(self._ids)
+            if size == 0 or top_k <= 0:
+                return {"matches": [], "namespace": ""}
+
+            mask = self._filter_mask(filter) if filter else None
+            if mask is None:
+                rows = None
+                scores = self._vectors[:size] @ query
+            else:
+                rows = np.flatnonzero(mask)
+                if rows.size == 0:
+                    return {"matches": [], "namespace": ""}
+                scores = self._vectors[rows] @ query
+
+            k = min(top_k, scores.shape[0])
+            if k < scores.shape[0]:
+                top = np.argpartition(-scores, k - 1)[:k]
+            else:
+                top = np.arange(scores.shape[0])
+            top = top[np.argsort(-scores[top], kind="stable")]
+
+            matches = []
+            for i in top:
+                row = int(i) if rows is None else int(rows[i])
+                match = {"id": self._ids[row], "score": float(scores[i])}
+                if include_metadata:
+                    match["metadata"] = dict(self._metadata[row])
+                if include_values:
+                    match["values"] = (self._vectors[row] * self._norms[row]).tolist()
+                matches.append(match)
+
+        return {"matches": matches, "namespace": ""}
+
+    def fetch(self, ids, **kwargs):
+        with self._lock:
+            vectors = {}
+            for vec_id in ids:
+                row = self._id_to_row.get(vec_id)
+                if row is None:
+                    continue
+                vectors[vec_id] = {
+                    "id": vec_id,
+                    "values": (self._vectors[row] * self._norms[row]).tolist(),
+                    "metadata": dict(self._metadata[row]),
+                }
+        return {"vectors": vectors, "namespace": ""}
+
+    def describe_index_stats(self, **kwargs):
+        return {
+            "dimension": self.dimension,
+            "total_vector_count": len(self._ids),
+            "namespaces": {"": {"vector_count": len(self._ids)}},
+        }
+
+    # ---------- internals ----------
+    def _normalize_record(self, record):
+        """Accept Pinecone-style dicts or (id, values[, metadata]) tuples"""
+        if isinstance(record, dict):
+            vec_id = record["id"]
+            values = record["values"]
+            metadata = record.get("metadata") or {}
+        else:
+            vec_id, values = record[0], record[1]
+            metadata = record[2] if len(record) > 2 else {}
+
+        values = np.asarray(values, dtype=np.float32)
+        if values.shape != (self.dimension,):
+            raise ValueError(
+                f"Vector {vec_id} has dimension {values.shape}, expected {self.dimension}"
+            )
+        return str(vec_id), values, dict(metadata)
+
+    def _append_row(self, vec_id):
+        row = len(self._ids)
+        if row == self._vectors.shape[0]:
+            capacity = max(1, self._vectors.shape[0]) * 2
+            grown = np.zeros((capacity, self.dimension), dtype=np.float32)
+            grown[:row] = self._vectors[:row]
+            self._vectors = grown
+            norms = np.zeros(capacity, dtype=np.float32)
+            norms[:row] = self._norms[:row]
+            self._norms = norms
+
+        self._ids.append(vec_id)
+        self._metadata.append({})
+        self._id_to_row[vec_id] = row
+        return row
+
+    def _remove_row(self, row):
+        last = len(self._ids) - 1
+        self._postings.discard(row, self._metadata[row])
+        del self._id_to_row[self._ids[row]]
+
+        if row != last:
+            self._postings.discard(last, self._metadata[last])
+            self._vectors[row] = self._vectors[last]
+            self._norms[row] = self._norms[last]
+            self._ids[row] = self._ids[last]
+            self._metadata[row] = self._metadata[last]
+            self._id_to_row[self._ids[row]] = row
+            self._postings.add(row, self._metadata[row])
+
+        self._ids.pop()
+        self._metadata.pop()
+
+    def _filter_mask(self, filter):
+        return self._postings.mask(filter, len(self._ids), lambda: self._metadata)
+
+
+# -------------------------------------------------
+# PROCESS-WIDE REGISTRY
+# -------------------------------------------------
+_local_indexes = {}
+_registry_lock = threading.Lock()
+
+
+def get_local_index(name, dimension):
+    with _registry_lock:
+        index = _local_indexes.get(name)
+        if index is None:
+            index = LocalIndex(name, dimension)
+            _local_indexes[name] = index
+            print(f"[INFO] Created local index '{name}' (dim={dimension})")
+        elif index.dimension != dimension:
+            raise ValueError(
+                f"Index '{name}' has dimension {index.dimension}, requested {dimension}"
+            )
+        return index
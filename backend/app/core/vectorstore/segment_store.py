@@ -0,0 +1,480 @@
+"""
+Persistent local vector index built from append-only, memory-mapped segments
+
+Layout of one index directory:
+    manifest.json                 live segment list, dimension, dtype
+    seg_000001/vectors.npy        unit-normalized vectors (float32 or float16), opened with mmap
+    seg_000001/norms.npy          original vector norms (float32)
+    seg_000001/ids.json           row -> vector id
+    seg_000001/meta.jsonl         one JSON metadata object per row
+    seg_000001/offsets.npy        byte offsets of each row in meta.jsonl (n + 1 entries)
+    seg_000001/postings.json      metadata equality postings for filters
+    seg_000001/tombstones.bin     int32 rows deleted after the segment was written (append-only)
+
+Writes land in an in-memory LocalIndex and are flushed as a new segment.
+Startup only maps the segment files; small segments are merged in the background.
+"""
+import os
+import json
+import shutil
+import threading
+import numpy as np
+
+from app.core.vectorstore.local_index import LocalIndex, MetadataPostings
+from app.core.utils.paths import data_path
+
+LOCAL_INDEX_DTYPE = os.getenv("LOCAL_INDEX_DTYPE", "float32")
+SEGMENT_FLUSH_ROWS = int(os.getenv("SEGMENT_FLUSH_ROWS", "5000"))
+COMPACT_SEGMENT_ROWS = int(os.getenv("COMPACT_SEGMENT_ROWS", "50000"))
+COMPACT_MIN_SEGMENTS = int(os.getenv("COMPACT_MIN_SEGMENTS", "4"))
+
+# float16 segments are scored block by block so a full scan never copies the whole matrix
+SCAN_BLOCK_ROWS = 65536
+
+
+# -------------------------------------------------
+# SEGMENT
+# -------------------------------------------------
+class Segment:
+    """One immutable batch of vectors; only its tombstone file is ever appended to"""
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.norms = np.load(os.path.join(path, "norms.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        with open(os.path.join(path, "ids.json"), encoding="utf-8") as f:
+            self.ids = json.load(f)
+
+        self.postings = MetadataPostings()
+        with open(os.path.join(path, "postings.json"), encoding="utf-8") as f:
+            for key, value, rows in json.load(f):
+                self.postings._postings[(key, value)] = set(rows)
+
+        self.live = np.ones(len(self.ids), dtype=bool)
+        tombstones = os.path.join(path, "tombstones.bin")
+        if os.path.exists(tombstones):
+            self.live[np.fromfile(tombstones, dtype=np.int32)] = False
+
+        self._meta_fd = os.open(os.path.join(path, "meta.jsonl"), os.O_RDONLY)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def live_count(self):
+        return int(self.live.sum())
+
+    def metadata(self, row):
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return json.loads(os.pread(self._meta_fd, end - start, start))
+
+    def iter_metadata(self):
+        for row in range(len(self.ids)):
+            yield self.metadata(row)
+
+    def values(self, row):
+        return (self.vectors[row].astype(np.float32) * self.norms[row]).tolist()
+
+    def tombstone(self, rows):
+        rows = np.asarray(rows, dtype=np.int32)
+        if rows.size == 0:
+            return
+        with open(os.path.join(self.path, "tombstones.bin"), "ab") as f:
+            f.write(rows.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self.live[rows] = False
+
+    def scores(self, query, rows=None):
+        """Cosine scores for `rows` (or every row) straight from the mapped pages"""
+        if rows is not None:
+            return self.vectors[rows].astype(np.float32, copy=False) @ query
+        if self.vectors.dtype == np.float32:
+            return self.vectors @ query
+        out = np.empty(len(self.ids), dtype=np.float32)
+        for start in range(0, len(self.ids), SCAN_BLOCK_ROWS):
+            block = self.vectors[start:start + SCAN_BLOCK_ROWS]
+            out[start:start + len(block)] = block.astype(np.float32) @ query
+        return out
+
+    def close(self):
+        os.close(self._meta_fd)
+
+    @staticmethod
+    def write(path, ids, unit_vectors, norms, metadatas, dtype):
+        """Write a complete segment into a temp dir, then rename it into place"""
+        tmp = path + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        np.save(os.path.join(tmp, "vectors.npy"), np.asarray(unit_vectors, dtype=dtype))
+        np.save(os.path.join(tmp, "norms.npy"), np.asarray(norms, dtype=np.float32))
+        with open(os.path.join(tmp, "ids.json"), "w", encoding="utf-8") as f:
+            json.dump(list(ids), f)
+
+        offsets = [0]
+        postings = MetadataPostings()
+        with open(os.path.join(tmp, "meta.jsonl"), "wb") as f:
+            for row, metadata in enumerate(metadatas):
+                line = (json.dumps(metadata) + "\n").encode("utf-8")
+                f.write(line)
+                offsets.append(offsets[-1] + len(line))
+                postings.add(row, metadata)
+        np.save(os.path.join(tmp, "offsets.npy"), np.asarray(offsets, dtype=np.int64))
+
+        with open(os.path.join(tmp, "postings.json"), "w", encoding="utf-8") as f:
+            json.dump([[k, v, sorted(rows)] for (k, v), rows in postings._postings.items()], f)
+
+        os.rename(tmp, path)
+
+
+# -------------------------------------------------
+# SEGMENTED INDEX
+# -------------------------------------------------
+class SegmentedIndex:
+    """Pinecone-compatible index: in-memory write buffer + memory-mapped segments"""
+
+    def __init__(self, name, dimension, path, dtype=LOCAL_INDEX_DTYPE,
+                 flush_rows=SEGMENT_FLUSH_ROWS):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported LOCAL_INDEX_DTYPE: {dtype}")
+
+        self.name = name
+        self.dimension = dimension
+        self.path = path
+        self.dtype = dtype
+        self.flush_rows = flush_rows
+
+        self._memtable = LocalIndex(name, dimension)
+        self._segments = []
+        self._locations = {}          # id -> (segment, row) for rows on disk
+        self._pending_tombstones = [] # rows superseded by buffered upserts, written on flush
+        self._next_seq = 1
+
+        self._lock = threading.RLock()
+        self._compacting = threading.Lock()
+
+        os.makedirs(path, exist_ok=True)
+        self._open()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._memtable) + len(self._locations)
+
+    # ---------- startup ----------
+    def _open(self):
+        manifest_path = os.path.join(self.path, "manifest.json")
+        if not os.path.exists(manifest_path):
+            self._write_manifest()
+            return
+
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["dimension"] != self.dimension:
+            raise ValueError(
+                f"Index '{self.name}' on disk has dimension {manifest['dimension']}, requested {self.dimension}"
+            )
+
+        self.dtype = manifest["dtype"]
+        self._next_seq = manifest["next_seq"]
+        self._segments = [Segment(os.path.join(self.path, s)) for s in manifest["segments"]]
+
+        # Later segments win; anything older with the same id is dead
+        # (normally already tombstoned, unless we stopped between flush and tombstone write)
+        for segment in self._segments:
+            for row in np.flatnonzero(segment.live):
+                vec_id = segment.ids[row]
+                previous = self._locations.get(vec_id)
+                if previous is not None:
+                    previous[0].tombstone([previous[1]])
+                self._locations[vec_id] = (segment, int(row))
+
+        # Leftovers from an interrupted flush or compaction
+        listed = set(manifest["segments"])
+        for entry in os.listdir(self.path):
+            if entry.startswith("seg_") and entry not in listed:
+                shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+
+        print(f"[INFO] Opened index '{self.name}': {len(self._segments)} segments, "
+              f"{len(self._locations)} vectors ({self.dtype}, mmap)")
+
+    def _write_manifest(self):
+        tmp = os.path.join(self.path, "manifest.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "dimension": self.dimension,
+                "dtype": self.dtype,
+                "next_seq": self._next_seq,
+                "segments": [s.name for s in self._segments],
+            }, f)
+        os.replace(tmp, os.path.join(self.path, "manifest.json"))
+
+    # ---------- write path ----------
+    def upsert(self, vectors, **kwargs):
+        vectors = list(vectors)
+        ids = [str(v["id"]) if isinstance(v, dict) else str(v[0]) for v in vectors]
+
+        with self._lock:
+            result = self._memtable.upsert(vectors)
+            for vec_id in ids:
+                location = self._locations.pop(vec_id, None)
+                if location is not None:
+                    location[0].live[location[1]] = False
+                    self._pending_tombstones.append(location)
+
+            if len(self._memtable) >= self.flush_rows:
+                self._flush()
+        return result
+
+    def delete(self, ids=None, delete_all=False, filter=None, **kwargs):
+        with self._lock:
+            if delete_all:
+                targets = set(self._locations)
+            else:
+                targets = set(ids or [])
+                if filter:
+                    for segment in self._segments:
+                        mask = segment.postings.mask(filter, len(segment), segment.iter_metadata)
+                        targets.update(segment.ids[row] for row in np.flatnonzero(mask & segment.live))
+
+            self._memtable.delete(ids=list(targets), delete_all=delete_all, filter=filter)
+
+            by_segment = {}
+            for vec_id in targets:
+                location = self._locations.pop(vec_id, None)
+                if location is not None:
+                    by_segment.setdefault(location[0], []).append(location[1])
+            for segment, rows in by_segment.items():
+                segment.tombstone(rows)
+        return {}
+
+    def persist(self):
+        """Flush buffered upserts to a new segment"""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        size = len(self._memtable)
+        if size == 0:
+            return
+
+        mem = self._memtable
+        name = f"seg_{self._next_seq:06d}"
+        Segment.write(
+            os.path.join(self.path, name),
+            mem._ids,
+            mem._vectors[:size],
+            mem._norms[:size],
+            mem._metadata,
+            self.dtype,
+        )
+        segment = Segment(os.path.join(self.path, name))
+        self._segments.append(segment)
+        self._next_seq += 1
+        self._write_manifest()
+
+        for row, vec_id in enumerate(segment.ids):
+            self._locations[vec_id] = (segment, row)
+
+        by_segment = {}
+        for old, row in self._pending_tombstones:
+            by_segment.setdefault(old, []).append(row)
+        for old, rows in by_segment.items():
+            if old in self._segments:
+                old.tombstone(rows)
+        self._pending_tombstones = []
+
+        self._memtable = LocalIndex(self.name, self.dimension)
+        print(f"[INFO] Flushed {size} vectors to {self.name}/{name}")
+
+        self._maybe_compact()
+
+    # ---------- read path ----------
+    def query(self, vector=None, top_k=10, include_metadata=False,
+              include_values=False, filter=None, id=None, **kwargs):
+        with self._lock:
+            if vector is None and id is not None:
+                fetched = self.fetch([id])["vectors"]
+                if id not in fetched:
+                    return {"matches": [], "namespace": ""}
+                vector = fetched[id]["values"]
+
+            query = np.asarray(vector, dtype=np.float32)
+            if query.shape != (self.dimension,):
+                raise ValueError(
+                    f"Query dimension {query.shape} does not match index dimension {self.dimension}"
+                )
+            norm = float(np.linalg.norm(query))
+            if norm > 0:
+                query = query / norm
+
+            # (score, segment or None for the memtable, row or match dict)
+            candidates = [
+                (m["score"], None, m)
+                for m in self._memtable.query(
+                    vector=query, top_k=top_k, include_metadata=include_metadata,
+                    include_values=include_values, filter=filter,
+                )["matches"]
+            ]
+
+            for segment in self._segments:
+                if filter:
+                    mask = segment.postings.mask(filter, len(segment), segment.iter_metadata)
+                    rows = np.flatnonzero(mask & segment.live)
+                elif segment.live.all():
+                    rows = None
+                else:
+                    rows = np.flatnonzero(segment.live)
+
+                if rows is not None and rows.size == 0:
+                    continue
+
+                scores = segment.scores(query, rows)
+                k = min(top_k, scores.shape[0])
+                top = np.argpartition(-scores, k - 1)[:k] if k < scores.shape[0] else np.arange(k)
+                for i in top:
+                    row = int(i) if rows is None else int(rows[i])
+                    candidates.append((float(scores[i]), segment, row))
+
+            candidates.sort(key=lambda c: -c[0])
+
+            matches = []
+            for score, segment, row in candidates[:top_k]:
+                if segment is None:
+                    matches.append(row)
+                    continue
+                match = {"id": segment.ids[row], "score": score}
+                if include_metadata:
+                    match["metadata"] = segment.metadata(row)
+                if include_values:
+                    match["values"] = segment.values(row)
+                matches.append(match)
+
+        return {"matches": matches, "namespace": ""}
+
+    def fetch(self, ids, **kwargs):
+        with self._lock:
+            vectors = self._memtable.fetch(ids)["vectors"]
+            for vec_id in ids:
+                location = self._locations.get(vec_id)
+                if vec_id in vectors or location is None:
+                    continue
+                segment, row = location
+                vectors[vec_id] = {
+                    "id": vec_id,
+                    "values": segment.values(row),
+                    "metadata": segment.metadata(row),
+                }
+        return {"vectors": vectors, "namespace": ""}
+
+    def describe_index_stats(self, **kwargs):
+        with self._lock:
+            total = len(self._memtable) + len(self._locations)
+            return {
+                "dimension": self.dimension,
+                "total_vector_count": total,
+                "segment_count": len(self._segments),
+                "buffered_vector_count": len(self._memtable),
+                "namespaces": {"": {"vector_count": total}},
+            }
+
+    # ---------- compaction ----------
+    def _maybe_compact(self):
+        small = [s for s in self._segments if s.live_count < COMPACT_SEGMENT_ROWS]
+        if len(small) >= COMPACT_MIN_SEGMENTS and not self._compacting.locked():
+            threading.Thread(target=self.compact, name=f"compact-{self.name}", daemon=True).start()
+
+    def compact(self):
+        """Merge small segments into one, dropping dead rows. Runs without blocking queries."""
+        if not self._compacting.acquire(blocking=False):
+            return
+        try:
+            with self._lock:
+                merging = [s for s in self._segments if s.live_count < COMPACT_SEGMENT_ROWS]
+                if len(merging) < 2:
+                    return
+                snapshot = {s: np.flatnonzero(s.live) for s in merging}
+                name = f"seg_{self._next_seq:06d}"
+                self._next_seq += 1
+
+            ids, vectors, norms, metadatas, origin = [], [], [], [], []
+            for segment, rows in snapshot.items():
+                ids.extend(segment.ids[r] for r in rows)
+                vectors.append(np.asarray(segment.vectors[rows], dtype=np.float32))
+                norms.append(np.asarray(segment.norms[rows], dtype=np.float32))
+                metadatas.extend(segment.metadata(r) for r in rows)
+                origin.extend((segment, int(r)) for r in rows)
+
+            path = os.path.join(self.path, name)
+            Segment.write(
+                path, ids,
+                np.concatenate(vectors) if vectors else np.zeros((0, self.dimension), np.float32),
+                np.concatenate(norms) if norms else np.zeros(0, np.float32),
+                metadatas, self.dtype,
+            )
+            merged = Segment(path)
+
+            with self._lock:
+                # Rows deleted while we were copying stay dead; rows superseded by
+                # still-buffered upserts stay pending until that buffer is flushed
+                pending = set(self._pending_tombstones)
+                remapped, dead = [], []
+                for i, location in enumerate(origin):
+                    if location in pending:
+                        merged.live[i] = False
+                        remapped.append((merged, i))
+                    elif not location[0].live[location[1]]:
+                        dead.append(i)
+                merged.tombstone(dead)
+                self._pending_tombstones = [
+                    loc for loc in self._pending_tombstones if loc[0] not in snapshot
+                ] + remapped
+
+                position = self._segments.index(merging[0])
+                self._segments = [s for s in self._segments if s not in snapshot]
+                self._segments.insert(position, merged)
+                self._write_manifest()
+
+                for row, vec_id in enumerate(merged.ids):
+                    if merged.live[row]:
+                        self._locations[vec_id] = (merged, row)
+
+            for segment in merging:
+                segment.close()
+                shutil.rmtree(segment.path, ignore_errors=True)
+            print(f"[INFO] Compacted {len(merging)} segments of '{self.name}' into {name} "
+                  f"({merged.live_count} vectors)")
+        finally:
+            self._compacting.release()
+
+
+# -------------------------------------------------
+# PROCESS-WIDE REGISTRY
+# -------------------------------------------------
+LOCAL_INDEX_DIR = data_path("LOCAL_INDEX_DIR", "")
+
+_segmented_indexes = {}
+_registry_lock = threading.Lock()
+
+
+def get_segmented_index(name, dimension):
+    with _registry_lock:
+        index = _segmented_indexes.get(name)
+        if index is None:
+            index = SegmentedIndex(name, dimension, os.path.join(LOCAL_INDEX_DIR, name))
+            _segmented_indexes[name] = index
+        elif index.dimension != dimension:
+            raise ValueError(
+                f"Index '{name}' has dimension {index.dimension}, requested {dimension}"
+            )
+        return index
+
+
+def persist_all():
+    with _registry_lock:
+        indexes = list(_segmented_indexes.values())
+    for index in indexes:
+        index.persist()
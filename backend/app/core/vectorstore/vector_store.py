@@ -1,29 +1,98 @@
 import os
-from pinecone import Pinecone, ServerlessSpec
+import uuid
+import threading
 from dotenv import load_dotenv
 
-from app.core.embeddings.embedder import embed_documents
-from app.core.embeddings.ocr_reader import extract_text_from_image
-from app.core.embeddings.blip_captioner import generate_caption
+from app.core.embeddings.embedder import embed_documents, EMBEDDING_MODEL_ID
+from app.core.embeddings.ocr_reader import extract_texts_from_images, OCR_MODEL_ID
+from app.core.embeddings.blip_captioner import generate_captions, BLIP_MODEL_ID
+from app.core.utils.artifact_cache import cached_vectors
+from app.core.vectorstore.index_registry import IndexRegistry
+from app.core.vectorstore import lexical_index
+from app.core.utils.paths import data_path
 
 load_dotenv()
 
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_ENV = os.getenv("PINECONE_ENV")
 
+# "pinecone" (managed service), "local" (in-process exact NumPy index)
+# or "hnsw" (in-process approximate index for large corpora, persisted to disk)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone").lower()
+
+# With VECTOR_BACKEND=local, persist indexes as memory-mapped segments under this dir
+LOCAL_INDEX_DIR = data_path("LOCAL_INDEX_DIR", "")
+
 TEXT_INDEX_NAME = "multimodal-documents"
 IMAGE_INDEX_NAME = "multimodal-image"
 
-pc = Pinecone(api_key=PINECONE_API_KEY)
+# Pinecone connection settings
+PINECONE_HOST = os.getenv("PINECONE_HOST")  # control-plane override (Pinecone Local / stand-in)
+PINECONE_GRPC = os.getenv("PINECONE_GRPC", "false").lower() == "true"
+PINECONE_POOL_THREADS = int(os.getenv("PINECONE_POOL_THREADS", "4"))
+PINECONE_POOL_MAXSIZE = int(os.getenv("PINECONE_POOL_MAXSIZE", "16"))
+
+if VECTOR_BACKEND == "pinecone":
+    pass  # client created on first index access (get_pinecone_client)
+elif VECTOR_BACKEND == "local" and LOCAL_INDEX_DIR:
+    import atexit
+    from app.core.vectorstore.segment_store import get_segmented_index as get_local_index, persist_all
+    atexit.register(persist_all)
+elif VECTOR_BACKEND == "local":
+    from app.core.vectorstore.local_index import get_local_index
+elif VECTOR_BACKEND == "hnsw":
+    import atexit
+    from app.core.vectorstore.hnsw_index import get_hnsw_index, persist_all, HNSW_INDEX_DIR
+    atexit.register(persist_all)
+else:
+    raise ValueError(f"Unknown VECTOR_BACKEND: {VECTOR_BACKEND}")
+
+# Where vectors live. Ingestion results (e.g. upload dedupe) are only reused
+# within the same store; in-memory indexes get a fresh id per process.
+if VECTOR_BACKEND == "pinecone":
+    VECTOR_STORE_ID = f"pinecone:{PINECONE_HOST or PINECONE_ENV}"
+elif VECTOR_BACKEND == "local" and LOCAL_INDEX_DIR:
+    VECTOR_STORE_ID = f"local:{os.path.abspath(LOCAL_INDEX_DIR)}"
+elif VECTOR_BACKEND == "hnsw" and HNSW_INDEX_DIR:
+    VECTOR_STORE_ID = f"hnsw:{os.path.abspath(HNSW_INDEX_DIR)}"
+else:
+    VECTOR_STORE_ID = f"memory:{uuid.uuid4().hex}"
 
 
 # -------------------------------------------------
 # INDEX INITIALIZATION
 # -------------------------------------------------
-def init_index(name, dimension):
-    existing = [i["name"] for i in pc.list_indexes()]
+_pc = None
+_pc_lock = threading.Lock()
+_pinecone_hosts = {}
+
+
+def get_pinecone_client():
+    """Pinecone control-plane client, created on first use (the SDK is slow to import)"""
+    global _pc
+    if _pc is None:
+        with _pc_lock:
+            if _pc is None:
+                if PINECONE_GRPC:
+                    from pinecone.grpc import PineconeGRPC as Pinecone
+                else:
+                    from pinecone import Pinecone
+
+                pc_kwargs = {"api_key": PINECONE_API_KEY}
+                if PINECONE_HOST:
+                    pc_kwargs["host"] = PINECONE_HOST
+                _pc = Pinecone(**pc_kwargs)
+    return _pc
+
+
+def _pinecone_host(name, dimension):
+    """Create the index if needed and check its dimension (control plane, once per index)"""
+    if name in _pinecone_hosts:
+        return _pinecone_hosts[name]
 
-    if name not in existing:
+    from pinecone import ServerlessSpec
+    pc = get_pinecone_client()
+    if not pc.has_index(name):
         pc.create_index(
             name=name,
             dimension=dimension,
@@ -34,13 +103,61 @@ def init_index(name, dimension):
             )
         )
 
-    return pc.Index(name)
+    description = pc.describe_index(name)
+    if description.dimension != dimension:
+        raise ValueError(
+            f"Pinecone index '{name}' has dimension {description.dimension}, requested {dimension}"
+        )
+    _pinecone_hosts[name] = description.host
+    return description.host
+
+
+def _open_pinecone_index(name, dimension):
+    # One handle per index: its urllib3 / gRPC connection pool is shared by all threads
+    kwargs = {"pool_threads": PINECONE_POOL_THREADS}
+    if not PINECONE_GRPC:
+        kwargs["connection_pool_maxsize"] = PINECONE_POOL_MAXSIZE
+    return get_pinecone_client().Index(host=_pinecone_host(name, dimension), **kwargs)
+
+
+def _open_pinecone_async_index(name, dimension):
+    return get_pinecone_client().IndexAsyncio(host=_pinecone_host(name, dimension))
+
+
+if VECTOR_BACKEND == "pinecone":
+    _registry = IndexRegistry(
+        _open_pinecone_index,
+        None if PINECONE_GRPC else _open_pinecone_async_index,
+    )
+elif VECTOR_BACKEND == "hnsw":
+    _registry = IndexRegistry(get_hnsw_index)
+else:
+    _registry = IndexRegistry(get_local_index)
+
+
+def init_index(name, dimension):
+    """Return a cached index handle exposing Pinecone's upsert/query interface"""
+    return _registry.get(name, dimension)
+
+
+async def init_index_async(name, dimension):
+    """Async handle for the query path (Pinecone's aiohttp client, or a thread-backed facade)"""
+    return await _registry.get_async(name, dimension)
+
+
+async def close_async_indexes():
+    await _registry.close_async()
 
 
 # -------------------------------------------------
 # TEXT VECTOR STORAGE
 # -------------------------------------------------
-def save_text_vectors(embeddings, metadatas, chunks):
+def save_text_vectors(embeddings, metadatas, chunks, persist=True, ids=None):
+    """
+    persist=False lets streaming ingestion upsert batch by batch and
+    persist local indexes once at the end (see persist_index).
+    ids defaults to text_<session_id>_<chunk_id>.
+    """
     if not embeddings:
         return
 
@@ -50,7 +167,7 @@ def save_text_vectors(embeddings, metadatas, chunks):
     vectors = []
     for i, emb in enumerate(embeddings):
         vectors.append({
-            "id": f"text_{metadatas[i]['session_id']}_{i}",
+            "id": ids[i] if ids else f"text_{metadatas[i]['session_id']}_{metadatas[i].get('chunk_id', i)}",
             "values": emb,
             "metadata": {
                 "text": chunks[i][:1000],  # Limit metadata size to 1000 chars
@@ -65,15 +182,46 @@ def save_text_vectors(embeddings, metadatas, chunks):
         index.upsert(batch)
         print(f"[INFO] Upserted batch {i//batch_size + 1}/{(len(vectors)-1)//batch_size + 1}")
 
+    # Same chunks under the same ids in the per-session BM25 index (hybrid retrieval)
+    lexical_index.add_texts(
+        [v["id"] for v in vectors], chunks, [v["metadata"] for v in vectors]
+    )
+
+    # Local indexes persist once per ingestion rather than per batch
+    if persist:
+        lexical_index.persist_all()
+        if hasattr(index, "persist"):
+            index.persist()
+
+
+def persist_index(name, dimension):
+    """Flush a local index to disk (no-op for Pinecone)"""
+    index = init_index(name, dimension)
+    if hasattr(index, "persist"):
+        index.persist()
+    if name == TEXT_INDEX_NAME:
+        lexical_index.persist_all()
+
 
 # -------------------------------------------------
 # IMAGE VECTOR STORAGE (CLIP + OCR + BLIP)
 # -------------------------------------------------
 def save_image_vectors(image_path, embedding, session_id):
-    # ---------- CLIP IMAGE VECTOR ----------
-    image_index = init_index(IMAGE_INDEX_NAME, len(embedding))
+    save_images_vectors([image_path], [embedding], session_id)
 
-    image_index.upsert([{
+
+def save_images_vectors(image_paths, embeddings, session_id):
+    """
+    Store CLIP vectors plus OCR/caption text vectors for a batch of images.
+    OCR, captioning and text embedding each run once over the whole batch.
+    """
+    if not image_paths:
+        return
+
+    # ---------- CLIP IMAGE VECTORS ----------
+    image_index = init_index(IMAGE_INDEX_NAME, len(embeddings[0]))
+
+    vectors = [{
         "id": f"img_{session_id}_{os.path.basename(image_path)}",
         "values": embedding,
         "metadata": {
@@ -82,17 +230,25 @@ def save_image_vectors(image_path, embedding, session_id):
             "modality": "image",
             "session_id": session_id
         }
-    }])
+    } for image_path, embedding in zip(image_paths, embeddings)]
+    for i in range(0, len(vectors), 100):
+        image_index.upsert(vectors[i:i + 100])
+    if hasattr(image_index, "persist"):
+        image_index.persist()
 
     # ---------- OCR + BLIP → TEXT ----------
-    ocr_text = extract_text_from_image(image_path).strip()
-    caption = generate_caption(image_path).strip()
+    ocr_texts = extract_texts_from_images(image_paths)
+    captions = generate_captions(image_paths)
 
-    # ❌ Do NOT store weak or empty image context
-    if not ocr_text and not caption:
-        return
+    combined = {}
+    for image_path, ocr_text, caption in zip(image_paths, ocr_texts, captions):
+        ocr_text, caption = ocr_text.strip(), caption.strip()
 
-    combined_text = f"""
+        # ❌ Do NOT store weak or empty image context
+        if not ocr_text and not caption:
+            continue
+
+        combined[image_path] = f"""
 IMAGE CAPTION:
 {caption}
 
@@ -100,15 +256,26 @@ IMAGE OCR:
 {ocr_text}
 """.strip()
 
-    text_embeddings = embed_documents([combined_text])
+    if not combined:
+        return
+
+    # The combined text is fully determined by the image and the OCR/BLIP models
+    paths = list(combined)
+    text_embeddings = cached_vectors(
+        paths,
+        "image_text_embedding",
+        f"{EMBEDDING_MODEL_ID}|{BLIP_MODEL_ID}|{OCR_MODEL_ID}",
+        lambda misses: embed_documents([combined[p] for p in misses]),
+    )
 
     save_text_vectors(
-        text_embeddings,
+        [v.tolist() for v in text_embeddings],
         [{
             "source": image_path,
             "type": "image_text",
             "modality": "image",
             "session_id": session_id
-        }],
-        [combined_text]
+        } for image_path in paths],
+        [combined[p] for p in paths],
+        ids=[f"text_{session_id}_{os.path.basename(p)}" for p in paths],
     )
@@ -2,6 +2,10 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes import ingest, query
 from app.core.model_cache import warmup_models, get_models_status
+from app.core.vectorstore.vector_store import close_async_indexes
+from app.core.embeddings.vision_pool import stop_vision_pools
+from app.services.job_queue import get_job_queue
+from app.core.utils import metrics
 
 app = FastAPI(title="Multimodal RAG Backend")
 
@@ -12,6 +16,13 @@ async def startup_event():
     print("[INFO] Models will load lazily on first use")
     print("[INFO] Use /warmup endpoint to pre-load models")
     print("[INFO] ========================================")
+    get_job_queue().start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    get_job_queue().stop()
+    stop_vision_pools()
+    await close_async_indexes()
 
 @app.get("/")
 def root():
@@ -43,5 +54,10 @@ async def warmup():
 
 @app.get("/models/status")
 def models_status():
-    """Check which models are currently loaded"""
+    """Loaded models, their measured memory and load / eviction counts"""
     return get_models_status()
+
+@app.get("/metrics")
+def metrics_report():
+    """Counters and per-call latency (ms) for vector store and model calls"""
+    return metrics.snapshot()
@@ -1,8 +1,13 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
 import os
+import uuid
 import shutil
+import hashlib
+import aiofiles
 
-from app.services.ingest_service import ingest_file_service
+from app.services.ingest_service import IMAGE_EXTENSIONS
+from app.services.job_queue import get_job_queue
+from app.core.vectorstore.vector_store import VECTOR_STORE_ID
 
 router = APIRouter()
 
@@ -13,28 +18,73 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 print(f"[INFO] Upload directory: {UPLOAD_DIR}")
 
+# Uploads are streamed to disk in blocks of this size, never held whole in memory
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_KB", "1024")) * 1024
 
-@router.post("/file")
+
+async def save_upload(file: UploadFile) -> tuple:
+    """
+    Stream the upload to UPLOAD_DIR while hashing it.
+    Returns (path, sha256); the stored name is prefixed with the hash
+    so different files sharing a name don't overwrite each other.
+    """
+    filename = os.path.basename(file.filename or "upload")
+    partial_path = os.path.join(UPLOAD_DIR, f".partial-{uuid.uuid4().hex}")
+    sha256 = hashlib.sha256()
+
+    try:
+        async with aiofiles.open(partial_path, "wb") as buffer:
+            while True:
+                block = await file.read(UPLOAD_CHUNK_SIZE)
+                if not block:
+                    break
+                sha256.update(block)
+                await buffer.write(block)
+
+        digest = sha256.hexdigest()
+        file_path = os.path.join(UPLOAD_DIR, f"{digest[:16]}_{filename}")
+        os.replace(partial_path, file_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    return file_path, digest
+
+
+@router.post("/file", status_code=202)
 async def ingest_file(file: UploadFile = File(...)):
+    """Save the upload and queue it; poll GET /ingest/jobs/{job_id} for progress"""
     try:
         print(f"[INFO] Received file upload: {file.filename}")
         print(f"[INFO] Content type: {file.content_type}")
         
-        file_path = os.path.join(UPLOAD_DIR, file.filename)
-        print(f"[INFO] Saving to: {file_path}")
+        file_path, digest = await save_upload(file)
+        print(f"[INFO] Saved to: {file_path} (sha256 {digest[:16]})")
 
-        # Async file write
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        print(f"[INFO] File saved successfully")
-        print(f"[INFO] Starting ingestion process...")
+        # The session id is fixed at submit time, so a job resumed after
+        # a restart overwrites its own vectors instead of duplicating them.
+        # Identical content already ingested into this vector store reuses
+        # that job's session; no model runs again.
+        ext = os.path.splitext(file_path)[1].lower()
+        job = get_job_queue().submit(
+            {
+                "file_path": file_path,
+                "filename": file.filename,
+                "sha256": digest,
+                "session_id": str(uuid.uuid4()),
+                "modality": "image" if ext in IMAGE_EXTENSIONS else "document",
+            },
+            dedupe_key=f"{VECTOR_STORE_ID}:{digest}",
+        )
+        if job["duplicate"]:
+            if job["file_path"] != file_path:
+                os.remove(file_path)  # same bytes under another name
+            print(f"[INFO] Duplicate upload, reusing job {job['job_id']} (session {job['session_id']})")
+            return job
 
-        result = ingest_file_service(file_path)
-        
-        print(f"[INFO] Ingestion completed successfully")
-        return result
+        print(f"[INFO] Ingestion queued as job {job['job_id']}")
+        return job
 
     except Exception as e:
         print(f"[ERROR] Upload failed: {str(e)}")
@@ -42,3 +92,21 @@ async def ingest_file(file: UploadFile = File(...)):
             status_code=500,
             detail=f"Ingestion failed: {str(e)}"
         )
+
+
+@router.get("/jobs/{job_id}")
+def get_ingest_job(job_id: str):
+    """Job status with live per-stage progress (pages / chunks / embedded / upserted)"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+
+@router.delete("/jobs/{job_id}")
+def cancel_ingest_job(job_id: str):
+    """Cancel a queued or running job (finished jobs are left as they are)"""
+    job = get_job_queue().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
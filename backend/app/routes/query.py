@@ -1,6 +1,8 @@
+import json
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.services.query_service import query_service
+from app.services.query_service import query_service_async, stream_query_service
 
 router = APIRouter()
 
@@ -9,6 +11,29 @@ class QueryRequest(BaseModel):
     session_id: str
 
 @router.post("/")
-def query_rag(req: QueryRequest):
-    answer = query_service(req.question, req.session_id)
+async def query_rag(req: QueryRequest):
+    answer = await query_service_async(req.question, req.session_id)
     return {"answer": answer}
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/stream")
+async def query_rag_stream(req: QueryRequest):
+    """Server-Sent Events: metadata (sources) first, then answer tokens, then done"""
+    async def events():
+        try:
+            async for event, data in stream_query_service(req.question, req.session_id):
+                yield _sse(event, data)
+        except Exception as e:
+            # Headers are already sent, so failures are reported in-stream
+            print(f"[ERROR] Streaming query failed: {str(e)}")
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
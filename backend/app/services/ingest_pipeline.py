@@ -0,0 +1,216 @@
+"""
+Streaming document ingestion
+load pages -> clean -> chunk -> embed (batched) -> upsert (batched), each
+stage in its own thread with bounded queues in between. Only a few pages
+and batches are in flight at once, so peak memory does not grow with the
+document, and embedding overlaps with page loading and upserts.
+"""
+import os
+import queue
+import threading
+
+from app.core.loaders.loaders import iter_pages
+from app.core.preprocess.chunker import TokenChunker
+from app.core.preprocess.preprocess_and_chunk import (
+    clean_text,
+    TITLE_CHUNK_SIZE,
+    TITLE_CHUNK_OVERLAP,
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+)
+from app.core.embeddings.embedder import embed_documents
+from app.core.vectorstore.vector_store import save_text_vectors, persist_index, TEXT_INDEX_NAME
+from app.core.utils import metrics
+
+EMBED_BATCH_SIZE = int(os.getenv("BATCH_SIZE", "32"))
+UPSERT_BATCH_SIZE = 100  # Pinecone limit
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))
+
+_DONE = object()
+
+
+class PipelineCancelled(Exception):
+    pass
+
+
+class _Pipeline:
+    """
+    Runs generator stages in threads connected by bounded queues.
+    The first failure stops every stage and is re-raised to the consumer.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._stop = threading.Event()
+        self._error = None
+        self._threads = []
+
+    def stage(self, upstream, transform, name: str):
+        """Run transform(upstream) in a thread; returns an iterator over its outputs"""
+        out = queue.Queue(maxsize=self.maxsize)
+
+        def run():
+            try:
+                for item in transform(upstream):
+                    if not self._put(out, item):
+                        return
+            except BaseException as e:
+                if self._error is None:
+                    self._error = e
+                self._stop.set()
+            finally:
+                self._put(out, _DONE)
+
+        thread = threading.Thread(target=run, name=f"ingest-{name}", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        return self.items(out)
+
+    def items(self, q):
+        """Iterate a stage's output queue until the stage is done"""
+        while True:
+            try:
+                item = q.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return
+                continue
+            if item is _DONE:
+                return
+            yield item
+
+    def _put(self, q, item) -> bool:
+        while True:
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                # Consumers of a stopped pipeline exit without draining
+                if self._stop.is_set():
+                    return False
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+    def raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+
+# -------------------------------------------------
+# STAGES
+# -------------------------------------------------
+def _clean_pages(pages):
+    for page_no, doc in enumerate(pages):
+        yield page_no, clean_text(doc.page_content)
+
+
+def _chunk_pages(pages, file_path, session_id):
+    """Page 1 (title + abstract) gets small chunks; the rest is one token stream"""
+    title_chunker = TokenChunker(TITLE_CHUNK_SIZE, TITLE_CHUNK_OVERLAP)
+    body_chunker = TokenChunker(CHUNK_SIZE, CHUNK_OVERLAP)
+    chunk_id = 0
+    batch = []
+
+    def emit(chunks):
+        nonlocal chunk_id
+        for c in chunks:
+            batch.append((c["text"], {
+                "source": file_path,
+                "chunk_id": chunk_id,
+                "session_id": session_id,
+                "type": "document",
+                "modality": "text",
+                "page": c["page_start"],
+                "token_count": c["token_count"],
+                "text": c["text"],
+            }))
+            chunk_id += 1
+
+    for page_no, text in pages:
+        if page_no == 0:
+            emit(title_chunker.feed(page_no, text))
+            emit(title_chunker.flush())
+        else:
+            emit(body_chunker.feed(page_no, text))
+
+        while len(batch) >= EMBED_BATCH_SIZE:
+            yield batch[:EMBED_BATCH_SIZE]
+            del batch[:EMBED_BATCH_SIZE]
+
+    emit(body_chunker.flush())
+    for i in range(0, len(batch), EMBED_BATCH_SIZE):
+        yield batch[i:i + EMBED_BATCH_SIZE]
+
+
+def _embed_batches(batches):
+    for batch in batches:
+        texts = [text for text, _ in batch]
+        with metrics.timed("ingest.embed_batch"):
+            embeddings = embed_documents(texts)
+        yield batch, embeddings
+
+
+# -------------------------------------------------
+# PIPELINE
+# -------------------------------------------------
+def run_text_pipeline(file_path: str, session_id: str, progress: dict = None, cancel=None) -> int:
+    """
+    Ingest a document page by page; returns the number of chunks stored.
+    `progress` (if given) is updated in place with per-stage counts;
+    setting the `cancel` event stops every stage.
+    """
+    progress = progress if progress is not None else {}
+    progress.update({"pages": 0, "chunks": 0, "embedded": 0, "upserted": 0})
+
+    def counted(items, key, size=lambda item: 1):
+        for item in items:
+            progress[key] += size(item)
+            yield item
+
+    pipeline = _Pipeline(PIPELINE_QUEUE_SIZE)
+    try:
+        pages = pipeline.stage(counted(iter_pages(file_path), "pages"), _clean_pages, "load")
+        batches = pipeline.stage(
+            pages, lambda p: counted(_chunk_pages(p, file_path, session_id), "chunks", len), "chunk"
+        )
+        embedded = pipeline.stage(batches, _embed_batches, "embed")
+
+        pending_texts, pending_metas, pending_vectors = [], [], []
+        dimension = None
+
+        def upsert(count):
+            with metrics.timed("ingest.upsert_batch"):
+                save_text_vectors(
+                    pending_vectors[:count], pending_metas[:count], pending_texts[:count], persist=False
+                )
+            progress["upserted"] += len(pending_vectors[:count])
+            del pending_texts[:count]
+            del pending_metas[:count]
+            del pending_vectors[:count]
+
+        for batch, embeddings in embedded:
+            if cancel is not None and cancel.is_set():
+                raise PipelineCancelled(f"Ingestion of {file_path} cancelled")
+
+            progress["embedded"] += len(embeddings)
+            dimension = len(embeddings[0])
+            for (text, meta), vector in zip(batch, embeddings):
+                pending_texts.append(text)
+                pending_metas.append(meta)
+                pending_vectors.append(vector)
+            while len(pending_vectors) >= UPSERT_BATCH_SIZE:
+                upsert(UPSERT_BATCH_SIZE)
+
+        pipeline.raise_error()
+        if pending_vectors:
+            upsert(len(pending_vectors))
+        if dimension is not None:
+            persist_index(TEXT_INDEX_NAME, dimension)
+    finally:
+        pipeline.stop()
+
+    print(f"[INFO] Streamed {progress['pages']} pages -> {progress['upserted']} chunks")
+    return progress["upserted"]
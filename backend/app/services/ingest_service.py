@@ -8,24 +8,56 @@ src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
 if src_path not in sys.path:
     sys.path.insert(0, src_path)
 
-from app.core.preprocess.preprocess_and_chunk import preprocess_and_chunk_documents
-from app.core.embeddings.embedder import embed_documents
-from app.core.embeddings.clip_embedder import embed_image
-from app.core.embeddings.ocr_reader import extract_text_from_image
-from app.core.embeddings.blip_captioner import generate_caption
-from app.core.vectorstore.vector_store import save_text_vectors, save_image_vectors
+from app.core.embeddings.clip_embedder import embed_images
+from app.core.vectorstore.vector_store import save_images_vectors
+from app.core.loaders.loaders import extract_zip
+from app.core.loaders.image_loader import load_images, SUPPORTED_IMAGE_EXT
+from app.services.ingest_pipeline import run_text_pipeline, PipelineCancelled
+from app.core.utils.query_cache import begin_session_update, end_session_update
 
 
-IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+IMAGE_EXTENSIONS = SUPPORTED_IMAGE_EXT
 
+# Images embedded/stored per step; each model batches within a step by memory budget
+IMAGE_INGEST_GROUP = 64
 
-def ingest_file_service(file_path: str):
+
+def ingest_images(image_paths: list, session_id: str, progress: dict = None, cancel=None) -> int:
+    """
+    CLIP vectors + OCR/caption text vectors for many images, batched per model.
+    Every model output goes through the artifact cache, so each model runs
+    at most once per image.
+    """
+    progress = progress if progress is not None else {}
+    progress.update({"images": len(image_paths), "images_done": 0})
+
+    for i in range(0, len(image_paths), IMAGE_INGEST_GROUP):
+        if cancel is not None and cancel.is_set():
+            raise PipelineCancelled(f"Image ingestion for session {session_id} cancelled")
+
+        group = image_paths[i:i + IMAGE_INGEST_GROUP]
+        save_images_vectors(group, embed_images(group), session_id)
+        progress["images_done"] += len(group)
+
+    return len(image_paths)
+
+
+def ingest_file_service(file_path: str, session_id: str = None, progress: dict = None, cancel=None):
+    """
+    progress (optional) is updated in place with per-stage counts;
+    setting the cancel event stops a running document ingestion.
+    """
+    updating = False
     try:
         # Validate file exists
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
         
-        session_id = str(uuid.uuid4())
+        session_id = session_id or str(uuid.uuid4())
+        # Answers cached from here on would come from a partial index
+        begin_session_update(session_id)
+        updating = True
+        progress = progress if progress is not None else {}
         ext = os.path.splitext(file_path)[1].lower()
         
         print(f"[INFO] Processing file: {file_path}")
@@ -34,38 +66,7 @@ def ingest_file_service(file_path: str):
 
         # ---------------- IMAGE INGESTION ----------------
         if ext in IMAGE_EXTENSIONS:
-            # 1️⃣ OCR
-            ocr_text = extract_text_from_image(file_path).strip()
-
-            # 2️⃣ Caption
-            caption = generate_caption(file_path).strip()
-
-            combined_text = f"""
-IMAGE CAPTION:
-{caption}
-
-IMAGE OCR:
-{ocr_text}
-""".strip()
-
-            # 3️⃣ Save OCR + caption as TEXT vectors
-            if combined_text:
-                text_embeddings = embed_documents([combined_text])
-                save_text_vectors(
-                    text_embeddings,
-                    [{
-                        "session_id": session_id,
-                        "type": "image_text",
-                        "modality": "image",
-                        "source": file_path,
-                        "text": combined_text
-                    }],
-                    [combined_text]
-                )
-
-            # 4️⃣ Save IMAGE vector (CLIP)
-            image_embedding = embed_image(file_path)
-            save_image_vectors(file_path, image_embedding, session_id)
+            ingest_images([file_path], session_id, progress, cancel)
 
             return {
                 "status": "success",
@@ -73,28 +74,33 @@ IMAGE OCR:
                 "modality": "image"
             }
 
+        # ---------------- ZIP: DOCUMENTS + IMAGES ----------------
+        elif ext == ".zip":
+            extract_dir = extract_zip(file_path)
+            chunk_count = run_text_pipeline(extract_dir, session_id, progress, cancel)
+            image_paths = [img["image_path"] for img in load_images(extract_dir)]
+            image_count = ingest_images(image_paths, session_id, progress, cancel)
+
+            return {
+                "status": "success",
+                "session_id": session_id,
+                "modality": "document",
+                "chunks": chunk_count,
+                "images": image_count
+            }
+
         # ---------------- DOCUMENT INGESTION ----------------
         else:
-            print(f"[DEBUG] verify: Calling preprocess_and_chunk_documents for {file_path}")
+            # Pages stream through chunking, embedding and upserts;
+            # the whole document is never held in memory
+            chunk_count = run_text_pipeline(file_path, session_id, progress, cancel)
             sys.stdout.flush()
-            chunks, metadatas = preprocess_and_chunk_documents(file_path)
-            print(f"[DEBUG] verify: Chunks created: {len(chunks)}")
-            sys.stdout.flush()
-
-            for i, meta in enumerate(metadatas):
-                meta["session_id"] = session_id
-                meta["type"] = "document"
-                meta["modality"] = "text"
-                meta["text"] = chunks[i]
-
-            embeddings = embed_documents(chunks)
-            save_text_vectors(embeddings, metadatas, chunks)
 
             return {
                 "status": "success",
                 "session_id": session_id,
                 "modality": "document",
-                "chunks": len(chunks)
+                "chunks": chunk_count
             }
     
     except Exception as e:
@@ -102,3 +108,8 @@ IMAGE OCR:
         print(f"[ERROR] {error_msg}")
         print(f"[ERROR] Traceback: {traceback.format_exc()}")
         raise Exception(error_msg)
+
+    finally:
+        # The session's content changed (even partially): cached answers are stale
+        if updating:
+            end_session_update(session_id)
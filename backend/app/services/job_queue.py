@@ -0,0 +1,257 @@
+"""
+Background ingestion jobs
+Uploads are queued in SQLite and processed by a pool of worker threads,
+so the request returns immediately and the event loop never runs
+ingestion. Jobs that were queued or running when the process stopped
+are picked up again on startup.
+"""
+import os
+import json
+import time
+import uuid
+import queue
+import sqlite3
+import threading
+
+from app.core.utils import metrics
+from app.core.utils.paths import data_path
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "1"))
+INGEST_QUEUE_PATH = data_path("INGEST_QUEUE_PATH", "data/jobs/ingest.db")
+
+
+class JobQueue:
+    """
+    handler(job, progress, cancel) does the work: it may update the
+    `progress` dict in place (reported live by get()) and should stop
+    early once the `cancel` event is set. Its return value is stored
+    as the job result.
+    """
+
+    def __init__(self, path: str, workers: int, handler):
+        self.path = path
+        self.workers = workers
+        self._handler = handler
+        self._lock = threading.Lock()
+        self._pending = queue.Queue()
+        self._progress = {}  # job id -> live progress of running jobs
+        self._cancel = {}    # job id -> cancel event of running jobs
+        self._stopping = threading.Event()
+        self._threads = []
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " progress TEXT,"
+            " result TEXT,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")]
+        if "dedupe_key" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN dedupe_key TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_dedupe ON jobs(dedupe_key)")
+        metrics.register_collector("ingest_jobs", self.stats)
+
+    # -------------------------------------------------
+    # LIFECYCLE
+    # -------------------------------------------------
+    def start(self):
+        """Requeue unfinished jobs and start the workers"""
+        if self._threads:
+            return
+        self._stopping.clear()
+
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at"
+            ).fetchall()
+        for (job_id,) in rows:
+            self._pending.put(job_id)
+        if rows:
+            print(f"[INFO] Resuming {len(rows)} unfinished ingestion job(s)")
+
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"ingest-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"[INFO] Ingestion job queue started ({self.workers} worker(s))")
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the workers; interrupted jobs stay queued for the next start"""
+        self._stopping.set()
+        with self._lock:
+            events = list(self._cancel.values())
+        for event in events:
+            event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    # -------------------------------------------------
+    # API
+    # -------------------------------------------------
+    def submit(self, payload: dict, dedupe_key: str = None) -> dict:
+        """
+        Queue a job. If a queued, running or succeeded job has the same
+        dedupe_key, that job is returned (with "duplicate": True) instead.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        existing = None
+        with self._lock:
+            if dedupe_key is not None:
+                existing = self._conn.execute(
+                    "SELECT id FROM jobs WHERE dedupe_key = ?"
+                    " AND status IN ('queued', 'running', 'succeeded')"
+                    " ORDER BY created_at DESC LIMIT 1",
+                    (dedupe_key,),
+                ).fetchone()
+            if existing is None:
+                self._conn.execute(
+                    "INSERT INTO jobs (id, status, payload, dedupe_key, created_at, updated_at)"
+                    " VALUES (?, 'queued', ?, ?, ?, ?)",
+                    (job_id, json.dumps(payload), dedupe_key, now, now),
+                )
+
+        if existing is not None:
+            return {**self.get(existing[0]), "duplicate": True}
+        self._pending.put(job_id)
+        return {**self.get(job_id), "duplicate": False}
+
+    def get(self, job_id: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, payload, progress, result, error, created_at, updated_at"
+                " FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        progress = self._progress.get(job_id)
+        if progress is None:
+            progress = json.loads(row[3]) if row[3] else {}
+        return {
+            "job_id": row[0],
+            "status": row[1],
+            **json.loads(row[2]),
+            "progress": dict(progress),
+            "result": json.loads(row[4]) if row[4] else None,
+            "error": row[5],
+            "created_at": row[6],
+            "updated_at": row[7],
+        }
+
+    def cancel(self, job_id: str):
+        """Cancel a queued or running job; returns the job, or None if unknown"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', updated_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id),
+            )
+            # Read under the same lock _claim registers it with: a cancel either
+            # finds the job still queued or finds its event
+            event = self._cancel.get(job_id)
+        if event is not None:
+            event.set()
+        return self.get(job_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {"workers": self.workers, "pending": self._pending.qsize(), **dict(rows)}
+
+    # -------------------------------------------------
+    # WORKERS
+    # -------------------------------------------------
+    def _claim(self, job_id: str):
+        """The running job's cancel event, or None if it is no longer queued"""
+        with self._lock:
+            if self._stopping.is_set():
+                return None  # stays queued for the next start
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id),
+            )
+            if cursor.rowcount != 1:
+                return None
+            cancel = self._cancel[job_id] = threading.Event()
+        return cancel
+
+    def _finish(self, job_id: str, status: str, progress: dict, result=None, error=None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, progress = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+                (
+                    status,
+                    json.dumps(progress),
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    time.time(),
+                    job_id,
+                ),
+            )
+
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                job_id = self._pending.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            cancel = self._claim(job_id)
+            if cancel is None:
+                continue  # cancelled while queued
+
+            job = self.get(job_id)
+            progress = self._progress[job_id] = {}
+            print(f"[INFO] Ingestion job {job_id} started")
+            try:
+                if cancel.is_set():
+                    raise RuntimeError("cancelled before it started")
+                result = self._handler(job, progress, cancel)
+                self._finish(job_id, "succeeded", progress, result=result)
+                print(f"[INFO] Ingestion job {job_id} succeeded")
+            except Exception as e:
+                if self._stopping.is_set():
+                    # Shutting down: run it again on the next start
+                    self._finish(job_id, "queued", progress)
+                elif cancel.is_set():
+                    self._finish(job_id, "cancelled", progress)
+                    print(f"[INFO] Ingestion job {job_id} cancelled")
+                else:
+                    self._finish(job_id, "failed", progress, error=str(e))
+                    print(f"[ERROR] Ingestion job {job_id} failed: {str(e)}")
+            finally:
+                self._progress.pop(job_id, None)
+                self._cancel.pop(job_id, None)
+
+
+# -------------------------------------------------
+# INGESTION QUEUE (process-wide)
+# -------------------------------------------------
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def _run_ingest_job(job, progress, cancel):
+    from app.services.ingest_service import ingest_file_service
+    return ingest_file_service(
+        job["file_path"], session_id=job["session_id"], progress=progress, cancel=cancel
+    )
+
+
+def get_job_queue() -> JobQueue:
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                _job_queue = JobQueue(INGEST_QUEUE_PATH, INGEST_WORKERS, _run_ingest_job)
+    return _job_queue
@@ -1,18 +1,194 @@
-from app.core.retriever.retriever import retrieve_chunks
-from app.core.retriever.image_retriever import retrieve_images
-from app.core.generator.generator import generate_rag_answer
+import os
+import time
+import asyncio
+
+from app.core.retriever.retriever import retrieve_chunks, retrieve_chunks_async
+from app.core.retriever.image_retriever import retrieve_images, retrieve_images_async
+from app.core.generator.generator import (
+    generate_rag_answer, generate_rag_answer_async, stream_rag_answer
+)
+from app.core.embeddings.embedder import embed_query, embed_query_async, load_query_model
+from app.core.embeddings.clip_embedder import load_clip_text_model
+from app.core.embeddings.reranker import rerank, rerank_async, load_reranker
+from app.core.utils.query_cache import get_cached_answer, cache_answer, has_cached_answers, answer_cache_version
+from app.core.utils import metrics
+
+# Per-branch retrieval deadlines (seconds); a branch that misses it contributes nothing
+TEXT_RETRIEVAL_TIMEOUT = float(os.getenv("TEXT_RETRIEVAL_TIMEOUT", "30"))
+IMAGE_RETRIEVAL_TIMEOUT = float(os.getenv("IMAGE_RETRIEVAL_TIMEOUT", "5"))
+
+# Optional cross-encoder stage: over-fetch RERANK_CANDIDATES chunks, keep the best RERANK_TOP_N
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", "4"))
+TOP_K = 5
 
 
 def query_service(question: str, session_id: str):
+    # Taken before retrieval: an ingestion into the session meanwhile keeps this answer out of the cache
+    version = answer_cache_version(session_id)
+
+    # Cache hits (same or near-identical question in this session)
+    # skip retrieval and the LLM call entirely
+    answer = get_cached_answer(question, session_id, embed=embed_query)
+    if answer is not None:
+        metrics.incr("query.answer_cache_hit")
+        return answer
+
     retrieved_chunks = retrieve_chunks(
         question,
+        top_k=RERANK_CANDIDATES if RERANK_ENABLED else TOP_K,
         filter={"session_id": session_id}
     )
+    if RERANK_ENABLED:
+        retrieved_chunks = rerank(question, retrieved_chunks, RERANK_TOP_N)
 
     retrieved_images = retrieve_images(question)
 
-    return generate_rag_answer(
+    answer = generate_rag_answer(
+        query=question,
+        retrieved_chunks=retrieved_chunks,
+        retrieved_images=retrieved_images
+    )
+
+    # embed_query is served from the query embedding cache here
+    cache_answer(question, session_id, answer, embed_query(question), version)
+    return answer
+
+
+async def query_service_async(question: str, session_id: str):
+    """
+    Async query path: text and image retrieval run concurrently (model work
+    on the embedding batchers' threads, index queries as async calls), so
+    retrieval takes as long as the slower branch instead of both combined.
+    """
+    version = answer_cache_version(session_id)
+    answer = await _cached_answer_async(question, session_id)
+    if answer is not None:
+        return answer
+
+    retrieved_chunks, retrieved_images, complete = await _retrieve_async(question, session_id)
+
+    answer = await generate_rag_answer_async(
         query=question,
         retrieved_chunks=retrieved_chunks,
         retrieved_images=retrieved_images
     )
+
+    # Answers built from partial retrieval are not worth repeating
+    if complete:
+        cache_answer(question, session_id, answer, await embed_query_async(question), version)
+    return answer
+
+
+async def stream_query_service(question: str, session_id: str):
+    """
+    Streaming variant of query_service_async, yielding (event, data) pairs:
+    one "metadata" event with the retrieved sources, then "token" events as
+    the answer is generated, then "done".
+    """
+    started = time.perf_counter()
+    version = answer_cache_version(session_id)
+    answer = await _cached_answer_async(question, session_id)
+    if answer is not None:
+        yield "metadata", {"cached": True, "partial": False, "sources": [], "images": []}
+        yield "token", {"text": answer}
+        yield "done", {}
+        return
+
+    retrieved_chunks, retrieved_images, complete = await _retrieve_async(question, session_id)
+    yield "metadata", {
+        "cached": False,
+        "partial": not complete,
+        "sources": [
+            {
+                "source": chunk["metadata"].get("source"),
+                "page": chunk["metadata"].get("page"),
+                "score": chunk["score"],
+            }
+            for chunk in retrieved_chunks
+        ],
+        "images": retrieved_images,
+    }
+
+    parts = []
+    async for delta in stream_rag_answer(question, retrieved_chunks, retrieved_images):
+        if not parts:
+            metrics.observe("query.first_token", time.perf_counter() - started)
+        parts.append(delta)
+        yield "token", {"text": delta}
+
+    if complete:
+        answer = "".join(parts).strip()
+        cache_answer(question, session_id, answer, await embed_query_async(question), version)
+    yield "done", {}
+
+
+async def _cached_answer_async(question: str, session_id: str):
+    # Only embed the question when a similar-question hit is possible
+    embedding = None
+    if has_cached_answers(session_id):
+        embedding = await embed_query_async(question)
+    answer = get_cached_answer(
+        question, session_id, embed=(lambda _: embedding) if embedding is not None else None
+    )
+    if answer is not None:
+        metrics.incr("query.answer_cache_hit")
+    return answer
+
+
+async def _retrieve_async(question: str, session_id: str):
+    """(chunks, images, complete): complete is False when a branch timed out"""
+    with metrics.timed("query.retrieval"):
+        (retrieved_chunks, text_complete), (retrieved_images, images_complete) = await asyncio.gather(
+            _branch("text", _text_chunks_async(question, session_id), TEXT_RETRIEVAL_TIMEOUT, _load_text_models),
+            _branch("image", retrieve_images_async(question), IMAGE_RETRIEVAL_TIMEOUT, load_clip_text_model),
+        )
+    return retrieved_chunks, retrieved_images, text_complete and images_complete
+
+
+async def _text_chunks_async(question: str, session_id: str):
+    if not RERANK_ENABLED:
+        return await retrieve_chunks_async(question, top_k=TOP_K, filter={"session_id": session_id})
+
+    # Reranking runs inside the text branch, overlapping with image retrieval
+    candidates = await retrieve_chunks_async(
+        question, top_k=RERANK_CANDIDATES, filter={"session_id": session_id}
+    )
+    with metrics.timed("query.rerank"):
+        return await rerank_async(question, candidates, RERANK_TOP_N)
+
+
+def _load_text_models():
+    load_query_model()
+    if RERANK_ENABLED:
+        load_reranker()
+
+
+async def _branch(name: str, retrieval, timeout: float, load=None):
+    """
+    (results, completed): a branch that times out yields no results.
+    load() (off the event loop; a no-op while the models are resident)
+    brings the branch's models in before its deadline starts, so a cold
+    load or a reload after eviction never counts against it. On timeout the retrieval keeps running
+    (shielded): it is shared work, e.g. a micro-batcher future other
+    queries wait on, and its embedding still lands in the cache.
+    """
+    if load is not None:
+        await asyncio.get_running_loop().run_in_executor(None, load)
+
+    task = asyncio.ensure_future(retrieval)
+    try:
+        with metrics.timed(f"query.retrieve_{name}"):
+            return await asyncio.wait_for(asyncio.shield(task), timeout), True
+    except asyncio.TimeoutError:
+        task.add_done_callback(_consume_result)
+        metrics.incr(f"query.retrieve_{name}_timeout")
+        print(f"[INFO] {name} retrieval exceeded {timeout}s, answering without it")
+        return [], False
+
+
+def _consume_result(task: asyncio.Task):
+    # Nobody awaits a timed-out branch; retrieve its error so it is not reported as unhandled
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[ERROR] Timed-out retrieval failed later: {task.exception()}")
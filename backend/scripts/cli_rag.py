@@ -106,7 +106,8 @@ def main():
                     img["source"],
                     query
                 )
-                image_explanations.append(explanation)
+                if explanation:
+                    image_explanations.append(explanation)
 
             if image_explanations:
                 retrieved_chunks.append({
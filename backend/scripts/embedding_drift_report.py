@@ -0,0 +1,122 @@
+"""
+Accuracy drift and throughput of the ONNX embedding backends vs. torch fp32
+
+Texts come from --texts (one per line) or, when omitted, from the chunks in
+the persisted lexical indexes under LEXICAL_INDEX_DIR (our own data),
+falling back to a few built-in sentences. For each backend it reports the
+cosine to the fp32 embedding of the same text, how many of each text's
+nearest neighbours are unchanged, and texts/second.
+Exits with status 1 when any cosine falls below --min-cosine.
+
+    python scripts/embedding_drift_report.py --backends onnx onnx-int8 --min-cosine 0.99
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.embeddings.embedder import encode_texts, EMBEDDING_BACKENDS
+from app.core.embeddings.onnx_embedder import ONNX_MODEL_DIR, FP32_FILE, INT8_FILE
+from app.core.vectorstore.lexical_index import LEXICAL_INDEX_DIR
+
+SAMPLE_TEXTS = [
+    "Retrieval-augmented generation grounds answers in retrieved documents.",
+    "The invoice total was 1,284.50 EUR, due on 2024-03-31.",
+    "HNSW builds a layered proximity graph for approximate nearest neighbour search.",
+    "Error E-1042: connection to the vector index timed out after 30 s.",
+    "A cat sleeps on a sunny windowsill next to a potted plant.",
+    "Quarterly revenue grew 12% year over year, driven by subscriptions.",
+    "Dynamic quantization stores weights as int8 and quantizes activations at runtime.",
+    "The patient was prescribed 500 mg of amoxicillin three times daily.",
+    "Figure 3 compares latency of the exact and approximate indexes.",
+    "CLIP maps images and text into a shared embedding space.",
+]
+
+
+def load_texts(args) -> list:
+    if args.texts:
+        with open(args.texts, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+        print(f"[INFO] Using {len(texts)} texts from {args.texts}")
+        return texts[:args.limit]
+
+    texts = []
+    for path in glob.glob(os.path.join(LEXICAL_INDEX_DIR, "*", "meta.json")):
+        with open(path, encoding="utf-8") as f:
+            texts.extend(m.get("text", "") for m in json.load(f)["metadata"])
+        if len(texts) >= args.limit:
+            break
+    texts = [t for t in texts if t.strip()][:args.limit]
+    if texts:
+        print(f"[INFO] Using {len(texts)} indexed chunks from {LEXICAL_INDEX_DIR}")
+        return texts
+
+    print("[INFO] No texts given and no indexed chunks found; using built-in samples")
+    return SAMPLE_TEXTS
+
+
+def timed_encode(texts, backend, repeat):
+    encode_texts(texts[:8], backend=backend)  # load + warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        vectors = encode_texts(texts, backend=backend)
+    return vectors, len(texts) * repeat / (time.perf_counter() - start)
+
+
+def neighbours(vectors, k):
+    similarities = vectors @ vectors.T
+    np.fill_diagonal(similarities, -np.inf)
+    return np.argsort(-similarities, axis=1)[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["onnx", "onnx-int8"],
+                        choices=[b for b in EMBEDDING_BACKENDS if b != "torch"])
+    parser.add_argument("--texts", help="file with one text per line")
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args()
+
+    texts = load_texts(args)
+    k = min(args.top_k, len(texts) - 1)
+
+    reference, reference_rate = timed_encode(texts, "torch", args.repeat)
+    reference_neighbours = neighbours(reference, k) if k > 0 else None
+
+    print(f"\n{len(texts)} texts, neighbour agreement @{k}")
+    print(f"{'backend':>10} {'mean cos':>9} {'min cos':>9} {'nn agree':>9} {'texts/s':>9} {'speedup':>8} {'size MB':>8}")
+    print(f"{'torch':>10} {1.0:>9.5f} {1.0:>9.5f} {1.0:>9.3f} {reference_rate:>9.1f} {1.0:>7.2f}x {'-':>8}")
+
+    failed = False
+    for backend in args.backends:
+        vectors, rate = timed_encode(texts, backend, args.repeat)
+        cosines = (vectors * reference).sum(axis=1)
+        agreement = 1.0
+        if reference_neighbours is not None:
+            found = neighbours(vectors, k)
+            agreement = np.mean([
+                len(set(a) & set(b)) / k for a, b in zip(found, reference_neighbours)
+            ])
+        model_file = os.path.join(ONNX_MODEL_DIR, INT8_FILE if backend == "onnx-int8" else FP32_FILE)
+        size_mb = os.path.getsize(model_file) / 1024 / 1024
+        print(
+            f"{backend:>10} {cosines.mean():>9.5f} {cosines.min():>9.5f} {agreement:>9.3f} "
+            f"{rate:>9.1f} {rate / reference_rate:>7.2f}x {size_mb:>8.1f}"
+        )
+        if cosines.min() < args.min_cosine:
+            failed = True
+            print(f"[ERROR] {backend}: min cosine {cosines.min():.5f} < {args.min_cosine}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
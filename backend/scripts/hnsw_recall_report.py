@@ -0,0 +1,96 @@
+"""
+Recall-vs-latency report for the HNSW index against exact search
+
+Uses the persisted index under HNSW_INDEX_DIR when it exists (our own data),
+otherwise a synthetic corpus. Queries are perturbed copies of stored vectors.
+
+    python scripts/hnsw_recall_report.py --index multimodal-documents --ef 16 32 64 128 256
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.vectorstore.hnsw_index import HnswIndex, HNSW_INDEX_DIR
+from app.core.vectorstore.local_index import LocalIndex
+
+
+def load_or_build(args):
+    path = os.path.join(HNSW_INDEX_DIR, args.index)
+    if os.path.exists(os.path.join(path, "meta.json")):
+        import json
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            dimension = json.load(f)["dimension"]
+        index = HnswIndex(args.index, dimension, path=path)
+        ids, vectors = index.all_items()
+        print(f"[INFO] Using persisted index '{args.index}': {len(ids)} vectors, dim={dimension}")
+        return index, ids, vectors
+
+    print(f"[INFO] No persisted index at {path}; using {args.synthetic} synthetic vectors")
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(args.synthetic, args.dim)).astype(np.float32)
+    ids = [f"syn_{i}" for i in range(len(vectors))]
+    index = HnswIndex("synthetic", args.dim, M=args.M, initial_capacity=len(vectors))
+    start = time.perf_counter()
+    for i in range(0, len(vectors), 10000):
+        index.upsert(list(zip(ids[i:i + 10000], vectors[i:i + 10000])))
+    print(f"[INFO] Built graph in {time.perf_counter() - start:.1f}s")
+    return index, ids, vectors
+
+
+def percentile(samples, p):
+    return float(np.percentile(np.asarray(samples) * 1000, p))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", default="multimodal-documents")
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.1)
+    parser.add_argument("--synthetic", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--M", type=int, default=16)
+    args = parser.parse_args()
+
+    index, ids, vectors = load_or_build(args)
+    if len(ids) == 0:
+        print("[ERROR] Index is empty")
+        return
+
+    exact = LocalIndex("exact", vectors.shape[1], initial_capacity=len(ids))
+    exact.upsert(list(zip(ids, vectors)))
+
+    rng = np.random.default_rng(1)
+    picks = rng.choice(len(ids), size=min(args.queries, len(ids)), replace=False)
+    queries = vectors[picks] + rng.normal(scale=args.noise, size=(len(picks), vectors.shape[1])).astype(np.float32)
+
+    truth, exact_times = [], []
+    for q in queries:
+        start = time.perf_counter()
+        result = exact.query(vector=q, top_k=args.top_k)
+        exact_times.append(time.perf_counter() - start)
+        truth.append({m["id"] for m in result["matches"]})
+
+    print(f"\nrecall@{args.top_k} over {len(queries)} queries ({len(ids)} vectors)")
+    print(f"{'search':>10} {'recall':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    print(f"{'exact':>10} {1.0:>8.3f} {percentile(exact_times, 50):>8.3f} {percentile(exact_times, 95):>8.3f}")
+
+    for ef in args.ef:
+        index.set_ef(ef)
+        hits, times = 0, []
+        for q, expected in zip(queries, truth):
+            start = time.perf_counter()
+            result = index.query(vector=q, top_k=args.top_k)
+            times.append(time.perf_counter() - start)
+            hits += len(expected & {m["id"] for m in result["matches"]})
+        recall = hits / (len(queries) * args.top_k)
+        print(f"{'ef=' + str(ef):>10} {recall:>8.3f} {percentile(times, 50):>8.3f} {percentile(times, 95):>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
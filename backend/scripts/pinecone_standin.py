@@ -0,0 +1,136 @@
+"""
+Local stand-in for the Pinecone REST API, backed by LocalIndex
+
+Serves the control-plane calls init_index makes (has/create/describe index)
+and the data-plane calls used by the vector store (upsert/query/fetch/delete),
+so the Pinecone code path can be exercised without the managed service.
+An optional artificial delay emulates the network round trip.
+
+    uvicorn scripts.pinecone_standin:app --port 5080
+    LATENCY_MS=20 uvicorn scripts.pinecone_standin:app --port 5080
+
+Point the backend at it with:
+    VECTOR_BACKEND=pinecone PINECONE_HOST=http://127.0.0.1:5080 PINECONE_API_KEY=standin
+"""
+import os
+import sys
+import asyncio
+from typing import List
+
+from fastapi import FastAPI, HTTPException, Request, Query
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.vectorstore.local_index import LocalIndex
+
+LATENCY_MS = float(os.getenv("LATENCY_MS", "0"))
+
+app = FastAPI(title="Pinecone stand-in")
+_indexes = {}
+
+
+async def _network_delay():
+    if LATENCY_MS:
+        await asyncio.sleep(LATENCY_MS / 1000)
+
+
+def _index_model(request: Request, index: LocalIndex):
+    base = str(request.base_url).rstrip("/")
+    return {
+        "name": index.name,
+        "dimension": index.dimension,
+        "metric": "cosine",
+        "host": f"{base}/data/{index.name}",
+        "spec": {"serverless": {"cloud": "aws", "region": "local"}},
+        "status": {"ready": True, "state": "Ready"},
+        "vector_type": "dense",
+        "deletion_protection": "disabled",
+        "tags": {},
+    }
+
+
+def _get_index(name):
+    index = _indexes.get(name)
+    if index is None:
+        raise HTTPException(status_code=404, detail={"error": {"code": "NOT_FOUND", "message": name}})
+    return index
+
+
+# -------------------------------------------------
+# CONTROL PLANE
+# -------------------------------------------------
+@app.get("/indexes")
+async def list_indexes(request: Request):
+    await _network_delay()
+    return {"indexes": [_index_model(request, i) for i in _indexes.values()]}
+
+
+@app.post("/indexes", status_code=201)
+async def create_index(request: Request):
+    await _network_delay()
+    body = await request.json()
+    name = body["name"]
+    if name in _indexes:
+        raise HTTPException(status_code=409, detail={"error": {"code": "ALREADY_EXISTS", "message": name}})
+    _indexes[name] = LocalIndex(name, body["dimension"])
+    return _index_model(request, _indexes[name])
+
+
+@app.get("/indexes/{name}")
+async def describe_index(name: str, request: Request):
+    await _network_delay()
+    return _index_model(request, _get_index(name))
+
+
+# -------------------------------------------------
+# DATA PLANE
+# -------------------------------------------------
+@app.post("/data/{name}/vectors/upsert")
+async def upsert(name: str, request: Request):
+    await _network_delay()
+    body = await request.json()
+    result = _get_index(name).upsert(body.get("vectors", []))
+    return {"upsertedCount": result["upserted_count"]}
+
+
+@app.post("/data/{name}/query")
+async def query(name: str, request: Request):
+    await _network_delay()
+    body = await request.json()
+    result = _get_index(name).query(
+        vector=body.get("vector"),
+        id=body.get("id"),
+        top_k=body.get("topK", 10),
+        include_metadata=body.get("includeMetadata", False),
+        include_values=body.get("includeValues", False),
+        filter=body.get("filter"),
+    )
+    return {"matches": result["matches"], "namespace": body.get("namespace", "")}
+
+
+@app.get("/data/{name}/vectors/fetch")
+async def fetch(name: str, ids: List[str] = Query(default=[])):
+    await _network_delay()
+    return _get_index(name).fetch(ids)
+
+
+@app.post("/data/{name}/vectors/delete")
+async def delete(name: str, request: Request):
+    await _network_delay()
+    body = await request.json()
+    return _get_index(name).delete(
+        ids=body.get("ids"),
+        delete_all=body.get("deleteAll", False),
+        filter=body.get("filter"),
+    )
+
+
+@app.post("/data/{name}/describe_index_stats")
+async def describe_index_stats(name: str):
+    await _network_delay()
+    stats = _get_index(name).describe_index_stats()
+    return {
+        "dimension": stats["dimension"],
+        "totalVectorCount": stats["total_vector_count"],
+        "namespaces": {"": {"vectorCount": stats["total_vector_count"]}},
+    }
@@ -0,0 +1,142 @@
+"""
+Import-time profile of the API (python -X importtime) with startup checks
+
+Reports where the import time of --module goes, per top-level package and
+per app module (cumulative, i.e. including everything it pulls in). Fails
+(exit status 1) when:
+  - the median import time over --runs exceeds --budget-ms
+  - any --forbid package is imported (model / SDK dependencies that must
+    load on first use, not at startup)
+  - with --serve: uvicorn takes longer than --health-budget-ms from process
+    start until /health answers
+
+    python scripts/profile_imports.py --serve
+    VECTOR_BACKEND=hnsw python scripts/profile_imports.py --budget-ms 800 --top 30
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import subprocess
+import statistics
+import urllib.request
+from collections import defaultdict
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HEAVY_PACKAGES = [
+    "torch", "transformers", "sentence_transformers", "langchain_huggingface", "langchain_community",
+    "easyocr", "groq", "pinecone", "onnxruntime", "tokenizers", "hnswlib",
+]
+
+
+def import_times(statement: str) -> list:
+    """[(module, self_us, cumulative_us, depth)] in the order -X importtime reports them"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"[ERROR] '{statement}' failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def profile(module: str) -> list:
+    """Entries for what `import module` adds on top of interpreter startup"""
+    startup = {name for name, *_ in import_times("pass")}
+    return [e for e in import_times(f"import {module}") if e[0] not in startup]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_health(module: str, timeout: float = 60.0) -> float:
+    """Seconds from spawning uvicorn until GET /health returns 200"""
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{module}:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                sys.exit(f"[ERROR] uvicorn exited with status {server.returncode}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        sys.exit(f"[ERROR] /health did not answer within {timeout:.0f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=1000)
+    parser.add_argument("--forbid", nargs="*", default=HEAVY_PACKAGES)
+    parser.add_argument("--serve", action="store_true", help="also time uvicorn startup until /health answers")
+    parser.add_argument("--health-budget-ms", type=float, default=1000)
+    args = parser.parse_args()
+
+    runs = [profile(args.module) for _ in range(args.runs)]
+    totals = [next(c for name, _, c, _ in run if name == args.module) / 1000 for run in runs]
+    entries = runs[totals.index(sorted(totals)[len(totals) // 2])]
+    total_ms = statistics.median(totals)
+
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in entries:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"\nimport {args.module}: {total_ms:.0f} ms (median of {args.runs}), {len(entries)} modules")
+    print(f"\n{'package':<28} {'self ms':>8} {'share':>6}")
+    for package, self_us in sorted(by_package.items(), key=lambda p: -p[1])[:args.top]:
+        print(f"{package:<28} {self_us / 1000:>8.1f} {self_us / 1000 / total_ms:>6.0%}")
+
+    print(f"\n{'app module (cumulative)':<44} {'ms':>8}")
+    app_modules = sorted((e for e in entries if e[0].startswith("app.")), key=lambda e: -e[2])
+    for name, _, cumulative_us, _ in app_modules[:args.top]:
+        print(f"{name:<44} {cumulative_us / 1000:>8.1f}")
+
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(f"import {args.module} took {total_ms:.0f} ms > {args.budget_ms:.0f} ms")
+    imported = {name for name, *_ in entries}
+    for package in args.forbid:
+        if package in imported:
+            failures.append(f"{package} is imported at startup")
+
+    if args.serve:
+        health_ms = time_to_health(args.module) * 1000
+        print(f"\nuvicorn start → /health 200: {health_ms:.0f} ms")
+        if health_ms > args.health_budget_ms:
+            failures.append(f"/health answered after {health_ms:.0f} ms > {args.health_budget_ms:.0f} ms")
+
+    print()
+    for failure in failures:
+        print(f"[ERROR] {failure}")
+    if not failures:
+        print("[INFO] Startup checks passed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Speed, memory and output similarity of CLIP / BLIP precision variants vs. fp32
+
+Each (model, precision) pair runs in a fresh process, so its RSS is that
+variant alone. Images come from --images (a directory, searched
+recursively) or are synthesized. CLIP variants are compared by cosine
+between image embeddings. BLIP variants are compared by exact caption
+matches and word overlap with the fp32 captions.
+
+    python scripts/vision_precision_benchmark.py --images data/uploads --precisions fp32 bf16 int8
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import multiprocessing
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.loaders.image_loader import load_images
+from app.core.utils.precision import PRECISIONS
+from app.core.utils.process_memory import rss_bytes, peak_rss_bytes
+
+MB = 1024 * 1024
+
+
+def synthetic_images(count: int, directory: str) -> list:
+    from PIL import Image, ImageDraw
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(count):
+        image = Image.new("RGB", (640, 480), tuple(int(c) for c in rng.integers(0, 255, 3)))
+        draw = ImageDraw.Draw(image)
+        for _ in range(6):
+            x0, y0 = rng.integers(0, 400, 2)
+            box = [int(x0), int(y0), int(x0 + rng.integers(40, 240)), int(y0 + rng.integers(40, 240))]
+            fill = tuple(int(c) for c in rng.integers(0, 255, 3))
+            (draw.ellipse if i % 2 else draw.rectangle)(box, fill=fill)
+        path = os.path.join(directory, f"synthetic_{i}.png")
+        image.save(path)
+        paths.append(path)
+    return paths
+
+
+def run_variant(model_name: str, precision: str, paths: list, repeat: int) -> dict:
+    """Runs in a child process: load, warm up, then time `repeat` passes over all images"""
+    baseline = rss_bytes()
+    start = time.perf_counter()
+    if model_name == "clip":
+        from app.core.embeddings.clip_embedder import build_clip_model, images_features
+        model, processor = build_clip_model(precision)
+        run = lambda: images_features(model, processor, paths)
+    else:
+        from app.core.embeddings.blip_captioner import build_blip_model, captions_for
+        processor, model = build_blip_model(precision)
+        run = lambda: captions_for(processor, model, paths)
+    load_seconds = time.perf_counter() - start
+    loaded = rss_bytes()
+
+    outputs = run()  # warm-up; also the outputs compared against fp32
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "load_s": load_seconds,
+        "rss_mb": (loaded - baseline) / MB,
+        "peak_mb": peak_rss_bytes() / MB,
+        "ms_per_image": elapsed * 1000 / (repeat * len(paths)),
+        "outputs": [np.asarray(o).tolist() for o in outputs] if model_name == "clip" else outputs,
+    }
+
+
+def similarity(model_name: str, outputs, reference) -> str:
+    if model_name == "clip":
+        a, b = np.asarray(outputs), np.asarray(reference)
+        cosines = (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+        return f"cos mean {cosines.mean():.4f} min {cosines.min():.4f}"
+
+    exact = np.mean([o == r for o, r in zip(outputs, reference)])
+    overlaps = []
+    for o, r in zip(outputs, reference):
+        ow, rw = set(o.lower().split()), set(r.lower().split())
+        overlaps.append(len(ow & rw) / len(ow | rw) if ow | rw else 1.0)
+    return f"exact {exact:.2f} words {np.mean(overlaps):.3f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", default=["clip", "blip"], choices=["clip", "blip"])
+    parser.add_argument("--precisions", nargs="+", default=list(PRECISIONS), choices=PRECISIONS)
+    parser.add_argument("--images", help="directory of images (default: synthetic)")
+    parser.add_argument("--limit", type=int, default=16)
+    parser.add_argument("--synthetic", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    paths = [img["image_path"] for img in load_images(args.images)][:args.limit] if args.images else []
+    if paths:
+        print(f"[INFO] Using {len(paths)} images from {args.images}")
+    else:
+        paths = synthetic_images(args.synthetic, tmpdir.name)
+        print(f"[INFO] Using {len(paths)} synthetic images")
+
+    # fp32 always runs first: it is the reference for speed and similarity
+    precisions = ["fp32"] + [p for p in args.precisions if p != "fp32"]
+    context = multiprocessing.get_context("spawn")
+
+    print(f"\n{'model':>6} {'precision':>9} {'load s':>7} {'RSS MB':>7} {'peak MB':>8} "
+          f"{'ms/img':>8} {'speedup':>8}  similarity to fp32")
+    for model_name in args.models:
+        reference = None
+        for precision in precisions:
+            with context.Pool(1) as pool:
+                result = pool.apply(run_variant, (model_name, precision, paths, args.repeat))
+            if reference is None:
+                reference = result
+            print(
+                f"{model_name:>6} {precision:>9} {result['load_s']:>7.1f} {result['rss_mb']:>7.0f} "
+                f"{result['peak_mb']:>8.0f} {result['ms_per_image']:>8.1f} "
+                f"{reference['ms_per_image'] / result['ms_per_image']:>7.2f}x  "
+                f"{similarity(model_name, result['outputs'], reference['outputs'])}"
+            )
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
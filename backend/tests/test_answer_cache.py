@@ -0,0 +1,65 @@
+"""
+Answer cache: exact / similar hits, TTL, session invalidation and versions
+    python -m pytest -q tests/test_answer_cache.py
+"""
+import time
+
+from app.core.utils.query_cache import AnswerCache
+
+
+def make_cache(ttl=60.0):
+    return AnswerCache(max_entries=10, ttl=ttl, similarity=0.95)
+
+
+def test_exact_and_similar_questions_hit():
+    cache = make_cache()
+    cache.set("What is the total?", "s1", "42", embedding=[1.0, 0.0])
+
+    assert cache.get("  what is the TOTAL? ", "s1") == "42"
+    assert cache.get("total amount?", "s1", embed=lambda q: [0.99, 0.05]) == "42"
+    assert cache.get("total amount?", "s1", embed=lambda q: [0.0, 1.0]) is None
+    assert cache.get("What is the total?", "s2") is None
+
+
+def test_entries_expire_after_ttl():
+    cache = make_cache(ttl=0.05)
+    cache.set("q", "s1", "a")
+    time.sleep(0.1)
+    assert cache.get("q", "s1") is None
+
+
+def test_lru_bound():
+    cache = AnswerCache(max_entries=2, ttl=60, similarity=0.95)
+    for question in ["a", "b", "c"]:
+        cache.set(question, "s1", question.upper())
+    assert cache.get("a", "s1") is None
+    assert cache.get("c", "s1") == "C"
+
+
+def test_invalidate_session_only_drops_that_session():
+    cache = make_cache()
+    cache.set("q", "s1", "a1")
+    cache.set("q", "s2", "a2")
+    assert cache.invalidate_session("s1") == 1
+    assert cache.get("q", "s1") is None
+    assert cache.get("q", "s2") == "a2"
+
+
+def test_answer_built_during_ingestion_is_not_stored():
+    cache = make_cache()
+    cache.set("q", "s1", "old")
+
+    before = cache.version("s1")           # query starts before the ingestion
+    cache.begin_update("s1")
+    assert cache.get("q", "s1") is None     # dropped at ingestion start
+    during = cache.version("s1")            # query starts mid-ingestion
+    assert not cache.set("q", "s1", "partial", version=during)
+    cache.end_update("s1")
+
+    assert not cache.set("q", "s1", "outdated", version=before)
+    assert not cache.set("q", "s1", "partial", version=during)
+    assert cache.get("q", "s1") is None
+
+    after = cache.version("s1")
+    assert cache.set("q", "s1", "fresh", version=after)
+    assert cache.get("q", "s1") == "fresh"
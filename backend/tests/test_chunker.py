@@ -0,0 +1,62 @@
+"""
+TokenChunker: token windows, overlap, word boundaries, page spans
+    python -m pytest -q tests/test_chunker.py
+The encodings below stand in for the fast tokenizer's: one token per
+character pair of each word, so words can span several tokens.
+"""
+import re
+
+import pytest
+
+from app.core.preprocess.chunker import TokenChunker, MAX_CHUNK_TOKENS
+
+
+class Encoding:
+    def __init__(self, text: str):
+        self.offsets, self.word_ids = [], []
+        for word_id, match in enumerate(re.finditer(r"\S+", text)):
+            for start in range(match.start(), match.end(), 2):
+                self.offsets.append((start, min(start + 2, match.end())))
+                self.word_ids.append(word_id)
+
+
+def chunk(pages, size, overlap):
+    chunker = TokenChunker(size, overlap)
+    chunks = []
+    for page_no, text in enumerate(pages):
+        chunks.extend(chunker.feed(page_no, text, Encoding(text)))
+    return chunks + chunker.flush()
+
+
+def test_chunks_respect_size_and_overlap():
+    text = " ".join(f"w{i}" for i in range(100))  # one token per word
+    chunks = chunk([text], 10, 3)
+
+    assert all(c["token_count"] <= 10 for c in chunks)
+    assert chunks[0]["text"] == " ".join(f"w{i}" for i in range(10))
+    assert chunks[1]["text"].startswith("w7 ")  # 3 tokens of overlap
+    assert chunks[-1]["text"].endswith("w99")
+
+
+def test_cuts_do_not_split_words():
+    text = "ab " + "cdefgh " * 20  # "cdefgh" is 3 tokens
+    words = set(text.split())
+    for c in chunk([text], 10, 2):
+        assert set(c["text"].split()) <= words
+
+
+def test_chunks_span_pages_with_positions():
+    pages = ["a1 a2 a3", "b1 b2 b3"]
+    chunks = chunk(pages, 4, 0)
+
+    assert chunks[0]["text"] == "a1 a2 a3 b1"
+    assert (chunks[0]["page_start"], chunks[0]["page_end"]) == (0, 1)
+    assert (chunks[1]["page_start"], chunks[1]["char_start"]) == (1, 3)
+    assert chunks[1]["text"] == "b2 b3"
+
+
+def test_size_over_model_input_is_rejected():
+    with pytest.raises(ValueError):
+        TokenChunker(MAX_CHUNK_TOKENS + 1, 10)
+    with pytest.raises(ValueError):
+        TokenChunker(10, 10)
@@ -0,0 +1,73 @@
+"""
+Context assembler: score filter, dedupe, MMR order, overlap trim, token budget
+    python -m pytest -q tests/test_context_assembler.py
+"""
+import pytest
+
+from app.core.generator import context_assembler
+from app.core.generator.context_assembler import assemble_context
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    # The real tokenizer is downloaded on first use; one token per word is enough here
+    monkeypatch.setattr(context_assembler, "count_tokens", lambda text: len(text.split()))
+
+
+def _chunk(text, score, **metadata):
+    return {"text": text, "score": score, "metadata": metadata}
+
+
+def test_low_scores_and_duplicates_are_dropped():
+    chunks, stats = assemble_context([
+        _chunk("alpha beta gamma", 0.9),
+        _chunk("Alpha  beta gamma ", 0.8),               # same text, different spacing and case
+        _chunk("weak match", 0.1),
+        {**_chunk("exact term hit", 0.05), "lexical_score": 3.2},  # BM25 hits skip the cosine floor
+        _chunk("   ", 0.9),
+    ], token_budget=100, min_score=0.2, mmr_lambda=1.0)
+
+    assert [c["text"] for c in chunks] == ["alpha beta gamma", "exact term hit"]
+    assert stats["dropped_low_score"] == 1 and stats["duplicates"] == 1
+    assert stats["tokens_in"] == 3 + 3 + 2 + 3
+    assert stats["tokens_out"] == 6 and stats["tokens_saved"] == 5
+
+
+def test_mmr_prefers_a_diverse_chunk_over_a_near_duplicate():
+    retrieved = [
+        _chunk("the cache stores query embeddings in memory", 0.90),
+        _chunk("the cache stores query embeddings in process memory", 0.88),
+        _chunk("segments are memory mapped from disk at startup", 0.70),
+    ]
+    relevance_only, _ = assemble_context(retrieved, token_budget=20, min_score=0, mmr_lambda=1.0)
+    diverse, _ = assemble_context(retrieved, token_budget=20, min_score=0, mmr_lambda=0.5)
+
+    assert relevance_only[1]["score"] == 0.88
+    assert diverse[1]["score"] == 0.70
+
+
+def test_shared_overlap_between_neighbours_is_sent_once():
+    shared = "the splitter repeats this sentence across chunks"
+    first = f"Intro words come first. {shared}"
+    second = f"{shared} and then the next chunk continues."
+    chunks, stats = assemble_context([
+        _chunk(first, 0.9, source="a.pdf", chunk_id=3),
+        _chunk(second, 0.8, source="a.pdf", chunk_id=4),
+        _chunk(second, 0.7, source="b.pdf", chunk_id=4),  # other document: duplicate text, dropped
+    ], token_budget=100, min_score=0, mmr_lambda=1.0)
+
+    assert chunks[0]["text"] == first
+    assert chunks[1]["text"] == "and then the next chunk continues."
+    assert chunks[1]["metadata"]["chunk_id"] == 4
+    assert stats["tokens_out"] == len(first.split()) + 6
+
+
+def test_budget_skips_chunks_that_do_not_fit():
+    chunks, stats = assemble_context([
+        _chunk("one two three four", 0.9, token_count=4),
+        _chunk("this chunk is far too long to fit", 0.8, token_count=8),
+        _chunk("short one", 0.7, token_count=2),
+    ], token_budget=7, min_score=0, mmr_lambda=1.0)
+
+    assert [c["text"] for c in chunks] == ["one two three four", "short one"]
+    assert stats["selected"] == 2 and stats["tokens_out"] == 6
@@ -0,0 +1,68 @@
+"""
+Embedding cache: only unseen chunks reach the model; DiskCache evicts LRU first
+    python -m pytest -q tests/test_embedding_cache.py
+"""
+import itertools
+import numpy as np
+
+from app.core.utils import disk_cache, embedding_cache
+from app.core.utils.disk_cache import DiskCache
+
+
+class _Clock:
+    """Strictly increasing time.time() so LRU order does not depend on clock resolution"""
+
+    def __init__(self):
+        self._ticks = itertools.count(1)
+
+    def time(self):
+        return float(next(self._ticks))
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(disk_cache, "time", _Clock())
+    cache = DiskCache(str(tmp_path / "cache.db"), max_bytes=30, name="test_lru")
+    cache.set("a", b"x" * 10)
+    cache.set("b", b"x" * 10)
+    cache.set("c", b"x" * 10)
+    assert cache.get("a") is not None  # a is now the most recently used
+
+    cache.set("d", b"x" * 10)
+    assert cache.get("b") is None
+    assert set(cache.get_many(["a", "c", "d"])) == {"a", "c", "d"}
+
+    cache.set("a", b"x" * 5)  # replacing an entry frees its old size
+    stats = cache.stats()
+    assert stats["bytes"] == 25 and stats["entries"] == 3
+
+    cache.set("huge", b"x" * 31)  # larger than the whole cache: never stored
+    assert cache.get("huge") is None and cache.stats()["entries"] == 3
+
+
+def test_disk_cache_survives_reopen(tmp_path):
+    path = str(tmp_path / "cache.db")
+    DiskCache(path, max_bytes=100, name="test_reopen").set_many([("k1", b"one"), ("k2", b"two")])
+    reopened = DiskCache(path, max_bytes=100, name="test_reopen")
+    assert reopened.get("k2") == b"two"
+    assert reopened.stats()["bytes"] == 6
+
+
+def test_cached_embed_only_computes_misses(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path / "embeddings.db"), max_bytes=1 << 20, name="test_embeddings")
+    monkeypatch.setattr(embedding_cache, "_cache", cache)
+    calls = []
+
+    def embed(texts):
+        calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+    first = embedding_cache.cached_embed(["alpha", "beta", "alpha"], "model-a", embed)
+    assert calls == [["alpha", "beta"]]  # duplicates within one call are embedded once
+    assert [v.tolist() for v in first] == [[5.0, 1.0], [4.0, 1.0], [5.0, 1.0]]
+
+    second = embedding_cache.cached_embed(["beta  ", "gamma", "alpha"], "model-a", embed)
+    assert calls[1] == ["gamma"]  # whitespace-normalized text hits the cache
+    assert np.allclose(second[0], [4.0, 1.0])
+
+    embedding_cache.cached_embed(["alpha"], "model-b", embed)
+    assert calls[2] == ["alpha"]  # keys are per model
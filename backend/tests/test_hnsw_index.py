@@ -0,0 +1,60 @@
+"""
+HNSW index: selective filters keep every match, values round-trip
+    python -m pytest -q tests/test_hnsw_index.py
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("hnswlib")
+
+from app.core.vectorstore import hnsw_index
+from app.core.vectorstore.hnsw_index import HnswIndex
+
+
+def build_index(count=2000, dimension=16, tagged=7):
+    rng = np.random.default_rng(0)
+    index = HnswIndex("test", dimension, M=4, ef_construction=16, ef_search=4)
+    index.upsert([
+        {"id": f"v{i}", "values": rng.normal(size=dimension).tolist(), "metadata": {"tag": "keep" if i < tagged else "skip"}}
+        for i in range(count)
+    ])
+    return index, rng
+
+
+@pytest.mark.parametrize("filter", [
+    {"tag": "keep"},                       # postings candidates, graph search
+    {"tag": {"$ne": "skip"}},              # no candidates: k > number of matches
+    {"$or": [{"tag": "keep"}, {"tag": "none"}]},
+])
+def test_selective_filter_on_graph_path_returns_every_match(monkeypatch, filter):
+    monkeypatch.setattr(hnsw_index, "EXACT_SEARCH_THRESHOLD", 0)  # force graph search
+    index, rng = build_index()
+
+    result = index.query(rng.normal(size=16).tolist(), top_k=10, filter=filter)
+    assert sorted(m["id"] for m in result["matches"]) == [f"v{i}" for i in range(7)]
+    scores = [m["score"] for m in result["matches"]]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_values_are_returned_as_upserted():
+    index = HnswIndex("test_values", 3)
+    index.upsert([{"id": "a", "values": [3.0, 0.0, 4.0]}])
+
+    assert np.allclose(index.fetch(["a"])["vectors"]["a"]["values"], [3.0, 0.0, 4.0])
+    match = index.query([1.0, 0.0, 0.0], top_k=1, include_values=True)["matches"][0]
+    assert np.allclose(match["values"], [3.0, 0.0, 4.0])
+
+
+def test_duplicate_id_in_one_upsert_keeps_only_the_last():
+    index = HnswIndex("test_duplicates", 3)
+    index.upsert([
+        {"id": "a", "values": [1.0, 0.0, 0.0], "metadata": {"version": 1}},
+        {"id": "a", "values": [0.0, 1.0, 0.0], "metadata": {"version": 2}},
+    ])
+    assert len(index) == 1
+
+    match = index.query([1.0, 0.0, 0.0], top_k=5, include_metadata=True)["matches"]
+    assert [(m["id"], m["metadata"]["version"]) for m in match] == [("a", 2)]
+
+    index.delete(ids=["a"])
+    assert index.query([1.0, 0.0, 0.0], top_k=5)["matches"] == []
@@ -0,0 +1,38 @@
+"""
+Ingestion job queue: a cancel racing the worker's claim is not lost
+    python -m pytest -q tests/test_job_queue.py
+"""
+import time
+
+from app.services.job_queue import JobQueue
+
+
+def wait_for_status(jobs, job_id, statuses, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = jobs.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job stayed {jobs.get(job_id)['status']}")
+
+
+def test_cancel_right_after_claim_stops_the_job(tmp_path):
+    ran = []
+    jobs = JobQueue(str(tmp_path / "jobs.db"), 1, lambda job, progress, cancel: ran.append(job["job_id"]))
+
+    claim = jobs._claim
+
+    def claim_then_cancel(job_id):
+        cancel = claim(job_id)
+        jobs.cancel(job_id)  # lands between the claim and the handler
+        return cancel
+
+    jobs._claim = claim_then_cancel
+    jobs.start()
+    try:
+        job = jobs.submit({"files": []})
+        assert wait_for_status(jobs, job["job_id"], {"cancelled", "succeeded", "failed"})["status"] == "cancelled"
+        assert ran == []
+    finally:
+        jobs.stop()
@@ -0,0 +1,61 @@
+"""
+Per-session lexical index registry: bounded, and not grown by queries
+    python -m pytest -q tests/test_lexical_index.py
+"""
+from app.core.vectorstore import lexical_index
+
+
+def test_unknown_sessions_are_not_created_on_search(tmp_path, monkeypatch):
+    monkeypatch.setattr(lexical_index, "LEXICAL_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(lexical_index, "_lexical_indexes", lexical_index.OrderedDict())
+
+    for i in range(100):
+        assert lexical_index.search_session(f"unknown-{i}", "invoice 42", 5) == []
+    assert len(lexical_index._lexical_indexes) == 0
+
+
+def test_registry_is_bounded_for_all_sessions(tmp_path, monkeypatch):
+    monkeypatch.setattr(lexical_index, "LEXICAL_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(lexical_index, "LEXICAL_MAX_SESSIONS", 3)
+    monkeypatch.setattr(lexical_index, "_lexical_indexes", lexical_index.OrderedDict())
+
+    # "a/b" is not a valid directory name, so that index lives in memory only
+    for session_id in ["s1", "a/b", "s2", "s3", "s4"]:
+        lexical_index.add_texts(
+            [f"{session_id}-0"], ["invoice 42 total"], [{"session_id": session_id, "text": "invoice 42 total"}]
+        )
+    assert list(lexical_index._lexical_indexes) == ["s2", "s3", "s4"]
+
+    # Evicted persistent indexes reload from disk on search
+    assert [hit["id"] for hit in lexical_index.search_session("s1", "invoice", 5)] == ["s1-0"]
+    assert lexical_index.search_session("a/b", "invoice", 5) == []
+
+
+def test_readded_chunk_replaces_its_postings():
+    index = lexical_index.LexicalIndex()
+    index.add(["c1", "c2"], ["alpha invoice", "beta receipt"], [{"text": "alpha invoice"}, {"text": "beta receipt"}])
+    index.search("alpha", 5)  # merge the first version
+    index.add(["c1"], ["gamma contract"], [{"text": "gamma contract"}])
+
+    assert index.search("alpha", 5) == []
+    assert [hit["id"] for hit in index.search("gamma", 5)] == ["c1"]
+    assert [hit["id"] for hit in index.search("beta", 5)] == ["c2"]
+    assert len(index) == 2
+
+    # Unchanged chunks are skipped on re-ingest
+    index.add(["c2"], ["beta receipt"], [{"text": "beta receipt"}])
+    assert len(index) == 2
+
+
+def test_index_with_writer_is_not_evicted(tmp_path, monkeypatch):
+    monkeypatch.setattr(lexical_index, "LEXICAL_INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(lexical_index, "LEXICAL_MAX_SESSIONS", 1)
+    monkeypatch.setattr(lexical_index, "_lexical_indexes", lexical_index.OrderedDict())
+
+    writing = lexical_index.get_lexical_index("s1", pin=True)
+    lexical_index.get_lexical_index("s2")  # over the bound, but s1 has a writer
+    writing.add(["s1-0"], ["late postings"], [{"text": "late postings"}])
+    lexical_index.release_lexical_index(writing)
+
+    assert lexical_index.get_lexical_index("s1") is writing
+    assert [hit["id"] for hit in lexical_index.search_session("s1", "late", 5)] == ["s1-0"]
@@ -0,0 +1,79 @@
+"""
+LocalIndex: metadata filters, deletes and stored values
+    python -m pytest -q tests/test_local_index.py
+"""
+import numpy as np
+
+from app.core.vectorstore.local_index import LocalIndex, matches_filter
+
+
+def _index():
+    index = LocalIndex("test", 3, initial_capacity=2)  # small capacity forces growth
+    index.upsert([
+        {"id": "a", "values": [1, 0, 0], "metadata": {"session_id": "s1", "page": 1}},
+        {"id": "b", "values": [0.9, 0.1, 0], "metadata": {"session_id": "s1", "page": 5, "type": "image"}},
+        ("c", [0, 1, 0], {"session_id": "s2", "page": 3}),
+        ("d", [0, 0, 2]),
+    ])
+    return index
+
+
+def _ids(index, **kwargs):
+    return {m["id"] for m in index.query([1, 0, 0], top_k=10, **kwargs)["matches"]}
+
+
+def test_matches_filter_operators():
+    meta = {"session_id": "s1", "page": 5, "tags": "x"}
+    assert matches_filter(meta, {"session_id": "s1"})
+    assert matches_filter(meta, {"page": {"$gte": 5, "$lt": 6}})
+    assert not matches_filter(meta, {"page": {"$gt": 5}})
+    assert matches_filter(meta, {"session_id": {"$in": ["s1", "s2"]}})
+    assert not matches_filter(meta, {"session_id": {"$nin": ["s1"]}})
+    assert matches_filter(meta, {"type": {"$exists": False}})
+    assert matches_filter(meta, {"$or": [{"page": 1}, {"tags": {"$ne": "y"}}]})
+    assert not matches_filter(meta, {"$and": [{"page": 5}, {"session_id": "s2"}]})
+
+
+def test_query_filters():
+    index = _index()
+    assert _ids(index) == {"a", "b", "c", "d"}
+    assert _ids(index, filter={"session_id": "s1"}) == {"a", "b"}
+    assert _ids(index, filter={"session_id": {"$in": ["s2"]}}) == {"c"}
+    assert _ids(index, filter={"session_id": {"$ne": "s1"}}) == {"c", "d"}
+    assert _ids(index, filter={"page": {"$gt": 2}}) == {"b", "c"}
+    assert _ids(index, filter={"type": {"$exists": True}}) == {"b"}
+    assert _ids(index, filter={"$or": [{"page": 1}, {"session_id": "s2"}]}) == {"a", "c"}
+    assert _ids(index, filter={"session_id": "missing"}) == set()
+
+
+def test_query_ranks_by_cosine_and_returns_original_values():
+    index = _index()
+    matches = index.query([1, 0, 0], top_k=2, include_values=True, include_metadata=True)["matches"]
+    assert [m["id"] for m in matches] == ["a", "b"]
+    assert np.allclose(matches[1]["values"], [0.9, 0.1, 0])
+    assert matches[1]["metadata"]["type"] == "image"
+    assert np.allclose(index.fetch(["d"])["vectors"]["d"]["values"], [0, 0, 2])
+
+
+def test_upsert_replaces_metadata_postings():
+    index = _index()
+    index.upsert([{"id": "a", "values": [1, 0, 0], "metadata": {"session_id": "s2"}}])
+    assert len(index) == 4
+    assert _ids(index, filter={"session_id": "s1"}) == {"b"}
+    assert _ids(index, filter={"session_id": "s2"}) == {"a", "c"}
+
+
+def test_delete_by_ids_filter_and_all():
+    index = _index()
+    index.delete(ids=["a", "missing"])
+    assert _ids(index) == {"b", "c", "d"}
+    assert _ids(index, filter={"session_id": "s1"}) == {"b"}  # moved rows keep their postings
+
+    index.delete(filter={"session_id": "s2"})
+    assert _ids(index) == {"b", "d"}
+    assert index.fetch(["b"])["vectors"]["b"]["metadata"]["page"] == 5
+
+    index.delete(delete_all=True)
+    assert len(index) == 0
+    assert index.query([1, 0, 0], top_k=5)["matches"] == []
+    assert index.describe_index_stats()["total_vector_count"] == 0
@@ -0,0 +1,59 @@
+"""
+MicroBatcher: cancelled callers must not break the worker thread
+    python -m pytest -q tests/test_micro_batcher.py
+"""
+import asyncio
+import threading
+
+from app.core.utils.micro_batcher import MicroBatcher
+
+
+def test_cancelled_future_does_not_stall_later_submits():
+    release = threading.Event()
+
+    def slow_double(items):
+        release.wait(5)
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher("test_cancel", slow_double, window_ms=1)
+    running = batcher.submit_future(1)  # occupies the worker until released
+    pending = batcher.submit_future(2)
+    assert pending.cancel()
+
+    release.set()
+    assert running.result(timeout=5) == 2
+    assert batcher.submit_future(3).result(timeout=5) == 6
+    assert batcher._worker.is_alive()
+
+
+def test_wait_for_timeout_then_next_query():
+    release = threading.Event()
+
+    def slow_double(items):
+        release.wait(5)
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher("test_wait_for", slow_double, window_ms=1)
+
+    async def scenario():
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(batcher.submit_future(1)), 0.05)
+        except asyncio.TimeoutError:
+            pass
+        release.set()
+        return await asyncio.wait_for(asyncio.wrap_future(batcher.submit_future(4)), 5)
+
+    assert asyncio.run(scenario()) == 8
+    assert batcher._worker.is_alive()
+
+
+def test_dead_worker_is_restarted():
+    batcher = MicroBatcher("test_restart", lambda items: [item + 1 for item in items], window_ms=1)
+    assert batcher.submit(1) == 2
+
+    batcher._worker.join(0)  # simulate a worker that died
+    batcher._worker = threading.Thread(target=lambda: None)
+    batcher._worker.start()
+    batcher._worker.join()
+
+    assert batcher.submit_future(5).result(timeout=5) == 6
@@ -0,0 +1,67 @@
+"""
+Model manager: per-model load locks, budget reservations
+    python -m pytest -q tests/test_model_manager.py
+"""
+import time
+import threading
+
+from app.core.model_manager import ModelManager, MB
+
+
+def test_slow_load_does_not_block_another_model():
+    manager = ModelManager()
+    started = threading.Event()
+
+    def slow_load():
+        started.set()
+        time.sleep(1.0)
+        return "llava"
+
+    manager.register("test-slow", slow_load)
+    manager.register("test-fast", lambda: "minilm")
+
+    thread = threading.Thread(target=manager.get, args=("test-slow",))
+    thread.start()
+    started.wait(5)
+
+    begin = time.perf_counter()
+    assert manager.get("test-fast") == "minilm"
+    assert time.perf_counter() - begin < 0.5
+    thread.join()
+    assert manager.get("test-slow") == "llava"
+
+
+def test_concurrent_loads_of_one_model_load_once():
+    manager = ModelManager()
+    loads = []
+
+    def load():
+        time.sleep(0.1)
+        loads.append(1)
+        return object()
+
+    manager.register("test-once", load)
+    threads = [threading.Thread(target=manager.get, args=("test-once",)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1
+
+
+def test_loading_model_reserves_budget():
+    manager = ModelManager(budget_bytes=1000 * MB)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_load():
+        started.set()
+        release.wait(5)
+        return "big"
+
+    manager.register("llava", slow_load)  # estimated 3600 MB, over budget on its own
+    thread = threading.Thread(target=manager.get, args=("llava",))
+    thread.start()
+    started.wait(5)
+    assert not manager.fits("ocr")  # the load in progress counts against the budget
+    release.set()
+    thread.join()
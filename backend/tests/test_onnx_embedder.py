@@ -0,0 +1,75 @@
+"""
+ONNX embedder: mean pooling over real tokens, L2 norm, input order kept across batches
+Runs a tiny hand-built graph (embedding lookup) instead of the exported MiniLM
+    python -m pytest -q tests/test_onnx_embedder.py
+"""
+import os
+
+import numpy as np
+import pytest
+
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+from onnx import TensorProto, helper, numpy_helper  # noqa: E402
+from tokenizers import Tokenizer, models, pre_tokenizers  # noqa: E402
+
+from app.core.embeddings import onnx_embedder  # noqa: E402
+from app.core.embeddings.onnx_embedder import OnnxEmbedder  # noqa: E402
+
+VOCAB = {"[PAD]": 0, "[UNK]": 1, "cats": 2, "dogs": 3, "like": 4, "fish": 5, "and": 6}
+DIM = 4
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    table = np.random.default_rng(0).normal(size=(len(VOCAB), DIM)).astype(np.float32)
+    table[0] = 100.0  # padding must never reach the pooled vector
+    graph = helper.make_graph(
+        [helper.make_node("Gather", ["table", "input_ids"], ["last_hidden_state"])],
+        "lookup",
+        [
+            helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["batch", "sequence"]),
+            helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["batch", "sequence"]),
+        ],
+        [helper.make_tensor_value_info("last_hidden_state", TensorProto.FLOAT, ["batch", "sequence", DIM])],
+        [numpy_helper.from_array(table, "table")],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 14)])
+    model.ir_version = 8
+    onnx.save(model, str(tmp_path / onnx_embedder.FP32_FILE))
+
+    tokenizer = Tokenizer(models.WordLevel(VOCAB, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.save(str(tmp_path / "tokenizer.json"))
+    return tmp_path, table
+
+
+def _expected(table, text):
+    pooled = table[[VOCAB.get(word, 1) for word in text.split()]].mean(axis=0)
+    return pooled / np.linalg.norm(pooled)
+
+
+def test_mean_pooling_ignores_padding_and_keeps_order(model_dir, monkeypatch):
+    path, table = model_dir
+    monkeypatch.setattr(onnx_embedder, "ONNX_BATCH_SIZE", 2)
+    embedder = OnnxEmbedder(str(path / onnx_embedder.FP32_FILE), str(path / "tokenizer.json"))
+
+    texts = ["cats like fish and dogs", "dogs", "cats like fish", "fish and cats", "zebras"]
+    vectors = embedder.embed(texts)
+
+    assert vectors.dtype == np.float32 and vectors.shape == (len(texts), DIM)
+    for text, vector in zip(texts, vectors):
+        assert np.allclose(vector, _expected(table, text), atol=1e-5)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+    assert embedder.embed([]).shape == (0, 0)
+
+
+def test_int8_variant_is_quantized_on_first_load(model_dir, monkeypatch):
+    path, table = model_dir
+    monkeypatch.setattr(onnx_embedder, "ONNX_MODEL_DIR", str(path))
+    embedder = onnx_embedder._load_onnx_embedder("unused-when-exported", quantized=True)
+
+    assert os.path.exists(path / onnx_embedder.INT8_FILE)
+    vector = embedder.embed(["cats like fish"])[0]
+    # int8 weights, scaled to the large padding row: close to fp32, not equal
+    assert float(vector @ _expected(table, "cats like fish")) > 0.95
@@ -0,0 +1,28 @@
+"""
+Data paths resolve against the backend directory, not the working directory
+    python -m pytest -q tests/test_paths.py
+"""
+import os
+
+from app.core.utils.paths import BACKEND_DIR, data_path
+
+
+def test_relative_paths_resolve_against_backend(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("TEST_DATA_PATH", raising=False)
+    assert data_path("TEST_DATA_PATH", "data/jobs/ingest.db") == os.path.join(BACKEND_DIR, "data/jobs/ingest.db")
+
+    monkeypatch.setenv("TEST_DATA_PATH", "custom/cache.db")
+    assert data_path("TEST_DATA_PATH", "data/x") == os.path.join(BACKEND_DIR, "custom/cache.db")
+
+
+def test_absolute_and_empty_values_are_kept(monkeypatch, tmp_path):
+    monkeypatch.setenv("TEST_DATA_PATH", str(tmp_path / "jobs.db"))
+    assert data_path("TEST_DATA_PATH", "data/x") == str(tmp_path / "jobs.db")
+
+    monkeypatch.setenv("TEST_DATA_PATH", "")
+    assert data_path("TEST_DATA_PATH", "data/x") == ""
+
+
+def test_backend_dir_holds_the_app_package():
+    assert os.path.isfile(os.path.join(BACKEND_DIR, "app", "main.py"))
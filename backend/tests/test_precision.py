@@ -0,0 +1,64 @@
+"""
+Vision model precision: env parsing, per-precision cache keys, load-time conversion
+    python -m pytest -q tests/test_precision.py
+"""
+import os
+import sys
+import subprocess
+
+import numpy as np
+import pytest
+
+from app.core.utils.precision import get_precision, model_id
+from app.core.utils.process_memory import rss_bytes
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_get_precision(monkeypatch):
+    monkeypatch.delenv("TEST_PRECISION", raising=False)
+    assert get_precision("TEST_PRECISION") == "fp32"
+    monkeypatch.setenv("TEST_PRECISION", "BF16")
+    assert get_precision("TEST_PRECISION") == "bf16"
+    monkeypatch.setenv("TEST_PRECISION", "fp16")
+    with pytest.raises(ValueError, match="TEST_PRECISION"):
+        get_precision("TEST_PRECISION")
+
+
+def test_reduced_precisions_get_their_own_cache_keys():
+    assert model_id("openai/clip-vit-base-patch32", "fp32") == "openai/clip-vit-base-patch32"
+    assert model_id("openai/clip-vit-base-patch32", "int8") == "openai/clip-vit-base-patch32|int8"
+    assert model_id("m", "bf16") != model_id("m", "int8")
+
+
+def test_vision_modules_read_their_precision_at_import():
+    code = (
+        "from app.core.embeddings import clip_embedder, blip_captioner\n"
+        "print(clip_embedder.CLIP_MODEL_ID.split('|')[-1], blip_captioner.BLIP_MODEL_ID.split('|')[-1])\n"
+    )
+    env = {**os.environ, "CLIP_PRECISION": "int8", "BLIP_PRECISION": "bf16"}
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    assert out.strip().splitlines()[-1] == "int8 bf16"
+
+
+def test_rss_tracks_allocations():
+    before = rss_bytes()
+    block = np.ones(64 * 1024 * 1024, dtype=np.uint8)  # touched, so resident
+    assert rss_bytes() - before > 32 * 1024 * 1024
+    del block
+
+
+def test_int8_quantizes_linear_layers_and_bf16_inputs_follow_weights():
+    torch = pytest.importorskip("torch")
+    from app.core.utils.precision import apply_precision, cast_inputs, load_kwargs
+
+    model = apply_precision(torch.nn.Sequential(torch.nn.Linear(4, 2)), "int8")
+    assert "Quantized" in type(model[0]).__name__ or "quantized" in type(model[0]).__module__
+    assert load_kwargs("bf16") == {"torch_dtype": torch.bfloat16} and load_kwargs("int8") == {}
+
+    bf16 = torch.nn.Linear(4, 2).to(torch.bfloat16)
+    inputs = cast_inputs({"pixel_values": torch.ones(1, 4), "input_ids": torch.ones(1, 4, dtype=torch.long)}, bf16)
+    assert inputs["pixel_values"].dtype == torch.bfloat16
+    assert inputs["input_ids"].dtype == torch.long
@@ -0,0 +1,60 @@
+"""
+Query retrieval branches: deadlines must not cancel shared batcher work
+    python -m pytest -q tests/test_query_branches.py
+"""
+import time
+import asyncio
+import threading
+
+from app.core.utils.micro_batcher import MicroBatcher
+from app.services import query_service
+
+
+def test_timed_out_branch_then_successful_query():
+    release = threading.Event()
+
+    def slow_embed(texts):
+        release.wait(5)
+        return [len(text) for text in texts]
+
+    batcher = MicroBatcher("test_branch", slow_embed, window_ms=1)
+    futures = []
+
+    async def retrieval(text):
+        future = batcher.submit_future(text)
+        futures.append(future)
+        return [await asyncio.wrap_future(future)]
+
+    async def scenario():
+        first = await query_service._branch("test_timeout", retrieval("abc"), 0.05)
+        release.set()
+        second = await query_service._branch("test_timeout", retrieval("abcd"), 5)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == ([], False)
+    assert second == ([4], True)
+    assert not futures[0].cancelled() and futures[0].result(timeout=5) == 3
+
+
+def test_deadline_starts_after_every_model_load():
+    resident = []
+
+    def load():
+        if not resident:
+            time.sleep(0.2)  # cold load or reload after eviction, longer than the deadline
+            resident.append(True)
+
+    async def retrieval():
+        if not resident:
+            await asyncio.sleep(0.2)  # would load the model inside the deadline
+        return ["image"]
+
+    async def scenario():
+        results = [await query_service._branch("test_load", retrieval(), 0.05, load)]
+        resident.clear()  # the model manager evicted the model (idle timeout / LRU)
+        results.append(await query_service._branch("test_load", retrieval(), 0.05, load))
+        results.append(await query_service._branch("test_load", retrieval(), 0.05, load))
+        return results
+
+    assert asyncio.run(scenario()) == [(["image"], True)] * 3
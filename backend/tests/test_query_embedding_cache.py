@@ -0,0 +1,73 @@
+"""
+Query embedding LRU: normalized repeats skip the model; eviction is by bytes
+    python -m pytest -q tests/test_query_embedding_cache.py
+"""
+import asyncio
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from app.core.utils import query_embedding_cache
+from app.core.utils.memory_cache import MemoryLRU
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    lru = MemoryLRU("test_query_embeddings", 1 << 20, sizeof=lambda vector: vector.nbytes)
+    monkeypatch.setattr(query_embedding_cache, "_cache", lru)
+    return lru
+
+
+def test_normalized_repeats_hit_the_cache(cache):
+    calls = []
+
+    def embed(text):
+        calls.append(text)
+        return [1.0, 2.0]
+
+    first = query_embedding_cache.cached_query_embedding("minilm", "What is  RAG?", embed)
+    again = query_embedding_cache.cached_query_embedding("minilm", " what is rag? ", embed)
+    other_model = query_embedding_cache.cached_query_embedding("clip", "what is rag?", embed)
+
+    assert calls == ["What is  RAG?", "what is rag?"]
+    assert again is first and first.dtype == np.float32
+    assert not first.flags.writeable  # shared between callers
+    assert np.array_equal(other_model, first)
+    assert cache.stats()["hits"] == 1
+
+
+def test_async_variant_shares_the_cache(cache):
+    submitted = []
+
+    def embed_future(text):
+        submitted.append(text)
+        future = Future()
+        future.set_result([0.5, 0.5])
+        return future
+
+    async def scenario():
+        a = await query_embedding_cache.cached_query_embedding_async("clip", "a cat", embed_future)
+        b = await query_embedding_cache.cached_query_embedding_async("clip", "A  Cat", embed_future)
+        return a, b
+
+    a, b = asyncio.run(scenario())
+    assert submitted == ["a cat"] and b is a
+    assert query_embedding_cache.cached_query_embedding("clip", "a cat", lambda text: 1 / 0) is a
+
+
+def test_memory_lru_evicts_least_recently_used_by_bytes():
+    lru = MemoryLRU("test_lru_bytes", 24, sizeof=len)
+    lru.set("a", b"x" * 8)
+    lru.set("b", b"x" * 8)
+    lru.set("c", b"x" * 8)
+    assert lru.get("a") is not None
+
+    lru.set("d", b"x" * 8)
+    assert lru.get("b") is None
+    assert all(lru.get(k) is not None for k in ("a", "c", "d"))
+
+    lru.set("too_big", b"x" * 25)
+    stats = lru.stats()
+    assert lru.get("too_big") is None
+    assert stats["bytes"] == 24 and stats["evictions"] == 1
@@ -0,0 +1,99 @@
+"""
+/query/stream: sources first, then tokens, then done; failures become an error event
+    python -m pytest -q tests/test_query_stream.py
+"""
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes import query as query_route
+from app.services import query_service
+
+CHUNKS = [{"text": "RAG retrieves context.", "score": 0.9, "metadata": {"source": "a.pdf", "page": 2}}]
+
+
+def _stub(monkeypatch, complete=True, cached=None, fail_after=None):
+    cached_answers = []
+
+    async def cached_answer(question, session_id):
+        return cached
+
+    async def retrieve(question, session_id):
+        return CHUNKS, ["img.png"], complete
+
+    async def stream(question, chunks, images):
+        for i, delta in enumerate(["RAG ", "uses ", "context."]):
+            if i == fail_after:
+                raise RuntimeError("LLM connection dropped")
+            yield delta
+
+    async def embed(question):
+        return [0.0]
+
+    monkeypatch.setattr(query_service, "_cached_answer_async", cached_answer)
+    monkeypatch.setattr(query_service, "_retrieve_async", retrieve)
+    monkeypatch.setattr(query_service, "stream_rag_answer", stream)
+    monkeypatch.setattr(query_service, "embed_query_async", embed)
+    monkeypatch.setattr(query_service, "answer_cache_version", lambda session_id: 7)
+    monkeypatch.setattr(
+        query_service, "cache_answer",
+        lambda question, session_id, answer, embedding, version: cached_answers.append((answer, version)),
+    )
+    return cached_answers
+
+
+def _events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        name, data = block.split("\n")
+        assert name.startswith("event: ") and data.startswith("data: ")
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def _post():
+    app = FastAPI()
+    app.include_router(query_route.router, prefix="/query")
+    response = TestClient(app).post("/query/stream", json={"question": "What is RAG?", "session_id": "s1"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    return _events(response.text)
+
+
+def test_metadata_then_tokens_then_done(monkeypatch):
+    cached_answers = _stub(monkeypatch)
+    events = _post()
+
+    assert [name for name, _ in events] == ["metadata", "token", "token", "token", "done"]
+    metadata = events[0][1]
+    assert metadata["cached"] is False and metadata["partial"] is False
+    assert metadata["sources"] == [{"source": "a.pdf", "page": 2, "score": 0.9}]
+    assert metadata["images"] == ["img.png"]
+    assert "".join(data["text"] for name, data in events if name == "token") == "RAG uses context."
+    assert cached_answers == [("RAG uses context.", 7)]
+
+
+def test_partial_retrieval_is_flagged_and_not_cached(monkeypatch):
+    cached_answers = _stub(monkeypatch, complete=False)
+    events = _post()
+    assert events[0][1]["partial"] is True
+    assert events[-1][0] == "done"
+    assert cached_answers == []
+
+
+def test_cached_answer_is_a_single_token(monkeypatch):
+    _stub(monkeypatch, cached="From cache.")
+    assert _post() == [
+        ("metadata", {"cached": True, "partial": False, "sources": [], "images": []}),
+        ("token", {"text": "From cache."}),
+        ("done", {}),
+    ]
+
+
+def test_failure_mid_stream_becomes_an_error_event(monkeypatch):
+    cached_answers = _stub(monkeypatch, fail_after=2)
+    events = _post()
+    assert [name for name, _ in events] == ["metadata", "token", "token", "error"]
+    assert events[-1][1] == {"detail": "LLM connection dropped"}
+    assert cached_answers == []
@@ -0,0 +1,60 @@
+"""
+Reranker: one batched pass for unseen (query, chunk) pairs, cached scores otherwise
+    python -m pytest -q tests/test_reranker.py
+"""
+import asyncio
+import math
+
+import pytest
+
+from app.core.embeddings import reranker
+from app.core.utils.memory_cache import MemoryLRU
+
+
+@pytest.fixture
+def scored(monkeypatch):
+    """Replaces the cross-encoder; logits are read from the chunk text"""
+    calls = []
+
+    def score_pairs(query, texts):
+        calls.append(list(texts))
+        return [float(text.split()[-1]) for text in texts]
+
+    monkeypatch.setattr(reranker, "_score_pairs", score_pairs)
+    monkeypatch.setattr(
+        reranker, "_score_cache",
+        MemoryLRU("test_rerank_scores", 1 << 20, sizeof=lambda score: reranker.SCORE_ENTRY_BYTES),
+    )
+    return calls
+
+
+def _chunk(chunk_id, logit, score=0.5):
+    return {"id": chunk_id, "text": f"chunk {chunk_id} {logit}", "score": score, "metadata": {}}
+
+
+def test_rerank_orders_by_cross_encoder_and_keeps_retrieval_score(scored):
+    ranked = reranker.rerank("q", [_chunk("a", -1.0, 0.9), _chunk("b", 2.0, 0.4), _chunk("c", 0.0)], 2)
+
+    assert [c["id"] for c in ranked] == ["b", "c"]
+    assert ranked[0]["retrieval_score"] == 0.4 and ranked[0]["rerank_score"] == 2.0
+    assert ranked[0]["score"] == pytest.approx(1 / (1 + math.exp(-2.0)))
+    assert ranked[1]["score"] == 0.5
+    assert scored == [["chunk a -1.0", "chunk b 2.0", "chunk c 0.0"]]  # one batch
+
+
+def test_follow_up_only_scores_unseen_chunks(scored):
+    reranker.rerank("What is RAG?", [_chunk("a", 1.0), _chunk("b", 2.0)], 2)
+    ranked = reranker.rerank(" what is  rag? ", [_chunk("b", 2.0), _chunk("c", 3.0)], 2)
+    assert [c["id"] for c in ranked] == ["c", "b"]
+    assert scored[1] == ["chunk c 3.0"]
+
+    reranker.rerank("another question", [_chunk("a", 1.0)], 1)
+    assert scored[2] == ["chunk a 1.0"]  # scores are per query
+
+
+def test_repeated_query_skips_the_model(scored):
+    chunks = [_chunk("a", 1.0), {"text": "no id 4.0", "score": 0.3}]
+    first = reranker.rerank("q", chunks, 2)
+    second = asyncio.run(reranker.rerank_async("q", chunks, 2))
+    assert second == first and len(scored) == 1
+    assert reranker.rerank("q", [], 3) == []
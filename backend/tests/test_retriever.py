@@ -0,0 +1,66 @@
+"""
+Hybrid retrieval: dense and BM25 results fused by reciprocal rank
+    python -m pytest -q tests/test_retriever.py
+"""
+import asyncio
+
+from app.core.retriever import retriever
+from app.core.retriever.retriever import _fuse
+
+
+def _hit(chunk_id, score):
+    return {"id": chunk_id, "score": score, "text": f"text of {chunk_id}", "metadata": {}}
+
+
+def test_fuse_ranks_by_reciprocal_rank_and_keeps_both_scores():
+    dense = [_hit("a", 0.91), _hit("b", 0.85), _hit("c", 0.40)]
+    lexical = [_hit("c", 12.5), _hit("d", 7.0)]
+    fused = _fuse(dense, lexical, top_k=10)
+
+    # c is third by cosine but first by BM25: 1/63 + 1/61 beats a's 1/61
+    assert [entry["id"] for entry in fused] == ["c", "a", "b", "d"]
+    assert fused[0]["dense_score"] == 0.40 and fused[0]["lexical_score"] == 12.5
+    assert "lexical_score" not in fused[1] and fused[1]["dense_score"] == 0.91
+    assert "dense_score" not in fused[3]
+    assert "rrf" not in fused[0]
+
+
+def test_fused_scores_are_scaled_to_one_for_first_in_both():
+    fused = _fuse([_hit("a", 0.9), _hit("b", 0.8)], [_hit("a", 3.0)], top_k=1)
+    assert len(fused) == 1
+    assert fused[0]["id"] == "a" and fused[0]["score"] == 1.0
+
+    only_dense = _fuse([_hit("x", 0.5)], [], top_k=5)
+    assert only_dense[0]["score"] == 0.5  # first in one list only
+
+
+def test_hits_without_ids_are_matched_by_text():
+    dense = [{"score": 0.7, "text": "same chunk", "metadata": {}}]
+    lexical = [{"score": 4.0, "text": "same chunk", "metadata": {}}]
+    fused = _fuse(dense, lexical, top_k=5)
+    assert len(fused) == 1 and fused[0]["score"] == 1.0
+
+
+def test_lexical_branch_only_for_session_queries(monkeypatch):
+    searched = []
+    monkeypatch.setattr(retriever, "_dense_chunks", lambda text, top_k, filter: [_hit("a", 0.9)])
+
+    async def dense_async(text, top_k, filter):
+        return [_hit("a", 0.9)]
+
+    def search(session_id, text, top_k):
+        searched.append(session_id)
+        return [_hit("b", 5.0)]
+
+    monkeypatch.setattr(retriever, "_dense_chunks_async", dense_async)
+    monkeypatch.setattr(retriever, "search_session", search)
+
+    assert [c["id"] for c in retriever.retrieve_chunks("q", 5, {"session_id": "s1"})] == ["a", "b"]
+    assert [c["id"] for c in asyncio.run(retriever.retrieve_chunks_async("q", 5, {"session_id": "s1"}))] \
+        == ["a", "b"]
+    assert [c["id"] for c in retriever.retrieve_chunks("q", 5, None)] == ["a"]
+    assert [c["id"] for c in retriever.retrieve_chunks("q", 5, {"session_id": {"$in": ["s1"]}})] == ["a"]
+
+    monkeypatch.setattr(retriever, "LEXICAL_TOP_K", 0)
+    assert [c["id"] for c in retriever.retrieve_chunks("q", 5, {"session_id": "s1"})] == ["a"]
+    assert searched == ["s1", "s1"]
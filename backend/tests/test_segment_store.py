@@ -0,0 +1,99 @@
+"""
+SegmentedIndex: flushes, tombstones, compaction and reopening from disk
+    python -m pytest -q tests/test_segment_store.py
+"""
+import os
+import pytest
+import numpy as np
+
+from app.core.vectorstore import segment_store
+from app.core.vectorstore.segment_store import SegmentedIndex
+
+
+def _vec(i):
+    values = np.zeros(4, dtype=np.float32)
+    values[i % 4] = 1 + i
+    return values.tolist()
+
+
+def _record(i, **metadata):
+    return {"id": f"v{i}", "values": _vec(i), "metadata": {"n": i, **metadata}}
+
+
+def _all_ids(index):
+    return {m["id"] for m in index.query([1, 1, 1, 1], top_k=100)["matches"]}
+
+
+def test_flush_threshold_and_reopen(tmp_path, monkeypatch):
+    monkeypatch.setattr(segment_store, "COMPACT_MIN_SEGMENTS", 100)
+    index = SegmentedIndex("test", 4, str(tmp_path), flush_rows=3)
+    index.upsert([_record(i, session_id="s1") for i in range(3)])
+    index.upsert([_record(3, session_id="s2")])
+
+    stats = index.describe_index_stats()
+    assert stats["segment_count"] == 1 and stats["buffered_vector_count"] == 1
+    assert _all_ids(index) == {"v0", "v1", "v2", "v3"}
+
+    index.persist()
+    reopened = SegmentedIndex("test", 4, str(tmp_path))
+    assert len(reopened) == 4
+    assert _all_ids(reopened) == {"v0", "v1", "v2", "v3"}
+    assert {m["id"] for m in reopened.query(_vec(1), top_k=10, filter={"session_id": "s1"})["matches"]} \
+        == {"v0", "v1", "v2"}
+
+    fetched = reopened.fetch(["v2"])["vectors"]["v2"]
+    assert np.allclose(fetched["values"], _vec(2))
+    assert fetched["metadata"] == {"n": 2, "session_id": "s1"}
+
+
+def test_upsert_and_delete_survive_reopen(tmp_path, monkeypatch):
+    monkeypatch.setattr(segment_store, "COMPACT_MIN_SEGMENTS", 100)
+    index = SegmentedIndex("test", 4, str(tmp_path), flush_rows=100)
+    index.upsert([_record(i, session_id="s1") for i in range(4)])
+    index.persist()
+
+    index.upsert([_record(0, session_id="s2")])  # supersedes the row on disk
+    index.delete(ids=["v1"])
+    index.delete(filter={"n": 2})
+    assert len(index) == 2
+    index.persist()
+
+    reopened = SegmentedIndex("test", 4, str(tmp_path))
+    assert _all_ids(reopened) == {"v0", "v3"}
+    assert reopened.fetch(["v0"])["vectors"]["v0"]["metadata"]["session_id"] == "s2"
+    assert reopened.query(_vec(0), top_k=10, filter={"session_id": "s1"})["matches"][0]["id"] == "v3"
+
+
+def test_compaction_merges_segments_and_drops_dead_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(segment_store, "COMPACT_MIN_SEGMENTS", 100)
+    index = SegmentedIndex("test", 4, str(tmp_path), flush_rows=100)
+    for start in range(0, 9, 3):
+        index.upsert([_record(i) for i in range(start, start + 3)])
+        index.persist()
+    index.delete(ids=["v4"])
+    index.upsert([_record(7, updated=True)])  # still buffered while compacting
+    assert index.describe_index_stats()["segment_count"] == 3
+
+    index.compact()
+    assert index.describe_index_stats()["segment_count"] == 1
+    assert _all_ids(index) == {f"v{i}" for i in range(9)} - {"v4"}
+    segments = [e for e in os.listdir(tmp_path) if e.startswith("seg_")]
+    assert len(segments) == 1
+
+    index.persist()
+    reopened = SegmentedIndex("test", 4, str(tmp_path))
+    assert len(reopened) == 8
+    assert reopened.fetch(["v7"])["vectors"]["v7"]["metadata"]["updated"] is True
+    assert "v4" not in reopened.fetch(["v4"])["vectors"]
+
+
+def test_float16_segments_and_dimension_check(tmp_path, monkeypatch):
+    monkeypatch.setattr(segment_store, "COMPACT_MIN_SEGMENTS", 100)
+    index = SegmentedIndex("test", 4, str(tmp_path), dtype="float16", flush_rows=2)
+    index.upsert([_record(0), _record(1)])
+    match = index.query(_vec(1), top_k=1, include_values=True)["matches"][0]
+    assert match["id"] == "v1"
+    assert np.allclose(match["values"], _vec(1), atol=1e-2)
+
+    with pytest.raises(ValueError):
+        SegmentedIndex("test", 8, str(tmp_path))
@@ -0,0 +1,40 @@
+"""
+Startup: importing the API loads no model or SDK packages and creates no clients
+    python -m pytest -q tests/test_startup_imports.py
+"""
+import os
+import sys
+import json
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BACKEND_DIR, "scripts"))
+
+from profile_imports import HEAVY_PACKAGES  # noqa: E402
+
+CHECK = """
+import sys, json
+import app.main
+from app.core.vectorstore import vector_store
+from app.core.generator import generator
+print(json.dumps({
+    "heavy": sorted(p for p in %r if p in sys.modules),
+    "clients": [vector_store._pc, generator._client, generator._async_client],
+}))
+"""
+
+
+def test_app_main_imports_no_heavy_packages(tmp_path):
+    env = {
+        **os.environ,
+        "VECTOR_BACKEND": "local",
+        "INGEST_QUEUE_PATH": str(tmp_path / "jobs.db"),  # in case startup touches the queue
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", CHECK % (HEAVY_PACKAGES,)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    assert report["heavy"] == []
+    assert report["clients"] == [None, None, None]
@@ -0,0 +1,68 @@
+"""
+Uploads: streamed to a hash-prefixed name; identical bytes reuse the first job
+    python -m pytest -q tests/test_upload_dedupe.py
+"""
+import io
+import os
+import asyncio
+
+from app.routes import ingest
+from app.services.job_queue import JobQueue
+
+
+class _Upload:
+    """The parts of UploadFile the route uses"""
+
+    def __init__(self, filename, data):
+        self.filename = filename
+        self.content_type = "application/pdf"
+        self._data = io.BytesIO(data)
+
+    async def read(self, size=-1):
+        return self._data.read(size)
+
+
+def _setup(tmp_path, monkeypatch):
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    jobs = JobQueue(str(tmp_path / "jobs.db"), 1, lambda job, progress, cancel: None)  # never started
+    monkeypatch.setattr(ingest, "UPLOAD_DIR", str(uploads))
+    monkeypatch.setattr(ingest, "UPLOAD_CHUNK_SIZE", 4)  # several blocks per upload
+    monkeypatch.setattr(ingest, "get_job_queue", lambda: jobs)
+    return uploads, jobs
+
+
+def test_save_upload_streams_and_hashes(tmp_path, monkeypatch):
+    uploads, _ = _setup(tmp_path, monkeypatch)
+    path, digest = asyncio.run(ingest.save_upload(_Upload("../../etc/report.pdf", b"hello world")))
+
+    assert digest == "b94d27b9934d3e08a52e52d7da7dabfac484efe37a5380ee9088f7ace2efcde9"
+    assert path == os.path.join(str(uploads), f"{digest[:16]}_report.pdf")
+    with open(path, "rb") as f:
+        assert f.read() == b"hello world"
+    assert os.listdir(uploads) == [os.path.basename(path)]  # no partial file left behind
+
+
+def test_same_bytes_reuse_the_first_job(tmp_path, monkeypatch):
+    uploads, jobs = _setup(tmp_path, monkeypatch)
+    first = asyncio.run(ingest.ingest_file(_Upload("a.pdf", b"same bytes")))
+    second = asyncio.run(ingest.ingest_file(_Upload("b.pdf", b"same bytes")))
+    other = asyncio.run(ingest.ingest_file(_Upload("a.pdf", b"other bytes")))
+
+    assert first["duplicate"] is False
+    assert second["duplicate"] is True
+    assert second["job_id"] == first["job_id"] and second["session_id"] == first["session_id"]
+    assert other["duplicate"] is False and other["session_id"] != first["session_id"]
+    # the duplicate's copy under another name is removed; same-named different files both stay
+    assert sorted(os.listdir(uploads)) == sorted(
+        os.path.basename(job["file_path"]) for job in (first, other)
+    )
+
+
+def test_failed_job_does_not_block_a_retry(tmp_path, monkeypatch):
+    _, jobs = _setup(tmp_path, monkeypatch)
+    first = asyncio.run(ingest.ingest_file(_Upload("a.pdf", b"retry me")))
+    jobs._finish(first["job_id"], "failed", {}, error="boom")
+
+    retry = asyncio.run(ingest.ingest_file(_Upload("a.pdf", b"retry me")))
+    assert retry["duplicate"] is False and retry["job_id"] != first["job_id"]
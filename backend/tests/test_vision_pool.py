@@ -0,0 +1,71 @@
+"""
+Vision worker pool: task errors, worker crashes and restarts, in-process fallback
+Spawns real worker processes; only tasks that need no model weights are sent
+    python -m pytest -q tests/test_vision_pool.py
+"""
+import os
+import time
+import signal
+
+import pytest
+
+from app.core.embeddings import vision_pool
+from app.core.embeddings.vision_pool import VisionPool, VisionWorkerError
+
+
+@pytest.fixture
+def pool():
+    pool = VisionPool("test", 2, threads=1, max_in_flight=2)
+    yield pool
+    pool.stop()
+
+
+def _wait_for(condition, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return
+        time.sleep(0.05)
+    raise AssertionError("condition not reached")
+
+
+def test_tasks_run_in_every_worker(pool):
+    pool.warmup([])
+    stats = pool.stats()
+    assert stats["completed"] == 2 and stats["failed"] == 0
+    assert len({w["pid"] for w in stats["workers"]}) == 2
+    assert all(w["alive"] and w["in_flight"] == 0 for w in stats["workers"])
+    assert pool.run("warmup", []) == []
+
+
+def test_task_error_is_raised_and_the_worker_survives(pool):
+    with pytest.raises(VisionWorkerError, match="Unknown vision task"):
+        pool.submit("no_such_task", []).result(timeout=30)
+    assert pool.submit("warmup", []).result(timeout=30) == []
+    assert pool.stats()["failed"] == 1 and pool.stats()["crashes"] == 0
+
+
+def test_killed_worker_is_restarted(pool):
+    pool.warmup([])
+    pool.models.add("clip")  # as if warmed with a model
+    victim = pool._workers[0]
+    old_pid = victim.process.pid
+    os.kill(old_pid, signal.SIGKILL)
+
+    _wait_for(lambda: pool.stats()["crashes"] == 1 and victim.process.pid != old_pid)
+    stats = pool.stats()
+    assert stats["workers"][0]["restarts"] == 1 and stats["workers"][1]["restarts"] == 0
+    assert pool.models == set()  # the new process has loaded nothing yet
+
+    # Both workers, including the replacement, take tasks again
+    assert pool.submit("warmup", [], victim).result(timeout=30) == []
+    pool.warmup([])
+
+
+def test_no_pool_when_size_is_zero(monkeypatch):
+    monkeypatch.setitem(vision_pool.POOL_SIZES, "ingest", 0)
+    assert vision_pool.get_vision_pool("ingest") is None
+    assert vision_pool.get_vision_pool("unknown") is None
+    monkeypatch.setitem(vision_pool.POOL_SIZES, "ingest", 1)
+    monkeypatch.setattr(vision_pool, "_in_worker", True)  # workers never start pools of their own
+    assert vision_pool.get_vision_pool("ingest") is None
@@ -111,6 +111,39 @@ async function checkServerStatus(retries = 10, delay = 2000) {
 }
 
 
+// Poll an ingestion job until it finishes, updating the progress bar
+async function waitForIngestJob(jobId) {
+    while (true) {
+        const res = await fetch(`${BACKEND_URL}/ingest/jobs/${jobId}`);
+        if (!res.ok) {
+            throw new Error(`Could not fetch ingestion status (${res.status})`);
+        }
+        const job = await res.json();
+
+        if (job.status === "succeeded") {
+            return job;
+        }
+        if (job.status === "failed" || job.status === "cancelled") {
+            throw new Error(job.error || `Ingestion ${job.status}`);
+        }
+
+        const p = job.progress || {};
+        if (p.chunks) {
+            const done = p.upserted / p.chunks;
+            progressBar.style.width = `${Math.round(35 + 60 * done)}%`;
+            uploadStatusText.innerText = `Indexing... ${p.pages} pages, ${p.upserted}/${p.chunks} chunks`;
+        } else if (p.images) {
+            progressBar.style.width = `${Math.round(35 + 60 * p.images_done / p.images)}%`;
+            uploadStatusText.innerText = `Indexing... ${p.images_done}/${p.images} images`;
+        } else if (job.status === "queued") {
+            uploadStatusText.innerText = "Waiting in queue...";
+        }
+
+        await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+}
+
+
 // Handle File Upload
 async function handleFileUpload(file) {
     // Validation
@@ -144,7 +177,7 @@ async function handleFileUpload(file) {
         
         clearTimeout(timeoutId);
 
-        progressBar.style.width = "80%";
+        progressBar.style.width = "35%";
 
         if (!response.ok) {
             const err = await response.text();
@@ -157,7 +190,11 @@ async function handleFileUpload(file) {
             throw new Error(errorMsg);
         }
 
-        const result = await response.json();
+        // Ingestion runs as a background job; poll until it finishes
+        // (a file that was already ingested comes back finished)
+        const job = await response.json();
+        uploadStatusText.innerText = "Indexing...";
+        const result = job.status === "succeeded" ? job : await waitForIngestJob(job.job_id);
 
         // Critical: Set Session ID
         SESSION_ID = result.session_id;
@@ -235,11 +272,17 @@ async function askQuestion() {
     // Show Typing Indicator
     const typingId = showTypingIndicator();
 
+    let timeoutId;
     try {
         const controller = new AbortController();
-        const timeoutId = setTimeout(() => controller.abort(), 120000); // 2 minutes for queries
-        
-        const response = await fetch(`${BACKEND_URL}/query`, {
+        // Abort only if the server goes quiet for 2 minutes (reset on every chunk received)
+        const resetTimeout = () => {
+            clearTimeout(timeoutId);
+            timeoutId = setTimeout(() => controller.abort(), 120000);
+        };
+        resetTimeout();
+
+        const response = await fetch(`${BACKEND_URL}/query/stream`, {
             method: "POST",
             headers: { "Content-Type": "application/json" },
             body: JSON.stringify({
@@ -248,16 +291,39 @@ async function askQuestion() {
             }),
             signal: controller.signal
         });
-        
-        clearTimeout(timeoutId);
 
         if (!response.ok) throw new Error("Failed to get answer");
 
-        const result = await response.json();
+        // Replace the typing indicator with the answer on the first token,
+        // then re-render the markdown at most once per frame
+        let answer = "";
+        let content = null;
+        let renderPending = false;
+        const render = () => {
+            renderPending = false;
+            content.innerHTML = marked.parse(answer);
+            chatContainer.scrollTop = chatContainer.scrollHeight;
+        };
+
+        await readEventStream(response, (event, data) => {
+            if (event === "token") {
+                if (!content) {
+                    removeMessage(typingId);
+                    const messageId = addMessage('bot', '');
+                    content = document.getElementById(messageId).querySelector('.message-content');
+                }
+                answer += data.text;
+                if (!renderPending) {
+                    renderPending = true;
+                    requestAnimationFrame(render);
+                }
+            } else if (event === "error") {
+                throw new Error(data.detail || "Failed to get answer");
+            }
+        }, resetTimeout);
 
-        // Remove typing indicator & show answer
-        removeMessage(typingId);
-        addMessage('bot', result.answer);
+        if (!content) throw new Error("Empty answer");
+        render();
 
     } catch (error) {
         console.error(error);
@@ -270,11 +336,42 @@ async function askQuestion() {
         
         addMessage('bot', errorMsg);
     } finally {
+        clearTimeout(timeoutId);
         sendBtn.disabled = false;
         userQuery.focus();
     }
 }
 
+
+// Read a Server-Sent Events response body, calling onEvent(event, data) for
+// each message (data is JSON) and onChunk() whenever bytes arrive
+async function readEventStream(response, onEvent, onChunk) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        onChunk();
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+            const message = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = "message";
+            let data = "";
+            for (const line of message.split("\n")) {
+                if (line.startsWith("event:")) event = line.slice(6).trim();
+                else if (line.startsWith("data:")) data += line.slice(5).trim();
+            }
+            if (data) onEvent(event, JSON.parse(data));
+        }
+    }
+}
+
 /* =========================================
    UI HELPERS
    ========================================= */